@@ -0,0 +1,193 @@
+"""
+Writes to the applications, in order, shared by every API worker. Each worker
+keeps its own application table, search index and ranking engine and brings
+them up to date by replaying the changes it has not applied yet (main.py,
+sync_applications), so an application submitted to one worker can be read,
+searched and ranked on any other. IDs are given out in the same transaction
+that records the applications, so they are unique across workers and leave
+no gaps; a clear starts them again at APP-00001.
+
+The in-process log suits a single worker and keeps nothing once a change is
+applied; the SQLite log is shared by workers on one host and replayed on
+startup. SQLite's locking needs a local disk: don't put the file on a network
+filesystem.
+"""
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Tuple
+
+from application_table import application_id_for
+from session_store import HERE, SESSION_STORE
+from telemetry import span
+
+# memory (single worker) or sqlite (shared between workers); follows SESSION_STORE by default
+APPLICATION_STORE = os.getenv("APPLICATION_STORE", SESSION_STORE)
+APPLICATION_STORE_PATH = os.getenv("APPLICATION_STORE_PATH", os.path.join(HERE, "applications.sqlite3"))
+# Changes read per query while catching up
+READ_BATCH = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Kinds of change: a new application; fields set on one (resume_text,
+# resume_skills, quiz_score); an interview score; a position description;
+# everything cleared
+APPLICATION = "application"
+UPDATE = "update"
+INTERVIEW_SCORE = "interview_score"
+POSITION = "position"
+CLEAR = "clear"
+
+Change = Tuple[int, str, dict]  # (sequence number, kind, data)
+
+
+class ApplicationLog(ABC):
+    # True when other workers write to it too, so reads may block on the disk
+    shared = False
+
+    @abstractmethod
+    def add(self, applications: List[dict]) -> List[str]:
+        """Give each application (without an application_id) the next ID and record it; returns the IDs"""
+
+    @abstractmethod
+    def record(self, kind: str, data: dict):
+        """Record a change other than a new application or a clear"""
+
+    @abstractmethod
+    def clear(self):
+        """Record that every application was cleared; IDs start again at APP-00001"""
+
+    @abstractmethod
+    def since(self, seq: int, limit: int = READ_BATCH) -> List[Change]:
+        """Up to limit changes recorded after seq, oldest first"""
+
+
+class LocalApplicationLog(ApplicationLog):
+    """In-process; a change is handed out once and then forgotten"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending: List[Change] = []
+        self.seq = 0
+        self.count = 0
+
+    def _append(self, kind: str, data: dict):
+        self.seq += 1
+        self.pending.append((self.seq, kind, data))
+
+    def add(self, applications: List[dict]) -> List[str]:
+        with self.lock:
+            ids = []
+            for application in applications:
+                ids.append(application_id_for(self.count))
+                self.count += 1
+                self._append(APPLICATION, {**application, "application_id": ids[-1]})
+            return ids
+
+    def record(self, kind: str, data: dict):
+        with self.lock:
+            self._append(kind, data)
+
+    def clear(self):
+        with self.lock:
+            self.pending = [change for change in self.pending if change[1] == POSITION]
+            self.count = 0
+            self._append(CLEAR, {})
+
+    def since(self, seq: int, limit: int = READ_BATCH) -> List[Change]:
+        with self.lock:
+            # Only this worker reads it, and always from where it left off
+            changes = self.pending[:limit]
+            del self.pending[:limit]
+            return changes
+
+
+class SQLiteApplicationLog(ApplicationLog):
+    """SQLite-backed in WAL mode; every worker opening the same path reads the same changes"""
+    shared = True
+
+    def __init__(self, path: str = APPLICATION_STORE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def _insert(self, changes: List[Tuple[str, dict]]):
+        self.connection.executemany(
+            "INSERT INTO changes (kind, data) VALUES (?, ?)",
+            [(kind, json.dumps(data)) for kind, data in changes]
+        )
+
+    def add(self, applications: List[dict]) -> List[str]:
+        with self.lock, span("application_log"):
+            # IMMEDIATE takes the write lock up front, so two workers cannot read the same count
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.connection.execute("SELECT value FROM counters WHERE name = 'application'").fetchone()
+                count = row[0] if row else 0
+                ids = [application_id_for(count + offset) for offset in range(len(applications))]
+                self._insert([
+                    (APPLICATION, {**application, "application_id": application_id})
+                    for application, application_id in zip(applications, ids)
+                ])
+                self.connection.execute(
+                    "INSERT INTO counters (name, value) VALUES ('application', ?) "
+                    "ON CONFLICT (name) DO UPDATE SET value = excluded.value",
+                    (count + len(applications),)
+                )
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+        return ids
+
+    def record(self, kind: str, data: dict):
+        with self.lock, span("application_log"):
+            self._insert([(kind, data)])
+
+    def clear(self):
+        # Changes before the clear are dropped, as replaying them would only be undone;
+        # position descriptions outlive a clear
+        with self.lock, span("application_log"):
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.execute("DELETE FROM changes WHERE kind != ?", (POSITION,))
+                self.connection.execute("DELETE FROM counters WHERE name = 'application'")
+                self._insert([(CLEAR, {})])
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def since(self, seq: int, limit: int = READ_BATCH) -> List[Change]:
+        with self.lock, span("application_log"):
+            rows = self.connection.execute(
+                "SELECT seq, kind, data FROM changes WHERE seq > ? ORDER BY seq LIMIT ?", (seq, limit)
+            ).fetchall()
+        return [(seq, kind, json.loads(data)) for seq, kind, data in rows]
+
+
+def create_application_log(kind: str = APPLICATION_STORE) -> ApplicationLog:
+    if kind == "memory":
+        if SESSION_STORE == "sqlite":
+            # IDs would start again at APP-00001 on restart, and pick up the stored sessions
+            # (evaluations are kept under the application ID) of the applications they once named
+            raise ValueError("APPLICATION_STORE=memory needs SESSION_STORE=memory (sessions outlive the IDs they use)")
+        return LocalApplicationLog()
+    if kind == "sqlite":
+        return SQLiteApplicationLog()
+    raise ValueError(f"Unknown APPLICATION_STORE '{kind}' (expected memory or sqlite)")
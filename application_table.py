@@ -0,0 +1,424 @@
+"""
+Compact in-memory application store. Applications are kept column by column:
+categorical fields (position, resume file name, source) as integer codes,
+timestamps, sizes and quiz scores in typed arrays, name/email/phone packed
+into one string, and the ID and resume path derived from the row unless they
+differ from the usual ones. A row is read through an ApplicationRecord view
+that behaves like the application dict (record["position"], record.get(...)),
+so the search index, the ranking engine and resume extraction use it as it
+is; plain dicts are built only at the API boundary (to_dict). Scans read the
+columns directly (ApplicationTable.scan).
+"""
+import gc
+import math
+import sys
+from array import array
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+RESUME_DIR = "/tmp/resumes"
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+NO_TIMESTAMP = -(2 ** 63)
+# Separates the packed name, email and phone; it is replaced by a space in the
+# values themselves, so a submitted name cannot shift the fields after it
+SEPARATOR = "\x1f"
+
+# Keys of an application dict, in API order; source and quiz_score appear only when set
+FIELDS = ("application_id", "full_name", "email", "phone", "position", "cover_letter",
+          "resume_filename", "resume_path", "resume_size", "submitted_at", "resume_text",
+          "resume_skills", "source", "quiz_score")
+OPTIONAL_FIELDS = frozenset(("source", "quiz_score"))
+
+
+@contextmanager
+def gc_paused():
+    """
+    Hold off the cyclic garbage collector while building many small containers
+    that cannot form cycles (row dicts of strings and numbers); otherwise it
+    rescans them repeatedly as they are allocated.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def application_id_for(row: int) -> str:
+    """The ID the table gives the application stored at row"""
+    return f"APP-{row + 1:05d}"
+
+
+def resume_path_for(application_id: str, filename: str) -> str:
+    """Where a stored application's resume file is saved"""
+    return f"{RESUME_DIR}/{application_id}_{filename}"
+
+
+@lru_cache(maxsize=4096)
+def _date_text(days: int) -> str:
+    return (EPOCH + timedelta(days=days)).date().isoformat()
+
+
+def microseconds_of(moment: datetime) -> int:
+    """A naive datetime as microseconds since the epoch, as timestamps are stored"""
+    return (moment - EPOCH) // MICROSECOND
+
+
+def format_timestamp(microseconds: int) -> str:
+    """Microseconds since the epoch -> the ISO text datetime.isoformat() gives"""
+    seconds, fraction = divmod(microseconds, 1_000_000)
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    text = f"{_date_text(days)}T{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{text}.{fraction:06d}" if fraction else text
+
+
+class Categories:
+    """Interned values of a categorical column; code 0 is None"""
+
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self.codes: Dict[str, int] = {}
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return code
+
+
+class ApplicationRecord:
+    """A view of one row of an ApplicationTable, with dict-style access by the keys in FIELDS"""
+    __slots__ = ("table", "row")
+
+    def __init__(self, table: "ApplicationTable", row: int):
+        self.table = table
+        self.row = row
+
+    def __getitem__(self, key: str):
+        value = self.table.value(self.row, key)
+        if value is None and key in OPTIONAL_FIELDS:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value):
+        self.table.set_value(self.row, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.table.getters and (key not in OPTIONAL_FIELDS or self.table.value(self.row, key) is not None)
+
+    def get(self, key: str, default=None):
+        value = self.table.value(self.row, key) if key in self.table.getters else None
+        return default if value is None else value
+
+    def to_dict(self) -> dict:
+        return self.table.row_dict(self.row)
+
+
+class ApplicationTable:
+    """
+    Rows in submission order. Not thread-safe: like the search index, it is
+    written from the event loop only.
+    """
+
+    def __init__(self, applications: Iterable[dict] = ()):
+        self.clear()
+        self.getters = {
+            "application_id": self._application_id,
+            "full_name": lambda row: self.contacts[row].split(SEPARATOR)[0],
+            "email": lambda row: self.contacts[row].split(SEPARATOR)[1],
+            "phone": lambda row: self.contacts[row].split(SEPARATOR)[2],
+            "position": lambda row: self.positions.values[self.position_codes[row]],
+            "cover_letter": lambda row: self.cover_letters[row],
+            "resume_filename": lambda row: self.filenames.values[self.filename_codes[row]],
+            "resume_path": self._resume_path,
+            "resume_size": lambda row: self.resume_sizes[row],
+            "submitted_at": self._submitted_at,
+            "resume_text": lambda row: self.resume_texts[row],
+            "resume_skills": lambda row: self.resume_skills[row],
+            "source": lambda row: self.sources.values[self.source_codes[row]],
+            "quiz_score": self._quiz_score,
+        }
+        for application in applications:
+            self.append(application)
+
+    def clear(self):
+        # Bumped on every write; with a process ID it tags responses for conditional GETs
+        self.revision = getattr(self, "revision", 0) + 1
+        self.ids: Dict[str, int] = {}  # only IDs other than application_id_for(row)
+        self.irregular: Dict[int, dict] = {}  # row -> ID, path or timestamp that did not fit its column
+        self.contacts: List[str] = []
+        self.cover_letters: List[Optional[str]] = []
+        self.resume_texts: List[str] = []
+        self.resume_skills: List[tuple] = []
+        self.positions = Categories()
+        self.filenames = Categories()
+        self.sources = Categories()
+        self.position_codes = array("I")
+        self.filename_codes = array("I")
+        self.source_codes = array("I")
+        self.resume_sizes = array("q")
+        self.submitted = array("q")  # microseconds since the epoch (naive local time)
+        self.quiz_scores = array("d")  # NaN when there is none
+        self.quiz_recorded = array("q")  # microseconds since the epoch the quiz score was set
+
+    def __len__(self) -> int:
+        return len(self.contacts)
+
+    def __iter__(self) -> Iterator[ApplicationRecord]:
+        return (ApplicationRecord(self, row) for row in range(len(self)))
+
+    # ==================== WRITES ====================
+
+    def append(self, application: dict) -> ApplicationRecord:
+        """Store an application dict (resume_content is not kept; the file is on disk)"""
+        row = len(self)
+        self.revision += 1
+        application_id = application["application_id"]
+        if application_id != application_id_for(row):
+            self.ids[application_id] = row
+            self.irregular.setdefault(row, {})["application_id"] = application_id
+
+        self.contacts.append(SEPARATOR.join(
+            str(application.get(field) or "").replace(SEPARATOR, " ") for field in ("full_name", "email", "phone")
+        ))
+        self.cover_letters.append(application.get("cover_letter"))
+        self.resume_texts.append(application.get("resume_text") or "")
+        self.resume_skills.append(())
+        self.position_codes.append(0)
+        self.filename_codes.append(self.filenames.code(application.get("resume_filename")))
+        self.source_codes.append(0)
+        self.resume_sizes.append(application.get("resume_size") or 0)
+        self.submitted.append(NO_TIMESTAMP)
+        self.quiz_scores.append(math.nan)
+        self.quiz_recorded.append(NO_TIMESTAMP)
+
+        for field in ("position", "resume_path", "submitted_at", "resume_skills", "source", "quiz_score"):
+            if application.get(field) is not None:
+                self.set_value(row, field, application[field])
+        return ApplicationRecord(self, row)
+
+    def set_value(self, row: int, key: str, value):
+        self.revision += 1
+        if key == "position":
+            self.position_codes[row] = self.positions.code(value)
+        elif key == "source":
+            self.source_codes[row] = self.sources.code(value)
+        elif key == "resume_text":
+            self.resume_texts[row] = value or ""
+        elif key == "resume_skills":
+            self.resume_skills[row] = tuple(sys.intern(skill) for skill in value or ())
+        elif key == "quiz_score":
+            self.quiz_scores[row] = math.nan if value is None else float(value)
+            self.quiz_recorded[row] = NO_TIMESTAMP if value is None else microseconds_of(datetime.now())
+        elif key == "cover_letter":
+            self.cover_letters[row] = value
+        elif key == "resume_path":
+            default = resume_path_for(self._application_id(row), self.filenames.values[self.filename_codes[row]] or "")
+            self._set_irregular(row, key, None if value == default else value)
+        elif key == "submitted_at":
+            self._set_irregular(row, key, None)
+            try:
+                moment = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                moment = None
+            if moment is None or moment.tzinfo is not None:
+                self.submitted[row] = NO_TIMESTAMP
+                self._set_irregular(row, key, value)
+            else:
+                self.submitted[row] = microseconds_of(moment)
+        else:
+            raise KeyError(f"{key} cannot be changed")
+
+    def _set_irregular(self, row: int, key: str, value):
+        if value is None:
+            self.irregular.get(row, {}).pop(key, None)
+        else:
+            self.irregular.setdefault(row, {})[key] = value
+
+    # ==================== READS ====================
+
+    def _application_id(self, row: int) -> str:
+        irregular = self.irregular.get(row)
+        if irregular and "application_id" in irregular:
+            return irregular["application_id"]
+        return application_id_for(row)
+
+    def _resume_path(self, row: int) -> Optional[str]:
+        irregular = self.irregular.get(row)
+        if irregular and "resume_path" in irregular:
+            return irregular["resume_path"]
+        filename = self.filenames.values[self.filename_codes[row]]
+        return resume_path_for(self._application_id(row), filename) if filename else None
+
+    def _submitted_at(self, row: int) -> Optional[str]:
+        microseconds = self.submitted[row]
+        if microseconds == NO_TIMESTAMP:
+            return self.irregular.get(row, {}).get("submitted_at")
+        return format_timestamp(microseconds)
+
+    def _quiz_score(self, row: int) -> Optional[float]:
+        score = self.quiz_scores[row]
+        return None if math.isnan(score) else score
+
+    def _id_column(self) -> List[str]:
+        ids = [f"APP-{row:05d}" for row in range(1, len(self) + 1)]
+        for application_id, row in self.ids.items():
+            ids[row] = application_id
+        return ids
+
+    def _contact_columns(self) -> Tuple[List[str], List[str], List[str]]:
+        names, emails, phones = zip(*(contact.split(SEPARATOR) for contact in self.contacts)) if self.contacts else ((), (), ())
+        return list(names), list(emails), list(phones)
+
+    @staticmethod
+    def _category_column(categories: Categories, codes: array) -> List[Optional[str]]:
+        values = categories.values
+        return [values[code] for code in codes]
+
+    def _path_column(self, ids: Optional[List[str]] = None) -> List[Optional[str]]:
+        filenames = self.filenames.values
+        column = [
+            resume_path_for(application_id, filenames[code]) if filenames[code] else None
+            for application_id, code in zip(ids or self._id_column(), self.filename_codes)
+        ]
+        for row, irregular in self.irregular.items():
+            if "resume_path" in irregular:
+                column[row] = irregular["resume_path"]
+        return column
+
+    def _timestamp_column(self) -> List[Optional[str]]:
+        # Formatted in one numpy pass; loaded on first use, like in ranking
+        import numpy as np
+
+        stamps = np.frombuffer(self.submitted, dtype=np.int64, count=len(self))
+        texts = np.datetime_as_string(stamps.astype("datetime64[us]"), unit="us").tolist()
+        column = [text[:-7] if text.endswith(".000000") else text for text in texts]
+        for row in np.flatnonzero(stamps == NO_TIMESTAMP).tolist():
+            column[row] = self._submitted_at(row)
+        return column
+
+    def row_of(self, application_id: str) -> Optional[int]:
+        row = self.ids.get(application_id)
+        if row is not None:
+            return row
+        # Regular IDs are APP-<row + 1>
+        if application_id.startswith("APP-") and application_id[4:].isdigit():
+            row = int(application_id[4:]) - 1
+            if 0 <= row < len(self) and self._application_id(row) == application_id:
+                return row
+        return None
+
+    def get(self, application_id: str) -> Optional[ApplicationRecord]:
+        row = self.row_of(application_id)
+        return None if row is None else ApplicationRecord(self, row)
+
+    def value(self, row: int, key: str):
+        return self.getters[key](row)
+
+    def row_dict(self, row: int) -> dict:
+        name, email, phone = self.contacts[row].split(SEPARATOR)
+        application = {
+            "application_id": self._application_id(row),
+            "full_name": name,
+            "email": email,
+            "phone": phone,
+            "position": self.positions.values[self.position_codes[row]],
+            "cover_letter": self.cover_letters[row],
+            "resume_filename": self.filenames.values[self.filename_codes[row]],
+            "resume_path": self._resume_path(row),
+            "resume_size": self.resume_sizes[row],
+            "submitted_at": self._submitted_at(row),
+            "resume_text": self.resume_texts[row],
+            "resume_skills": list(self.resume_skills[row])
+        }
+        source = self.sources.values[self.source_codes[row]]
+        if source is not None:
+            application["source"] = source
+        quiz_score = self._quiz_score(row)
+        if quiz_score is not None:
+            application["quiz_score"] = quiz_score
+        return application
+
+    def dicts(self) -> List[dict]:
+        """Every row as an application dict, built column by column"""
+        ids = self._id_column()
+        names, emails, phones = self._contact_columns()
+        with gc_paused():
+            return self._build_dicts(ids, names, emails, phones)
+
+    def _build_dicts(self, ids: List[str], names: List[str], emails: List[str], phones: List[str]) -> List[dict]:
+        dicts = [
+            {"application_id": application_id, "full_name": name, "email": email, "phone": phone,
+             "position": position, "cover_letter": cover_letter, "resume_filename": filename,
+             "resume_path": resume_path, "resume_size": size, "submitted_at": submitted_at,
+             "resume_text": resume_text, "resume_skills": list(skills)}
+            for application_id, name, email, phone, position, cover_letter, filename, resume_path, size,
+            submitted_at, resume_text, skills in zip(
+                ids, names, emails, phones, self._category_column(self.positions, self.position_codes),
+                self.cover_letters, self._category_column(self.filenames, self.filename_codes),
+                self._path_column(ids), self.resume_sizes, self._timestamp_column(), self.resume_texts, self.resume_skills
+            )
+        ]
+        for row, code in enumerate(self.source_codes):
+            if code:
+                dicts[row]["source"] = self.sources.values[code]
+        for row, score in enumerate(self.quiz_scores):
+            if score == score:  # not NaN
+                dicts[row]["quiz_score"] = score
+        return dicts
+
+    def rows_since(self, since: Optional[datetime] = None) -> Iterator[int]:
+        """
+        Rows submitted at or after since (naive, local time like submitted_at), or
+        every row. Rows whose timestamp did not fit the column are always included.
+        """
+        if since is None:
+            return iter(range(len(self)))
+        cutoff = microseconds_of(since)
+        return (row for row, stamp in enumerate(self.submitted) if stamp >= cutoff or stamp == NO_TIMESTAMP)
+
+    def quiz_scores_since(self, since: Optional[datetime] = None) -> Iterator[Tuple[str, float, str]]:
+        """(application ID, quiz score, recorded at) of scores recorded at or after since, or all of them"""
+        cutoff = NO_TIMESTAMP + 1 if since is None else microseconds_of(since)
+        for row, recorded in enumerate(self.quiz_recorded):
+            if recorded >= cutoff:
+                yield self._application_id(row), self.quiz_scores[row], format_timestamp(recorded)
+
+    def scan(self, *keys: str) -> Iterator[Tuple]:
+        """Rows as tuples of the given fields, read column by column"""
+        return zip(*(self.column(key) for key in keys))
+
+    def column(self, key: str) -> List:
+        """One field of every row"""
+        if key == "application_id":
+            return self._id_column()
+        if key == "full_name":
+            return [contact.partition(SEPARATOR)[0] for contact in self.contacts]
+        if key in ("email", "phone"):
+            return self._contact_columns()[("full_name", "email", "phone").index(key)]
+        if key == "position":
+            return self._category_column(self.positions, self.position_codes)
+        if key == "resume_filename":
+            return self._category_column(self.filenames, self.filename_codes)
+        if key == "source":
+            return self._category_column(self.sources, self.source_codes)
+        if key == "resume_path":
+            return self._path_column()
+        if key == "submitted_at":
+            return self._timestamp_column()
+        if key == "resume_skills":
+            return [list(skills) for skills in self.resume_skills]
+        if key == "quiz_score":
+            return [None if score != score else score for score in self.quiz_scores]
+        return list({"cover_letter": self.cover_letters, "resume_size": self.resume_sizes,
+                     "resume_text": self.resume_texts}[key])
@@ -0,0 +1,3 @@
+"""
+Benchmarks for the CPU hot paths (run with: python -m benchmarks.run)
+"""
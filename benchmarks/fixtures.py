@@ -0,0 +1,139 @@
+"""
+Synthetic fixture corpora for the benchmarks: resumes, speech clips and large stores
+"""
+import base64
+import os
+import random
+import shutil
+import subprocess
+from datetime import datetime, timedelta
+
+from fakes import SAMPLE_RESUME_LINES, make_text_pdf, make_wav_bytes
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".fixtures")
+
+POSITIONS = [
+    "Software Engineer", "Backend Engineer", "Frontend Engineer", "Data Scientist",
+    "DevOps Engineer", "Product Manager", "QA Engineer", "Machine Learning Engineer"
+]
+
+# Lines that pad a resume out to a page
+FILLER_LINES = [
+    "Designed and shipped a Python and FastAPI service backed by PostgreSQL and Redis",
+    "Containerized workloads with Docker and deployed them to Kubernetes on AWS",
+    "Built React and TypeScript dashboards consuming a GraphQL API",
+    "Set up CI/CD with Jenkins and GitHub Actions, cutting release time by 60%",
+    "Mentored interns and ran agile ceremonies for a team of eight",
+]
+
+DATA_SCIENTIST_DESCRIPTION = (
+    "We are hiring a data scientist to build forecasting and recommendation models. "
+    "You will work in Python with pandas, NumPy and scikit-learn, write SQL against our "
+    "warehouse, and ship models with Docker. Experience with PyTorch and A/B testing is a plus."
+)
+
+
+def resume_pages(pages: int):
+    """Page contents for a resume of the given length"""
+    body = (FILLER_LINES * 10)[:48]
+    return [SAMPLE_RESUME_LINES + body[:36]] + [body] * (pages - 1)
+
+
+def resume_text(pages: int) -> str:
+    return "\n".join(line for page in resume_pages(pages) for line in page)
+
+
+def _cached(name: str, build) -> str:
+    """Build a fixture file once and reuse it across runs"""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    path = os.path.join(FIXTURE_DIR, name)
+    if not os.path.exists(path):
+        data = build()
+        with open(path, "wb") as f:
+            f.write(data)
+    return path
+
+
+def pdf_fixture(pages: int) -> str:
+    return _cached(f"resume_{pages}p.pdf", lambda: make_text_pdf(resume_pages(pages)))
+
+
+def docx_fixture(pages: int) -> str:
+    def build():
+        import io
+        from docx import Document
+
+        document = Document()
+        for index, page in enumerate(resume_pages(pages)):
+            for line in page:
+                document.add_paragraph(line)
+            if index < pages - 1:
+                document.add_page_break()
+        buffer = io.BytesIO()
+        document.save(buffer)
+        return buffer.getvalue()
+
+    return _cached(f"resume_{pages}p.docx", build)
+
+
+def wav_fixture(seconds: int) -> str:
+    return _cached(f"speech_{seconds}s.wav", lambda: make_wav_bytes(seconds))
+
+
+def webm_fixture(seconds: int):
+    """WebM/Opus clip converted from the WAV fixture; None when ffmpeg is not installed"""
+    if not shutil.which("ffmpeg"):
+        return None
+    path = os.path.join(FIXTURE_DIR, f"speech_{seconds}s.webm")
+    if not os.path.exists(path):
+        subprocess.run(
+            ["ffmpeg", "-loglevel", "error", "-y", "-i", wav_fixture(seconds), "-c:a", "libopus", path],
+            check=True
+        )
+    return path
+
+
+def audio_base64(path: str) -> str:
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode("utf-8")
+
+
+def application_records(count: int):
+    """In-memory application dicts shaped like the ones /api/job-application stores"""
+    started = datetime(2025, 1, 1)
+    resume_bytes = b"%PDF-1.4 placeholder"
+    records = []
+    for i in range(1, count + 1):
+        application_id = f"APP-{i:05d}"
+        records.append({
+            "application_id": application_id,
+            "full_name": f"Candidate {i}",
+            "email": f"candidate{i}@example.com",
+            "phone": f"+1555{i:07d}",
+            "position": POSITIONS[i % len(POSITIONS)],
+            "cover_letter": "I am very interested in this position and believe my experience is a good fit.",
+            "resume_filename": "resume.pdf",
+            "resume_path": f"/tmp/resumes/{application_id}_resume.pdf",
+            "resume_content": resume_bytes,
+            "resume_size": len(resume_bytes),
+            "submitted_at": (started + timedelta(seconds=i * 37)).isoformat()
+        })
+    return records
+
+
+def indexed_application_records(count: int):
+    """Application records with varied resume text and skills, as search indexes them"""
+    from skill_matcher import SkillTaxonomy
+
+    names = [skill["name"] for skill in SkillTaxonomy.load().skills]
+    rng = random.Random(7)
+    records = application_records(count)
+    for record in records:
+        skills = rng.sample(names, 12)
+        lines = rng.sample(FILLER_LINES, 3)
+        record["resume_skills"] = skills[:10]
+        record["resume_text"] = (
+            f"{record['full_name']}\nSkills\n{', '.join(skills)}\nExperience\n" + "\n".join(lines) +
+            f"\nProject {rng.randrange(10000)} using {skills[0]} and {skills[1]}"
+        )
+    return records
@@ -0,0 +1,409 @@
+"""
+Microbenchmarks for the per-candidate CPU hot paths.
+
+    python -m benchmarks.run                        # run everything, compare to baseline.json
+    python -m benchmarks.run -k skills              # only benchmarks whose name contains "skills"
+    python -m benchmarks.run --save-baseline        # record the current code as the baseline
+    python -m benchmarks.run --fail-on-regression 0.2
+    python -m benchmarks.run -k import              # cold-start import times against their budgets
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+# The apps need these at import time; benchmarks never call the real providers
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("TTS_BACKEND", "fake")
+
+from benchmarks import fixtures
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+RESULTS_PATH = os.path.join(BENCH_DIR, "results", "latest.json")
+
+RESUME_PAGES = [1, 5, 20]
+AUDIO_SECONDS = [10, 60, 180]
+# Cold-start budget per app module: cumulative `python -X importtime` time in ms.
+# Most of it is FastAPI itself; heavy dependencies are imported on first use.
+IMPORT_BUDGETS_MS = "main=1400,mcq=1200"
+
+
+def run_coroutine(coroutine):
+    """Drive an endpoint coroutine on the benchmark event loop (the stores are read in worker threads)"""
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+def measure(fn, repeat: int, min_seconds: float = 0.2) -> dict:
+    """Time fn repeatedly (after one warm-up call) and summarize in milliseconds"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+        timings = []
+        started = time.perf_counter()
+        while len(timings) < repeat or (time.perf_counter() - started < min_seconds and len(timings) < repeat * 20):
+            t0 = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - t0) * 1000)
+    return {
+        "median_ms": round(statistics.median(timings), 4),
+        "min_ms": round(min(timings), 4),
+        "mean_ms": round(statistics.fmean(timings), 4),
+        "max_ms": round(max(timings), 4),
+        "runs": len(timings)
+    }
+
+
+def bytes_per_record(build, count: int) -> float:
+    """Memory allocated by build() (and still held) per record"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        built = build()
+        held = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del built
+    return round(held / count, 1)
+
+
+def peak_bytes(run) -> int:
+    """Peak memory allocated while run() executes"""
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def import_time_ms(module: str) -> float:
+    """Cumulative import time of module in a fresh interpreter, from python -X importtime"""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True
+    ).stderr
+    for line in reversed(output.splitlines()):
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1000
+    raise RuntimeError(f"no importtime entry for {module}")
+
+
+def measure_import(module: str, runs: int) -> dict:
+    timings = [import_time_ms(module) for _ in range(runs)]
+    return {
+        "median_ms": round(statistics.median(timings), 4),
+        "min_ms": round(min(timings), 4),
+        "mean_ms": round(statistics.fmean(timings), 4),
+        "max_ms": round(max(timings), 4),
+        "runs": runs
+    }
+
+
+def collect_benchmarks(args):
+    """
+    (name, callable, repeat) for every benchmark whose name contains args.keyword,
+    optionally with a fourth item: a callable returning extra fields for its
+    result. Fixtures are only built for the benchmarks that are selected.
+    """
+    import core
+    import main
+    import mcq
+    from json_responses import compress
+
+    def selected(*names) -> bool:
+        return not args.keyword or any(args.keyword in name for name in names)
+
+    benchmarks = []
+
+    for pages in RESUME_PAGES:
+        if not selected(f"extract_resume_text/pdf/{pages}p", f"extract_resume_text/docx/{pages}p",
+                        f"mcq.extract_text_from_pdf/{pages}p", f"mcq.extract_skills_from_resume/{pages}p"):
+            continue
+        pdf_path = fixtures.pdf_fixture(pages)
+        docx_path = fixtures.docx_fixture(pages)
+        with open(pdf_path, "rb") as f:
+            pdf_bytes = f.read()
+        text = fixtures.resume_text(pages)
+        benchmarks += [
+            (f"extract_resume_text/pdf/{pages}p", lambda p=pdf_path: core.extract_resume_text(p), 5),
+            (f"extract_resume_text/docx/{pages}p", lambda p=docx_path: core.extract_resume_text(p), 5),
+            (f"mcq.extract_text_from_pdf/{pages}p", lambda b=pdf_bytes: mcq.extract_text_from_pdf(b), 5),
+            (f"mcq.extract_skills_from_resume/{pages}p", lambda t=text: mcq.extract_skills_from_resume(t), 20),
+        ]
+
+    if selected("skill_matcher.compile"):
+        from skill_matcher import SkillMatcher, SkillTaxonomy
+        taxonomy = SkillTaxonomy.load()
+        benchmarks.append(("skill_matcher.compile", lambda: SkillMatcher(taxonomy), 5))
+
+    for seconds in AUDIO_SECONDS:
+        if selected(f"analyze_audio_emotions/wav/{seconds}s"):
+            wav_b64 = fixtures.audio_base64(fixtures.wav_fixture(seconds))
+            benchmarks.append((f"analyze_audio_emotions/wav/{seconds}s",
+                               lambda a=wav_b64: main.analyze_audio_emotions(a), 3))
+        webm_path = fixtures.webm_fixture(seconds) if selected(f"analyze_audio_emotions/webm/{seconds}s") else None
+        if webm_path:
+            webm_b64 = fixtures.audio_base64(webm_path)
+            benchmarks.append((f"analyze_audio_emotions/webm/{seconds}s",
+                               lambda a=webm_b64: main.analyze_audio_emotions(a), 3))
+
+    from application_table import ApplicationTable
+    records = []  # filled in below, once the selected sizes are known
+    tables = {}
+
+    def storage_dump(count):
+        def run():
+            main.job_applications = tables[count]
+            return run_coroutine(main.get_all_storage(if_none_match=None)).body
+        return run
+
+    def storage_not_modified(count):
+        tags = {}
+
+        def run():
+            main.job_applications = tables[count]
+            if count not in tags:  # the warm-up call fetches the ETag
+                tags[count] = run_coroutine(main.get_all_storage(if_none_match=None)).headers["ETag"]
+            response = run_coroutine(main.get_all_storage(if_none_match=tags[count]))
+            assert response.status_code == 304
+        return run
+
+    dump_bodies = {}
+
+    def dump_body(count):
+        if count not in dump_bodies:
+            dump_bodies[count] = storage_dump(count)()
+        return dump_bodies[count]
+
+    def wire_bytes(count):
+        def extra():
+            body = dump_body(count)
+            return {"bytes": len(body), "gzip_bytes": len(compress(body, "gzip")), "br_bytes": len(compress(body, "br"))}
+        return extra
+
+    def storage_export(count):
+        async def drain():
+            response = await main.export_storage(include=",".join(main.EXPORT_KINDS), accept_encoding="")
+            size = 0
+            async for chunk in response.body_iterator:
+                size += len(chunk)
+            return size
+
+        def run():
+            main.job_applications = tables[count]
+            return run_coroutine(drain())
+        return run
+
+    def export_memory(count):
+        def extra():
+            return {"peak_bytes": peak_bytes(storage_export(count)), "dump_peak_bytes": peak_bytes(storage_dump(count))}
+        return extra
+
+    def resume_listing(count):
+        def run():
+            main.job_applications = tables[count]
+            return run_coroutine(main.list_all_resumes())
+        return run
+
+    def lookup(count):
+        target = f"APP-{count:05d}"
+
+        def run():
+            main.job_applications = tables[count]
+            return run_coroutine(main.get_application(target, if_none_match=None))
+        return run
+
+    def table_memory(count):
+        def extra():
+            return {
+                "bytes_per_record": bytes_per_record(lambda: ApplicationTable(records[:count]), count),
+                "dict_bytes_per_record": bytes_per_record(lambda: fixtures.application_records(count), count)
+            }
+        return extra
+
+    from search_index import ApplicationSearchIndex
+    search_queries = [
+        ("term", {"query": "kubernetes"}),
+        ("and", {"query": "python docker"}),
+        ("prefix", {"query": "dev*"}),
+        ("filtered", {"query": "python", "position": "Data Scientist", "skills": ["sql"]}),
+    ]
+    for count in args.search_sizes:
+        if not selected(*(f"search/{label}/{count}" for label, _ in search_queries)):
+            continue
+        index = ApplicationSearchIndex()
+        index.add_many(fixtures.indexed_application_records(count))
+        for label, params in search_queries:
+            benchmarks.append((f"search/{label}/{count}", lambda i=index, p=params: i.search(**p), 20))
+
+    from ranking import RankingEngine
+    for count in args.ranking_sizes:
+        if not selected(f"ranking/applicants/{count}", f"ranking/all/{count}", f"ranking/after_write/{count}"):
+            continue
+        engine = RankingEngine()
+        for record in fixtures.indexed_application_records(count):
+            engine.add(record)
+        engine.register_position("Data Scientist", fixtures.DATA_SCIENTIST_DESCRIPTION)
+
+        def rebuild_and_rank(e=engine):
+            e.version += 1  # as after a write: re-weight the matrix, then rank
+            return e.rank("Data Scientist")
+
+        benchmarks += [
+            (f"ranking/applicants/{count}", lambda e=engine: e.rank("Data Scientist"), 10),
+            (f"ranking/all/{count}", lambda e=engine: e.rank("Data Scientist", scope="all"), 10),
+            (f"ranking/after_write/{count}", rebuild_and_rank, 3),
+        ]
+
+    table_benchmarks = []
+    for count in args.store_sizes:
+        table_benchmarks += [
+            (f"admin_storage_serialization/{count}", storage_dump(count), 3, wire_bytes(count)),
+            (f"response_compression/gzip/{count}", lambda c=count: compress(dump_body(c), "gzip"), 3),
+            (f"response_compression/br/{count}", lambda c=count: compress(dump_body(c), "br"), 3),
+            (f"storage_export/{count}", storage_export(count), 3, export_memory(count)),
+            (f"admin_storage_not_modified/{count}", storage_not_modified(count), 10),
+            (f"resume_listing/{count}", resume_listing(count), 3),
+            (f"application_table/build/{count}", lambda c=count: ApplicationTable(records[:c]), 3, table_memory(count)),
+        ]
+    for count in args.lookup_sizes:
+        table_benchmarks.append((f"application_lookup/{count}", lookup(count), 10))
+    table_benchmarks = [benchmark for benchmark in table_benchmarks if selected(benchmark[0])]
+    benchmarks += table_benchmarks
+
+    # Every table benchmark name ends in its application count
+    sizes = sorted({int(benchmark[0].rsplit("/", 1)[1]) for benchmark in table_benchmarks})
+    if sizes:
+        records += fixtures.application_records(max(sizes))
+        tables.update((count, ApplicationTable(records[:count])) for count in sizes)
+
+    return [benchmark for benchmark in benchmarks if selected(benchmark[0])]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(results: dict, baseline: dict):
+    """Print a comparison table; return the worst regression ratio"""
+    worst = 0.0
+    print(f"\n{'benchmark':48} {'baseline ms':>12} {'current ms':>12} {'change':>9}")
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            print(f"{name:48} {'-':>12} {current['median_ms']:>12.3f} {'new':>9}")
+            continue
+        change = (current["median_ms"] - previous["median_ms"]) / previous["median_ms"]
+        worst = max(worst, change)
+        print(f"{name:48} {previous['median_ms']:>12.3f} {current['median_ms']:>12.3f} {change:>+9.1%}")
+    return worst
+
+
+def parse_sizes(value: str):
+    return [int(size) for size in value.split(",") if size]
+
+
+def parse_budgets(value: str):
+    """'main=1300,mcq=1100' -> {"main": 1300.0, "mcq": 1100.0}"""
+    return {name.strip(): float(ms) for name, ms in (item.split("=", 1) for item in value.split(",") if "=" in item)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the hot-path microbenchmarks")
+    parser.add_argument("-k", dest="keyword", help="only run benchmarks whose name contains this")
+    parser.add_argument("--store-sizes", type=parse_sizes, default=[10000, 100000],
+                        help="application counts for /api/admin/storage serialization, compression and export")
+    parser.add_argument("--lookup-sizes", type=parse_sizes, default=[10000, 100000, 1000000],
+                        help="application counts for application lookup")
+    parser.add_argument("--search-sizes", type=parse_sizes, default=[10000, 100000],
+                        help="indexed application counts for /api/search")
+    parser.add_argument("--ranking-sizes", type=parse_sizes, default=[10000, 100000],
+                        help="application counts for position ranking")
+    parser.add_argument("--import-budgets", type=parse_budgets, default=parse_budgets(IMPORT_BUDGETS_MS),
+                        help="module=ms cold-start import budgets; exceeding one fails the run")
+    parser.add_argument("--import-runs", type=int, default=3, help="fresh interpreters per import measurement")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the baseline")
+    parser.add_argument("--fail-on-regression", type=float,
+                        help="exit non-zero if any median regresses by more than this ratio")
+    args = parser.parse_args()
+
+    results = {}
+    for name, fn, repeat, *extra in collect_benchmarks(args):
+        results[name] = measure(fn, repeat)
+        for fields in extra:
+            results[name].update(fields())
+        print(f"  {name:48} {results[name]['median_ms']:>12.3f} ms")
+        if "gzip_bytes" in results[name]:
+            print(f"  {'':48} {results[name]['bytes']:>12,} B on the wire "
+                  f"(gzip: {results[name]['gzip_bytes']:,}, br: {results[name]['br_bytes']:,})")
+        if "peak_bytes" in results[name]:
+            print(f"  {'':48} {results[name]['peak_bytes']:>12,} B peak "
+                  f"(whole dump: {results[name]['dump_peak_bytes']:,})")
+        if "bytes_per_record" in results[name]:
+            print(f"  {'':48} {results[name]['bytes_per_record']:>12.1f} B/record "
+                  f"(as dicts: {results[name]['dict_bytes_per_record']:.1f})")
+
+    over_budget = []
+    for module, budget in args.import_budgets.items():
+        name = f"import/{module}"
+        if args.keyword and args.keyword not in name:
+            continue
+        results[name] = {**measure_import(module, args.import_runs), "budget_ms": budget}
+        print(f"  {name:48} {results[name]['median_ms']:>12.3f} ms (budget {budget:.0f} ms)")
+        if results[name]["median_ms"] > budget:
+            over_budget.append(name)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "recorded_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "results": results
+    }
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results written to {args.output}")
+
+    for name in over_budget:
+        print(f"✗ {name} took {results[name]['median_ms']:.0f} ms, over its {results[name]['budget_ms']:.0f} ms budget")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Baseline saved to {args.baseline}")
+        sys.exit(1 if over_budget else 0)
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            worst = compare(results, json.load(f))
+        if args.fail_on_regression is not None and worst > args.fail_on_regression:
+            print(f"\n✗ Regression of {worst:.1%} exceeds {args.fail_on_regression:.1%}")
+            sys.exit(1)
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Bulk resume ingestion: a zip archive or directory of resumes plus a CSV/JSON
+manifest of applicant fields, extracted and skill-tagged on a process pool and
+written to the application store in batches.
+
+    python bulk_ingest.py resumes.zip --manifest applicants.csv
+    python bulk_ingest.py /data/campus-drive/ --manifest applicants.json --workers 8
+
+The CLI runs extraction on this machine and posts each batch to
+POST /api/admin/applications/batch. It keeps a checkpoint file next to the
+source, so an interrupted run can be restarted and skips what was imported.
+The same pipeline backs POST /api/admin/bulk-import on the server.
+
+Manifest columns (CSV header or JSON keys): resume_file, full_name, email,
+phone, position, cover_letter. resume_file is the path inside the archive or
+directory; a bare file name also matches.
+"""
+import argparse
+import base64
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+BULK_INGEST_WORKERS = int(os.getenv("BULK_INGEST_WORKERS", str(os.cpu_count() or 2)))
+BULK_INGEST_BATCH_SIZE = int(os.getenv("BULK_INGEST_BATCH_SIZE", "200"))
+# Resumes read ahead of the workers; bounds memory however large the archive is
+BULK_INGEST_READAHEAD = int(os.getenv("BULK_INGEST_READAHEAD", "4"))
+
+API_BASE_URL = "http://localhost:8000"
+
+ALLOWED_EXTENSIONS = (".pdf", ".doc", ".docx")
+REQUIRED_FIELDS = ("full_name", "email", "position")
+MANIFEST_FIELDS = ("resume_file", "full_name", "email", "phone", "position", "cover_letter")
+
+
+# ==================== MANIFEST ====================
+
+def parse_manifest(data: bytes, filename: str) -> Dict[str, dict]:
+    """Manifest rows keyed by resume_file, from CSV or JSON (a list, or {"applications": [...]})"""
+    text = data.decode("utf-8-sig")
+    if filename.lower().endswith(".json"):
+        parsed = json.loads(text)
+        rows = parsed.get("applications", []) if isinstance(parsed, dict) else parsed
+    else:
+        rows = list(csv.DictReader(io.StringIO(text)))
+
+    manifest = {}
+    for row in rows:
+        row = {key.strip(): (value or "").strip() for key, value in row.items() if key and key.strip() in MANIFEST_FIELDS}
+        resume_file = row.get("resume_file", "").replace("\\", "/")
+        if resume_file:
+            manifest[resume_file] = row
+    return manifest
+
+
+def load_manifest(path: str) -> Dict[str, dict]:
+    with open(path, "rb") as f:
+        return parse_manifest(f.read(), path)
+
+
+def manifest_row(manifest: Dict[str, dict], entry_name: str) -> Optional[dict]:
+    """The row for an entry, by its full path first and then its bare file name"""
+    return manifest.get(entry_name) or manifest.get(os.path.basename(entry_name))
+
+
+# ==================== SOURCES ====================
+
+def _is_resume(name: str) -> bool:
+    base = os.path.basename(name)
+    return not base.startswith(".") and os.path.splitext(base)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def list_entries(source: str) -> List[str]:
+    """Resume entry names in a zip archive or directory, in a stable order"""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            return [info.filename for info in archive.infolist() if not info.is_dir() and _is_resume(info.filename)]
+    entries = []
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        for name in sorted(files):
+            relative = os.path.relpath(os.path.join(root, name), source).replace(os.sep, "/")
+            if _is_resume(relative):
+                entries.append(relative)
+    return entries
+
+
+def iter_entries(source: str, names: List[str]) -> Iterator[Tuple[str, bytes]]:
+    """(name, bytes) for each entry, read one at a time rather than unpacking the archive"""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for name in names:
+                yield name, archive.read(name)
+        return
+    for name in names:
+        with open(os.path.join(source, name), "rb") as f:
+            yield name, f.read()
+
+
+# ==================== EXTRACTION (runs in worker processes) ====================
+
+def extract_resume(name: str, data: bytes) -> dict:
+    """Resume text and top skills for one entry; errors are returned, not raised"""
+    from core import extract_skills_from_resume, resume_text_from_bytes
+
+    try:
+        text = resume_text_from_bytes(data, os.path.splitext(name)[1].lower())
+    except Exception as e:
+        return {"name": name, "error": f"Could not extract text: {e}"}
+    if not text:
+        return {"name": name, "error": "No text extracted from resume"}
+    return {"name": name, "text": text, "skills": extract_skills_from_resume(text)}
+
+
+# ==================== CHECKPOINT & PROGRESS ====================
+
+class Checkpoint:
+    """Append-only JSON-lines record of imported entries, so a rerun skips them"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.imported = set()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self.imported.add(json.loads(line)["entry"])
+                    except (ValueError, KeyError):
+                        continue  # a line torn by a crash mid-write
+
+    def record(self, entries: List[dict]):
+        if not self.path:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class IngestProgress:
+    """Counters for one ingestion run; safe to read from another thread"""
+
+    def __init__(self, total: int = 0):
+        self.total = total
+        self.processed = 0
+        self.imported = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        self.status = "running"
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.lock = threading.Lock()
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+            done = self.processed + self.skipped
+            return {
+                "status": self.status,
+                "total": self.total,
+                "processed": self.processed,
+                "imported": self.imported,
+                "skipped_from_checkpoint": self.skipped,
+                "failed": self.failed,
+                "percent": round(100.0 * done / self.total, 1) if self.total else 100.0,
+                "elapsed_seconds": round(elapsed, 2),
+                "resumes_per_minute": round(self.processed / elapsed * 60, 1) if elapsed else 0.0,
+                "errors": self.errors[-20:]
+            }
+
+
+# ==================== PIPELINE ====================
+
+def build_application(row: dict, entry_name: str, data: bytes, extracted: dict) -> dict:
+    """Application fields for one resume; the store assigns the ID and saves the file"""
+    return {
+        "full_name": row["full_name"],
+        "email": row["email"],
+        "phone": row.get("phone", ""),
+        "position": row["position"],
+        "cover_letter": row.get("cover_letter") or None,
+        "resume_filename": os.path.basename(entry_name),
+        "resume_bytes": data,
+        "resume_text": extracted["text"],
+        "resume_skills": extracted["skills"],
+        "source_entry": entry_name
+    }
+
+
+def ingest(source: str, manifest: Dict[str, dict], write_batch: Callable[[List[dict]], List[str]],
+           checkpoint_path: Optional[str] = None, workers: int = BULK_INGEST_WORKERS,
+           batch_size: int = BULK_INGEST_BATCH_SIZE, progress: Optional[IngestProgress] = None,
+           on_progress: Optional[Callable[[IngestProgress], None]] = None) -> IngestProgress:
+    """
+    Extract and skill-tag every resume in source on a process pool and hand the
+    results to write_batch in batches. write_batch returns the application IDs
+    it assigned; only written entries are checkpointed.
+    """
+    checkpoint = Checkpoint(checkpoint_path)
+    names = list_entries(source)
+    pending_names = [name for name in names if name not in checkpoint.imported]
+
+    progress = progress or IngestProgress()
+    with progress.lock:
+        progress.total = len(names)
+        progress.skipped = len(names) - len(pending_names)
+
+    def fail(name: str, error: str):
+        with progress.lock:
+            progress.processed += 1
+            progress.failed += 1
+            progress.errors.append({"entry": name, "error": error})
+
+    batch: List[Tuple[str, dict]] = []
+
+    def flush():
+        if not batch:
+            return
+        application_ids = write_batch([application for _, application in batch])
+        checkpoint.record([
+            {"entry": name, "application_id": application_id}
+            for (name, _), application_id in zip(batch, application_ids)
+        ])
+        with progress.lock:
+            progress.processed += len(batch)
+            progress.imported += len(batch)
+        batch.clear()
+        if on_progress:
+            on_progress(progress)
+
+    def collect(name: str, row: dict, data: bytes, extracted: dict):
+        if extracted.get("error"):
+            fail(name, extracted["error"])
+            return
+        batch.append((name, build_application(row, name, data, extracted)))
+        if len(batch) >= batch_size:
+            flush()
+
+    # spawn keeps workers small: they import this module, not the caller's app
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) \
+        if workers > 1 else None
+    in_flight = deque()
+    try:
+        for name, data in iter_entries(source, pending_names):
+            row = manifest_row(manifest, name)
+            if row is None:
+                fail(name, "No manifest row for this file")
+                continue
+            missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+            if missing:
+                fail(name, f"Manifest row is missing {', '.join(missing)}")
+                continue
+
+            if executor is None:
+                collect(name, row, data, extract_resume(name, data))
+                continue
+            in_flight.append((name, row, data, executor.submit(extract_resume, name, data)))
+            # Results are collected in submission order, which keeps batches deterministic
+            while len(in_flight) >= workers * BULK_INGEST_READAHEAD:
+                name, row, data, future = in_flight.popleft()
+                collect(name, row, data, future.result())
+
+        while in_flight:
+            name, row, data, future = in_flight.popleft()
+            collect(name, row, data, future.result())
+        flush()
+        progress.status = "completed"
+    except BaseException as e:
+        progress.status = "failed"
+        with progress.lock:
+            progress.errors.append({"entry": None, "error": str(e)})
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        progress.finished_at = time.time()
+        if on_progress:
+            on_progress(progress)
+    return progress
+
+
+# ==================== CLI ====================
+
+def post_batch(api_url: str, session):
+    """write_batch that sends applications to the server's batch endpoint"""
+    def write_batch(applications: List[dict]) -> List[str]:
+        payload = []
+        for application in applications:
+            application = dict(application)
+            application["resume_base64"] = base64.b64encode(application.pop("resume_bytes")).decode("ascii")
+            payload.append(application)
+        response = session.post(f"{api_url}/api/admin/applications/batch",
+                                json={"applications": payload}, timeout=300)
+        response.raise_for_status()
+        return response.json()["application_ids"]
+    return write_batch
+
+
+def print_progress(progress: IngestProgress):
+    state = progress.to_dict()
+    print(f"  {state['processed'] + state['skipped_from_checkpoint']}/{state['total']} "
+          f"({state['percent']}%)  imported {state['imported']}  failed {state['failed']}  "
+          f"{state['resumes_per_minute']} resumes/min", flush=True)
+
+
+def main():
+    import requests
+
+    parser = argparse.ArgumentParser(description="Bulk import resumes from a zip archive or directory")
+    parser.add_argument("source", help="zip archive or directory of .pdf/.docx resumes")
+    parser.add_argument("--manifest", required=True, help="CSV or JSON file of applicant fields")
+    parser.add_argument("--api-url", default=API_BASE_URL)
+    parser.add_argument("--workers", type=int, default=BULK_INGEST_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=BULK_INGEST_BATCH_SIZE)
+    parser.add_argument("--checkpoint", help="resume checkpoint file (default: <source>.checkpoint)")
+    args = parser.parse_args()
+
+    checkpoint = args.checkpoint or args.source.rstrip("/\\") + ".checkpoint"
+    manifest = load_manifest(args.manifest)
+    print(f"Importing {args.source} with {args.workers} workers, checkpoint {checkpoint}")
+
+    with requests.Session() as session:
+        progress = ingest(args.source, manifest, post_batch(args.api_url, session),
+                          checkpoint_path=checkpoint, workers=args.workers,
+                          batch_size=args.batch_size, on_progress=print_progress)
+
+    state = progress.to_dict()
+    print(f"\n✓ Imported {state['imported']} resumes in {state['elapsed_seconds']}s "
+          f"({state['resumes_per_minute']} resumes/min), {state['failed']} failed, "
+          f"{state['skipped_from_checkpoint']} already imported")
+    for error in state["errors"]:
+        print(f"  ✗ {error['entry']}: {error['error']}")
+    sys.exit(1 if state["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Resume pipeline shared by the application API (main.py), the quiz service
+(mcq.py) and bulk ingestion: text extraction for PDF and DOCX resumes, and
+skill extraction. The document parsers are imported on first use.
+"""
+import io
+import os
+from typing import List
+
+from skill_matcher import get_skill_matcher
+from telemetry import logger, traced
+
+RESUME_EXTENSIONS = (".pdf", ".doc", ".docx")
+
+
+def resume_text_from_bytes(data: bytes, extension: str) -> str:
+    """Text of a PDF or DOCX resume held in memory"""
+    if extension == ".pdf":
+        import PyPDF2
+        reader = PyPDF2.PdfReader(io.BytesIO(data))
+        return "\n".join(page.extract_text() or "" for page in reader.pages).strip()
+    # python-docx only reads .docx; .doc files that are really .docx still work
+    from docx import Document
+    document = Document(io.BytesIO(data))
+    return "\n".join(paragraph.text for paragraph in document.paragraphs).strip()
+
+
+def extract_resume_text(resume_path: str) -> str:
+    """Extract text from resume file (PDF, DOC, or DOCX); empty if it cannot be read"""
+    if not resume_path or not os.path.exists(resume_path):
+        logger.warning(f"Resume file not found: {resume_path}")
+        return ""
+    with open(resume_path, "rb") as f:
+        return extract_resume_bytes(f.read(), os.path.splitext(resume_path)[1].lower())
+
+
+@traced("resume_extraction")
+def extract_resume_bytes(data: bytes, file_extension: str) -> str:
+    """Extract text from an uploaded resume (PDF, DOC, or DOCX); empty if it cannot be read"""
+    if file_extension not in RESUME_EXTENSIONS:
+        logger.warning(f"Unsupported file extension: {file_extension}")
+        return ""
+    if file_extension == ".doc":
+        logger.warning(".doc files are not fully supported. Please use .docx or .pdf format.")
+
+    try:
+        text = resume_text_from_bytes(data, file_extension)
+    except Exception as e:
+        logger.warning(f"Error extracting text from {file_extension} resume: {e}")
+        return ""
+
+    if not text:
+        logger.warning("No text extracted from resume")
+    return text
+
+
+@traced("skill_extraction")
+def extract_skills_from_resume(resume_text: str) -> List[str]:
+    """
+    Extract the resume's skills, most frequently mentioned first, using the
+    skill taxonomy (see skill_matcher.py)
+    """
+    return get_skill_matcher().top_skills(resume_text, limit=10)
+
+
+def resume_context(application: dict) -> dict:
+    """
+    Resume text and skills of a stored application. Both are normally recorded
+    when the application is submitted; older records are extracted from the
+    stored resume file.
+    """
+    resume_text = application.get("resume_text")
+    skills = application.get("resume_skills")
+    if not resume_text:
+        resume_text = extract_resume_text(application.get("resume_path"))
+        skills = None
+    if skills is None:
+        skills = extract_skills_from_resume(resume_text) if resume_text else []
+    return {"resume_text": resume_text, "resume_skills": skills}
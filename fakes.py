@@ -0,0 +1,279 @@
+"""
+In-process stand-ins for Gemini and ElevenLabs, for load testing without the real APIs.
+
+Select them with LLM_BACKEND=fake and TTS_BACKEND=fake. Latency follows a
+lognormal distribution fitted to the configured median and p95, and a share of
+calls fail with 429/503 like the real providers do under load.
+"""
+import json
+import math
+import os
+import random
+import re
+import time
+from typing import Optional
+
+FAKE_GEMINI_MEDIAN_MS = float(os.getenv("FAKE_GEMINI_MEDIAN_MS", "900"))
+FAKE_GEMINI_P95_MS = float(os.getenv("FAKE_GEMINI_P95_MS", "2500"))
+FAKE_GEMINI_ERROR_RATE = float(os.getenv("FAKE_GEMINI_ERROR_RATE", "0.0"))
+FAKE_TTS_MEDIAN_MS = float(os.getenv("FAKE_TTS_MEDIAN_MS", "500"))
+FAKE_TTS_P95_MS = float(os.getenv("FAKE_TTS_P95_MS", "1500"))
+FAKE_TTS_ERROR_RATE = float(os.getenv("FAKE_TTS_ERROR_RATE", "0.0"))
+FAKE_SEED = os.getenv("FAKE_SEED")
+# Characters per chunk of a fake streamed Gemini response
+FAKE_STREAM_CHUNK_CHARS = int(os.getenv("FAKE_STREAM_CHUNK_CHARS", "48"))
+
+_random = random.Random(int(FAKE_SEED) if FAKE_SEED else None)
+
+# One silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz) is 417 bytes
+MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+MP3_FRAMES_PER_SECOND = 38
+
+
+class FakeProviderError(Exception):
+    """Error raised by the fakes, shaped like provider errors (has .code)"""
+
+    def __init__(self, message: str, code: int):
+        super().__init__(message)
+        self.code = code
+
+
+class LatencyModel:
+    """Lognormal latency with the given median and p95, in milliseconds"""
+
+    def __init__(self, median_ms: float, p95_ms: float, error_rate: float = 0.0):
+        self.median_ms = max(median_ms, 0.0)
+        self.p95_ms = max(p95_ms, median_ms)
+        self.error_rate = error_rate
+        if self.median_ms > 0 and self.p95_ms > self.median_ms:
+            self.sigma = math.log(self.p95_ms / self.median_ms) / 1.645
+        else:
+            self.sigma = 0.0
+
+    def sample_seconds(self) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        return self.median_ms * math.exp(_random.gauss(0, self.sigma)) / 1000.0
+
+    def wait(self, timeout: Optional[float] = None):
+        """Sleep for one sampled latency, then maybe fail"""
+        delay = self.sample_seconds()
+        if timeout and delay > timeout:
+            time.sleep(timeout)
+            raise FakeProviderError("Deadline exceeded", 504)
+        time.sleep(delay)
+        if self.error_rate and _random.random() < self.error_rate:
+            code = _random.choice([429, 503])
+            raise FakeProviderError(f"Fake provider error {code}", code)
+
+
+gemini_latency = LatencyModel(FAKE_GEMINI_MEDIAN_MS, FAKE_GEMINI_P95_MS, FAKE_GEMINI_ERROR_RATE)
+tts_latency = LatencyModel(FAKE_TTS_MEDIAN_MS, FAKE_TTS_P95_MS, FAKE_TTS_ERROR_RATE)
+
+
+# ==================== CANNED OUTPUTS ====================
+
+def fake_mcq_json(prompt: str = "") -> str:
+    match = re.search(r"generate exactly (\d+) multiple-choice", prompt)
+    count = int(match.group(1)) if match else 5
+    skill = re.search(r"^Skill: (.+)$", prompt, flags=re.MULTILINE)
+    # Distinct questions per call, so the MCQ bank does not deduplicate them away
+    topic = skill.group(1) if skill else "the candidate's skills"
+    questions = []
+    for i in range(count):
+        options = [{"option": f"Option {chr(65 + j)}", "is_correct": j == i % 4} for j in range(4)]
+        questions.append({"question": f"Sample question {_random.getrandbits(32):08x} about {topic}?", "options": options})
+    return json.dumps({"questions": questions})
+
+
+def fake_interview_questions_json(prompt: str) -> str:
+    match = re.search(r"Generate exactly (\d+) interview questions", prompt)
+    count = int(match.group(1)) if match else 5
+    categories = ["technical", "behavioral", "situational"]
+    return json.dumps({"questions": [
+        {"question_id": i + 1, "question": f"Interview question {i + 1}?", "category": categories[i % 3]}
+        for i in range(count)
+    ]})
+
+
+def fake_evaluation_json(prompt: str) -> str:
+    question_ids = [int(q) for q in re.findall(r"^Q(\d+):", prompt, flags=re.MULTILINE)] or [1]
+    return json.dumps({
+        "overall_score": 72.0,
+        "detailed_scores": [
+            {"question_id": qid, "score": 7.0, "feedback": "Clear answer with relevant examples."}
+            for qid in question_ids
+        ],
+        "strengths": ["Clear communication", "Relevant experience"],
+        "areas_for_improvement": ["More depth on system design"],
+        "recommendation": "maybe",
+        "summary": "Solid candidate with room to grow."
+    })
+
+
+def fake_gemini_text(prompt: str, generation_config: Optional[dict] = None) -> str:
+    """Pick a canned response matching what the prompt asks for"""
+    if generation_config and "response_schema" in generation_config:
+        return fake_mcq_json(prompt)
+    if "interview questions for a" in prompt:
+        return fake_interview_questions_json(prompt)
+    if "Score this single answer" in prompt:
+        return json.dumps({"score": 7.0, "feedback": "Relevant and well structured."})
+    if "You are summarizing an interview" in prompt:
+        final = {"final_answer": {"score": 7.0, "feedback": "Relevant and well structured."}} if "Final answer" in prompt else {}
+        return json.dumps({
+            **final,
+            "strengths": ["Clear communication"],
+            "areas_for_improvement": ["More technical depth"],
+            "recommendation": "maybe",
+            "summary": "Solid candidate with room to grow."
+        })
+    if "Please provide a comprehensive evaluation" in prompt:
+        return fake_evaluation_json(prompt)
+    if "empathetic response" in prompt:
+        return "Thanks, that was a thoughtful answer."
+    return "Can you tell me about a project you are proud of and the role you played in it?"
+
+
+def fake_gemini_generate(model_name: str, prompt: str, generation_config: Optional[dict] = None,
+                         timeout: Optional[float] = None) -> str:
+    """Drop-in replacement for llm_gateway.gemini_generate"""
+    gemini_latency.wait(timeout)
+    return fake_gemini_text(prompt, generation_config)
+
+
+def fake_gemini_stream(model_name: str, prompt: str, generation_config: Optional[dict] = None,
+                       timeout: Optional[float] = None):
+    """Drop-in replacement for llm_gateway.gemini_stream: the sampled latency is spread over the chunks"""
+    text = fake_gemini_text(prompt, generation_config)
+    chunks = [text[i:i + FAKE_STREAM_CHUNK_CHARS] for i in range(0, len(text), FAKE_STREAM_CHUNK_CHARS)]
+    delay = gemini_latency.sample_seconds() / max(len(chunks), 1)
+    if gemini_latency.error_rate and _random.random() < gemini_latency.error_rate:
+        time.sleep(delay)
+        raise FakeProviderError("Fake provider error 503", 503)
+    for chunk in chunks:
+        time.sleep(delay)
+        yield chunk
+
+
+# ==================== ELEVENLABS ====================
+
+class FakeResponse:
+    """The subset of requests.Response the TTS code reads"""
+
+    def __init__(self, status_code: int, content: bytes = b"", text: str = ""):
+        self.status_code = status_code
+        self.content = content
+        self.text = text
+
+
+def fake_mp3_bytes(text: str) -> bytes:
+    """Silent MP3 roughly as long as the text would take to speak (~15 chars/second)"""
+    seconds = max(1, len(text) // 15)
+    return MP3_FRAME * (seconds * MP3_FRAMES_PER_SECOND)
+
+
+def fake_elevenlabs_post(url: str, headers: Optional[dict] = None, json: Optional[dict] = None,
+                         timeout: Optional[float] = None) -> FakeResponse:
+    """Drop-in replacement for requests.post against the ElevenLabs TTS API"""
+    try:
+        tts_latency.wait(timeout)
+    except FakeProviderError as e:
+        return FakeResponse(e.code, text=str(e))
+    return FakeResponse(200, content=fake_mp3_bytes((json or {}).get("text", "")))
+
+
+# ==================== CANNED INPUTS ====================
+
+SAMPLE_RESUME_LINES = [
+    "Jordan Sample",
+    "jordan.sample@example.com | +1 555 0100",
+    "Skills",
+    "Python, FastAPI, Docker, Kubernetes, PostgreSQL, Redis, React, TypeScript, Git, AWS",
+    "Experience",
+    "Backend Engineer at Example Corp - built REST API services handling 2M requests/day",
+    "Software Intern at Sample Labs - migrated CI/CD pipelines to GitHub Actions",
+    "Projects",
+    "SmartApply - interview platform with FastAPI, Gemini and ElevenLabs",
+    "Realtime chat - Node.js, Express, MongoDB and websockets",
+    "Education",
+    "B.Tech Computer Science, Example Institute of Technology, 2023",
+]
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_text_pdf(pages) -> bytes:
+    """Build a minimal text PDF; pages is a list of pages, each a list of lines"""
+    objects = []
+    page_ids = []
+    # Object 1 catalog, 2 page tree, 3 font; pages and contents follow
+    for index, lines in enumerate(pages):
+        page_id = 4 + index * 2
+        page_ids.append(page_id)
+        stream_lines = ["BT", "/F1 11 Tf", "14 TL", "50 790 Td"]
+        for line in lines[:52]:
+            stream_lines.append(f"({_pdf_escape(line)}) Tj T*")
+        stream_lines.append("ET")
+        stream = "\n".join(stream_lines).encode("latin-1", "replace")
+        objects.append((page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>"
+        ).encode()))
+        objects.append((page_id + 1, b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream"))
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects = [
+        (1, b"<< /Type /Catalog /Pages 2 0 R >>"),
+        (2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()),
+        (3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"),
+    ] + objects
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id, body in objects:
+        offsets[object_id] = len(output)
+        output += f"{object_id} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref_at = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n".encode()
+    output += b"0000000000 65535 f \n"
+    for object_id in range(1, len(objects) + 1):
+        output += f"{offsets[object_id]:010d} 00000 n \n".encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode()
+    return bytes(output)
+
+
+def make_resume_pdf(pages: int = 1) -> bytes:
+    """Sample resume PDF; extra pages repeat the experience section"""
+    filler = SAMPLE_RESUME_LINES[4:7] * 15
+    return make_text_pdf([SAMPLE_RESUME_LINES] + [filler] * (pages - 1))
+
+
+def make_wav_bytes(seconds: float, sample_rate: int = 16000, seed: int = 0) -> bytes:
+    """Speech-like mono WAV: a gliding voiced tone with syllable-rate loudness and pauses"""
+    import array
+    import io
+    import wave
+
+    rng = random.Random(seed)
+    samples = array.array("h")
+    phase = 0.0
+    total = int(seconds * sample_rate)
+    for n in range(total):
+        t = n / sample_rate
+        pitch = 140 + 30 * math.sin(2 * math.pi * 0.7 * t)
+        phase += 2 * math.pi * pitch / sample_rate
+        syllable = max(0.0, math.sin(2 * math.pi * 4 * t))
+        pause = 0.0 if int(t) % 5 == 4 else 1.0
+        value = (0.6 * math.sin(phase) + 0.2 * math.sin(2 * phase) + 0.05 * (rng.random() - 0.5)) * syllable * pause
+        samples.append(int(max(-1.0, min(1.0, value)) * 12000))
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return buffer.getvalue()
@@ -0,0 +1,407 @@
+"""
+Persistent background jobs for work too slow to hold an HTTP request open
+(interview evaluations). Jobs are rows in SQLite: a submit returns a job ID at
+once, a pool of worker coroutines runs them by priority, and the result is
+kept for status polls, completion streams and an optional webhook.
+
+A running job holds a lease that its worker renews. If the process dies, the
+lease runs out and any worker (the restarted process, or another one sharing
+the database) picks the job up again, up to JOB_MAX_ATTEMPTS times. Webhook
+deliveries are leased the same way, so a callback cut off by a crash is sent
+again. Finished jobs are deleted after JOB_RETENTION_SECONDS.
+"""
+import asyncio
+import json
+import os
+import secrets
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from telemetry import logger, span
+
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.sqlite3"))
+# Jobs run at once by each process
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# A running job is taken over when its worker has not renewed the lease for this long
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "30"))
+# Runs of a job (the first plus resumes after a crash) before it is failed
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("JOB_WEBHOOK_TIMEOUT_SECONDS", "10"))
+JOB_WEBHOOK_RETRIES = int(os.getenv("JOB_WEBHOOK_RETRIES", "3"))
+# Hosts (host or host:port) that callback URLs may point at; none means callbacks are refused
+JOB_CALLBACK_ALLOWED_HOSTS = {
+    host.strip().lower() for host in os.getenv("JOB_CALLBACK_ALLOWED_HOSTS", "").split(",") if host.strip()
+}
+# A webhook delivery not finished within this long (all retries) is taken over by another worker
+JOB_WEBHOOK_LEASE_SECONDS = JOB_WEBHOOK_RETRIES * JOB_WEBHOOK_TIMEOUT_SECONDS + 2 ** JOB_WEBHOOK_RETRIES
+# Finished jobs (with their results) are deleted after this long
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+# How often each process redelivers stranded callbacks and deletes expired jobs
+JOB_MAINTENANCE_SECONDS = 3600
+# How often idle workers look for jobs submitted by other processes
+JOB_POLL_SECONDS = 0.5
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+PRIORITY_NAMES = {level: name for name, level in PRIORITIES.items()}
+FINAL_STATUSES = ("succeeded", "failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    callback_url TEXT,
+    callback_status TEXT,
+    lease_owner TEXT,
+    lease_until REAL,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_by_queue ON jobs (status, priority, seq);
+"""
+
+COLUMNS = ("id", "kind", "priority", "status", "attempts", "result", "error",
+           "callback_url", "callback_status", "created_at", "started_at", "finished_at")
+
+
+def new_job_id() -> str:
+    return f"JOB-{secrets.token_hex(8)}"
+
+
+def callback_allowed(url: str) -> bool:
+    """An http(s) URL whose host (or host:port) is in JOB_CALLBACK_ALLOWED_HOSTS"""
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        port = parts.port
+    except ValueError:
+        return False
+    if parts.scheme not in ("http", "https") or not host:
+        return False
+    return host in JOB_CALLBACK_ALLOWED_HOSTS or f"{host}:{port}" in JOB_CALLBACK_ALLOWED_HOSTS
+
+
+def job_from_row(row: tuple) -> dict:
+    job = {"job_id": row[0], **dict(zip(COLUMNS[1:], row[1:]))}
+    job["priority"] = PRIORITY_NAMES.get(job["priority"], job["priority"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+class JobQueue:
+    """SQLite-backed; safe to share between threads, and between worker processes via WAL"""
+
+    def __init__(self, path: str = JOB_QUEUE_PATH, max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def submit(self, kind: str, payload: dict, priority: str = "normal",
+               callback_url: Optional[str] = None, job_id: Optional[str] = None) -> dict:
+        job_id = job_id or new_job_id()
+        with self.lock, span("job_queue"):
+            self.connection.execute(
+                "INSERT INTO jobs (id, kind, priority, payload, status, callback_url, created_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, PRIORITIES[priority], json.dumps(payload), callback_url, datetime.now().isoformat())
+            )
+        return self.get(job_id)
+
+    def claim(self, owner: str, lease_seconds: float = JOB_LEASE_SECONDS) -> Optional[dict]:
+        """
+        Lease the next job: queued ones, or running ones whose lease ran out, by
+        priority then age. Returns the job with its payload, or None.
+        """
+        now = time.time()
+        with self.lock, span("job_queue"):
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self.connection.execute(
+                        "SELECT id, payload, attempts FROM jobs WHERE status = 'queued' "
+                        "OR (status = 'running' AND lease_until < ?) ORDER BY priority, seq LIMIT 1",
+                        (now,)
+                    ).fetchone()
+                    if row is None:
+                        self.connection.execute("COMMIT")
+                        return None
+                    job_id, payload, attempts = row
+                    if attempts < self.max_attempts:
+                        break
+                    self.connection.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, lease_owner = NULL, finished_at = ? WHERE id = ?",
+                        (f"Interrupted {attempts} times; giving up", datetime.now().isoformat(), job_id)
+                    )
+                self.connection.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_owner = ?, lease_until = ?, "
+                    "started_at = ? WHERE id = ?",
+                    (owner, now + lease_seconds, datetime.now().isoformat(), job_id)
+                )
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+        job = self.get(job_id)
+        job["payload"] = json.loads(payload)
+        return job
+
+    def renew(self, owner: str, job_ids: List[str], lease_seconds: float = JOB_LEASE_SECONDS):
+        """Extend the leases this owner still holds"""
+        until = time.time() + lease_seconds
+        with self.lock:
+            self.connection.executemany(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                [(until, job_id, owner) for job_id in job_ids]
+            )
+
+    def finish(self, job_id: str, owner: str, result: Optional[dict] = None, error: Optional[str] = None) -> bool:
+        """Record the outcome; False if the lease was lost to another worker meanwhile"""
+        with self.lock, span("job_queue"):
+            cursor = self.connection.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, lease_owner = NULL, finished_at = ?, "
+                "callback_status = CASE WHEN callback_url IS NULL THEN NULL ELSE 'pending' END "
+                "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                ("failed" if error is not None else "succeeded", None if result is None else json.dumps(result),
+                 error, datetime.now().isoformat(), job_id, owner)
+            )
+        return cursor.rowcount == 1
+
+    def claim_callback(self, job_id: str, owner: str, lease_seconds: float = JOB_WEBHOOK_LEASE_SECONDS) -> bool:
+        """Lease a finished job's webhook delivery: a pending one, or one whose deliverer stopped"""
+        now = time.time()
+        with self.lock, span("job_queue"):
+            cursor = self.connection.execute(
+                "UPDATE jobs SET callback_status = 'delivering', lease_owner = ?, lease_until = ? WHERE id = ? "
+                "AND (callback_status = 'pending' OR (callback_status = 'delivering' AND lease_until < ?))",
+                (owner, now + lease_seconds, job_id, now)
+            )
+        return cursor.rowcount == 1
+
+    def undelivered_callbacks(self) -> List[str]:
+        """IDs of finished jobs whose webhook was never sent, or whose deliverer stopped"""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT id FROM jobs WHERE callback_status = 'pending' "
+                "OR (callback_status = 'delivering' AND lease_until < ?) ORDER BY seq",
+                (time.time(),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def set_callback_status(self, job_id: str, status: str):
+        with self.lock:
+            self.connection.execute(
+                "UPDATE jobs SET callback_status = ?, lease_owner = NULL WHERE id = ?", (status, job_id)
+            )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self.lock:
+            row = self.connection.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return job_from_row(row) if row else None
+
+    def counts(self) -> Dict[str, int]:
+        with self.lock:
+            rows = self.connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: 0 for status in ("queued", "running", *FINAL_STATUSES)} | dict(rows)
+
+    def prune(self, older_than_seconds: float = JOB_RETENTION_SECONDS) -> int:
+        """Delete jobs finished longer ago than this, unless their webhook is still to be sent"""
+        cutoff = (datetime.now() - timedelta(seconds=older_than_seconds)).isoformat()
+        with self.lock, span("job_queue"):
+            return self.connection.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ? "
+                "AND (callback_status IS NULL OR callback_status NOT IN ('pending', 'delivering'))",
+                (cutoff,)
+            ).rowcount
+
+
+class JobRunner:
+    """
+    Worker coroutines on the event loop that claim and run jobs. Queue calls
+    (SQLite, possibly waiting on other workers' locks) run in threads so they
+    never block the loop. handlers maps a job kind to a coroutine function
+    taking the payload and returning the result dict; an exception fails the
+    job with its message (an HTTPException with its detail).
+    """
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Callable[[dict], Awaitable[dict]]],
+                 workers: int = JOB_WORKERS):
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = max(workers, 1)
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{secrets.token_hex(4)}"
+        self.running: Dict[str, str] = {}  # job ID -> kind, on this process
+        self.completed = 0
+        self.failed = 0
+        self.tasks: List[asyncio.Task] = []
+        self.wakeup: Optional[asyncio.Event] = None
+        self.changed: Optional[asyncio.Condition] = None
+
+    def start(self):
+        """
+        Start the workers on the running loop; jobs and callbacks left over from
+        a previous run are picked up
+        """
+        if self.tasks:
+            return
+        self.wakeup = asyncio.Event()
+        self.changed = asyncio.Condition()
+        self.tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self.tasks.append(asyncio.create_task(self._renew_leases()))
+        self.tasks.append(asyncio.create_task(self._maintain()))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def submit(self, kind: str, payload: dict, priority: str = "normal",
+                     callback_url: Optional[str] = None, job_id: Optional[str] = None) -> dict:
+        job = await asyncio.to_thread(self.queue.submit, kind, payload, priority, callback_url, job_id)
+        if self.wakeup is not None:
+            self.wakeup.set()
+        return job
+
+    async def wait(self, timeout: float):
+        """Return when a job on this process changes state, or after timeout"""
+        if self.changed is None:
+            await asyncio.sleep(timeout)
+            return
+        async with self.changed:
+            try:
+                await asyncio.wait_for(self.changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _notify(self):
+        if self.changed is None:
+            return
+        async with self.changed:
+            self.changed.notify_all()
+
+    async def _work(self):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.queue.claim, self.owner)
+            except Exception as e:
+                logger.warning(f"Could not claim a job: {e}")
+                job = None
+            if job is None:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: dict):
+        job_id = job["job_id"]
+        self.running[job_id] = job["kind"]
+        await self._notify()
+        result = error = None
+        try:
+            with span("job", kind=job["kind"]):
+                result = await self.handlers[job["kind"]](job["payload"])
+        except asyncio.CancelledError:
+            raise  # shutting down: the lease runs out and the job resumes elsewhere
+        except Exception as e:
+            error = str(getattr(e, "detail", None) or e)
+        finally:
+            self.running.pop(job_id, None)
+
+        if await asyncio.to_thread(self.queue.finish, job_id, self.owner, result, error):
+            if error is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+                logger.warning(f"Job {job_id} ({job['kind']}) failed: {error}")
+            await self._notify()
+            if job.get("callback_url"):
+                await self._deliver(job_id)
+
+    async def _deliver(self, job_id: str):
+        """POST the finished job to its callback URL, retrying with backoff (unless another worker is)"""
+        import requests
+
+        if not await asyncio.to_thread(self.queue.claim_callback, job_id, self.owner):
+            return
+        job = await asyncio.to_thread(self.queue.get, job_id)
+        if not callback_allowed(job["callback_url"]):
+            # Checked on submit too; the allowlist may have changed since
+            await asyncio.to_thread(self.queue.set_callback_status, job_id, "failed: host not allowed")
+            return
+        error = None
+        for attempt in range(JOB_WEBHOOK_RETRIES):
+            if attempt:
+                await asyncio.sleep(2 ** (attempt - 1))
+            try:
+                response = await asyncio.to_thread(
+                    requests.post, job["callback_url"], json=job, timeout=JOB_WEBHOOK_TIMEOUT_SECONDS,
+                    allow_redirects=False  # a redirect could point anywhere, past the allowlist
+                )
+                if response.status_code < 400:
+                    await asyncio.to_thread(self.queue.set_callback_status, job["job_id"], "delivered")
+                    return
+                error = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                error = str(e)
+        logger.warning(f"Callback for job {job['job_id']} failed: {error}")
+        await asyncio.to_thread(self.queue.set_callback_status, job["job_id"], f"failed: {error}")
+
+    async def _maintain(self):
+        """Now and every JOB_MAINTENANCE_SECONDS: resend stranded callbacks, delete expired jobs"""
+        while True:
+            try:
+                for job_id in await asyncio.to_thread(self.queue.undelivered_callbacks):
+                    await self._deliver(job_id)
+                pruned = await asyncio.to_thread(self.queue.prune)
+                if pruned:
+                    logger.info(f"Deleted {pruned} jobs finished over {JOB_RETENTION_SECONDS:.0f}s ago")
+            except Exception as e:
+                logger.warning(f"Job maintenance failed: {e}")
+            await asyncio.sleep(JOB_MAINTENANCE_SECONDS)
+
+    async def _renew_leases(self):
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            if self.running:
+                try:
+                    await asyncio.to_thread(self.queue.renew, self.owner, list(self.running))
+                except Exception as e:
+                    logger.warning(f"Could not renew job leases: {e}")
+
+    def status(self) -> dict:
+        return {
+            "workers": self.workers,
+            "owner": self.owner,
+            "running_here": dict(self.running),
+            "completed_here": self.completed,
+            "failed_here": self.failed,
+            "jobs": self.queue.counts()
+        }
@@ -0,0 +1,202 @@
+"""
+Fast JSON responses for the large admin and listing payloads: orjson
+serialization without a jsonable_encoder pass, pre-encoded JSON spliced in as
+fragments, gzip/brotli compression of large bodies picked from
+Accept-Encoding, and entity tags so unchanged payloads are answered with 304.
+"""
+import asyncio
+import gzip
+import hashlib
+import os
+import secrets
+import zlib
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Optional
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+
+# Smaller bodies are sent as they are
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+# Larger bodies are compressed in a worker thread, off the event loop
+COMPRESSION_THREAD_BYTES = 256 * 1024
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "text/")
+
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Store revisions restart with the process, so tags include a per-process ID
+PROCESS_ID = secrets.token_hex(8)
+
+
+def _default(value: Any):
+    """Types orjson does not serialize itself"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=JSON_OPTIONS)
+
+
+def fragment(encoded: str) -> orjson.Fragment:
+    """Already-encoded JSON, written into a response as it is"""
+    return orjson.Fragment(encoded)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered by orjson. Endpoints that return one directly skip
+    FastAPI's jsonable_encoder copy of the payload; records must already be
+    JSON-shaped (dicts, lists, strings, numbers, datetimes, fragments).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def entity_tag(*revision: Any) -> str:
+    """
+    Weak ETag for a response built from stores at the given revisions (and
+    request parameters), computed without building the response
+    """
+    digest = hashlib.blake2b(repr((PROCESS_ID,) + revision).encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], tag: str) -> bool:
+    """Whether an If-None-Match header names tag (weak comparison)"""
+    if not if_none_match:
+        return False
+    opaque = tag.removeprefix("W/")
+    return any(candidate.strip() == "*" or candidate.strip().removeprefix("W/") == opaque
+               for candidate in if_none_match.split(","))
+
+
+def conditional(if_none_match: Optional[str], tag: str, build: Callable[[], Any]) -> Response:
+    """
+    304 Not Modified when the client already holds tag; otherwise build() the
+    content (a Response, or anything FastJSONResponse can render) and tag it
+    """
+    if etag_matches(if_none_match, tag):
+        return Response(status_code=304, headers={"ETag": tag})
+    response = build()
+    if not isinstance(response, Response):
+        response = FastJSONResponse(response)
+    response.headers["ETag"] = tag
+    return response
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """br or gzip, whichever the client accepts (br preferred), else None"""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    if accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", accepted.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        import brotli  # loaded on the first brotli response
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, COMPRESSION_GZIP_LEVEL)
+
+
+async def compress_stream(chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[bytes]:
+    """
+    Compress a streamed body as it goes. Each chunk is flushed, so a reader
+    can decode everything sent so far without waiting for the end.
+    """
+    if encoding == "br":
+        import brotli
+        compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)  # gzip framing
+        process, flush, finish = compressor.compress, partial(compressor.flush, zlib.Z_SYNC_FLUSH), compressor.flush
+    async for chunk in chunks:
+        compressed = process(chunk) + flush()
+        if compressed:
+            yield compressed
+    yield finish()
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing text and JSON responses of a known length of at
+    least minimum_size bytes. Responses without a Content-Length (NDJSON,
+    server-sent events and other streams) pass through untouched, so their
+    chunks are not held back.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        length = headers.get("content-length")
+        return (length is not None and length.isdigit() and int(length) >= self.minimum_size
+                and "content-encoding" not in headers
+                and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        headers = None
+        chunks = []
+
+        async def send_compressed(message):
+            nonlocal start_message, headers
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=list(message["headers"]))
+                if self._compressible(headers):
+                    start_message = message  # held until the whole body is in
+                else:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            # Intermediate middleware may pass a known-length body on in pieces
+            chunks.append(message.get("body", b""))
+            if message.get("more_body"):
+                return
+            body = b"".join(chunks)
+            if len(body) >= COMPRESSION_THREAD_BYTES:
+                body = await asyncio.to_thread(compress, body, encoding)
+            else:
+                body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send({**start_message, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
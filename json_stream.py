@@ -0,0 +1,99 @@
+"""
+Incremental JSON parsing for streamed LLM output: elements of an array field
+are emitted as soon as each one is complete, before the rest of the document
+has arrived
+"""
+import json
+from typing import List, Optional
+
+WHITESPACE = " \t\r\n"
+
+
+class ArrayItemStream:
+    """
+    Feed text chunks of a JSON object such as {"questions": [{...}, {...}]} and
+    get back each element of the named top-level array field, decoded, as soon
+    as its last character arrives. A single-pass scanner tracks string/escape
+    state and bracket depth, so each character is looked at once however the
+    text is chunked; consumed text is dropped from the buffer.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.string_start: Optional[int] = None  # start of a key string at depth 1
+        self.last_key: Optional[str] = None
+        self.in_target = False
+        self.item_start: Optional[int] = None
+        self.item_is_container = False
+        self.done = False
+
+    def feed(self, chunk: str) -> List[object]:
+        """Consume a chunk; returns the array elements it completed"""
+        items = []
+        self.buffer += chunk
+        buffer = self.buffer
+        pos = self.pos
+        while pos < len(buffer) and not self.done:
+            char = buffer[pos]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.string_start is not None:
+                        self.last_key = json.loads(buffer[self.string_start:pos + 1])
+                        self.string_start = None
+            elif char == '"':
+                self.in_string = True
+                if self.depth == 1:
+                    self.string_start = pos
+                elif self.in_target and self.depth == 2 and self.item_start is None:
+                    self._start_item(pos, container=False)
+            elif char in "{[":
+                if self.in_target and self.depth == 2 and self.item_start is None:
+                    self._start_item(pos, container=True)
+                if char == "[" and self.depth == 1 and self.last_key == self.field:
+                    self.in_target = True
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.in_target and self.depth == 2 and self.item_is_container and self.item_start is not None:
+                    items.append(json.loads(buffer[self.item_start:pos + 1]))
+                    self.item_start = None
+                elif self.in_target and self.depth == 1:
+                    # End of the target array (a scalar element may end with it)
+                    self._finish_scalar(buffer, pos, items)
+                    self.in_target = False
+                    self.done = True
+            elif self.in_target and self.depth == 2:
+                if char == ",":
+                    self._finish_scalar(buffer, pos, items)
+                elif char not in WHITESPACE and self.item_start is None:
+                    self._start_item(pos, container=False)
+            pos += 1
+
+        # Keep only text that is still needed
+        keep = min(p for p in (pos, self.item_start, self.string_start) if p is not None)
+        self.buffer = buffer[keep:]
+        self.pos = pos - keep
+        if self.item_start is not None:
+            self.item_start -= keep
+        if self.string_start is not None:
+            self.string_start -= keep
+        return items
+
+    def _start_item(self, pos: int, container: bool):
+        self.item_start = pos
+        self.item_is_container = container
+
+    def _finish_scalar(self, buffer: str, pos: int, items: list):
+        if self.item_start is not None and not self.item_is_container:
+            items.append(json.loads(buffer[self.item_start:pos]))
+        self.item_start = None
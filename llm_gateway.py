@@ -0,0 +1,467 @@
+"""
+Shared outbound gateway for Gemini calls: rate limiting, concurrency caps,
+single-flight deduplication and retries with backoff
+"""
+import asyncio
+import contextvars
+import functools
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from resilience import Dependency, gemini_dependency
+from telemetry import logger, span, stage_duration
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+# Quota and limits (per process)
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60"))
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", "10"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TASK_CONCURRENCY_DEFAULT = int(os.getenv("LLM_TASK_CONCURRENCY_DEFAULT", "4"))
+# Per-task overrides, e.g. "evaluation=2,answer_scoring=6"
+LLM_TASK_CONCURRENCY = os.getenv("LLM_TASK_CONCURRENCY", "")
+# Threads for calls made from the event loop; waits for a slot happen on these, not on asyncio's default executor
+LLM_GATEWAY_THREADS = int(os.getenv("LLM_GATEWAY_THREADS", "32"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "20"))
+# "gemini" for the real API, "fake" for the in-process stand-in in fakes.py
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+# Idempotent tasks that may get a hedged duplicate request once they run past the p95
+LLM_HEDGE_TASKS = os.getenv("LLM_HEDGE_TASKS", "interview_questions,live_question,empathy,mcq")
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable",
+    "InternalServerError", "DeadlineExceeded", "BadGateway", "GatewayTimeout"
+}
+
+
+def parse_task_limits(spec: str) -> Dict[str, int]:
+    """Parse "task=limit,task=limit" into a dict"""
+    limits = {}
+    for part in spec.split(","):
+        if "=" not in part:
+            continue
+        task, limit = part.split("=", 1)
+        limits[task.strip()] = int(limit)
+    return limits
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for rate-limit (429) and server-side (5xx) provider errors"""
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and code in RETRYABLE_STATUS_CODES:
+        return True
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+_genai = None
+_genai_lock = threading.Lock()
+
+
+def genai_client():
+    """
+    google.generativeai, imported and configured on the first real Gemini call:
+    the SDK takes longer to import than the rest of an app, and the fake
+    backend never needs it
+    """
+    global _genai
+    with _genai_lock:
+        if _genai is None:
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY environment variable is required")
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            _genai = genai
+    return _genai
+
+
+def gemini_generate(model_name: str, prompt: str, generation_config: Optional[dict] = None,
+                    timeout: Optional[float] = None) -> str:
+    """Make one Gemini call and return the response text"""
+    model = genai_client().GenerativeModel(model_name=model_name, generation_config=generation_config)
+    request_options = {"timeout": timeout} if timeout else None
+    response = model.generate_content(prompt, request_options=request_options)
+    return response.text
+
+
+def gemini_stream(model_name: str, prompt: str, generation_config: Optional[dict] = None,
+                  timeout: Optional[float] = None) -> Iterator[str]:
+    """Make one streaming Gemini call, yielding response text as it is generated"""
+    model = genai_client().GenerativeModel(model_name=model_name, generation_config=generation_config)
+    request_options = {"timeout": timeout} if timeout else None
+    for chunk in model.generate_content(prompt, stream=True, request_options=request_options):
+        if chunk.text:
+            yield chunk.text
+
+
+def default_provider() -> Callable[..., str]:
+    """Provider selected by LLM_BACKEND"""
+    if LLM_BACKEND == "fake":
+        from fakes import fake_gemini_generate
+        return fake_gemini_generate
+    return gemini_generate
+
+
+def default_stream_provider() -> Callable[..., Iterator[str]]:
+    """Streaming provider selected by LLM_BACKEND"""
+    if LLM_BACKEND == "fake":
+        from fakes import fake_gemini_stream
+        return fake_gemini_stream
+    return gemini_stream
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available"""
+
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.rate = rate_per_second
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _take(self) -> float:
+        """Take a token and return 0, or return how long until one is available"""
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        while wait := self._take():
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """acquire() for the event loop: sleeps without holding a thread"""
+        while wait := self._take():
+            await asyncio.sleep(wait)
+
+    def try_acquire(self) -> bool:
+        """Take a token only if one is available right now"""
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def available(self) -> float:
+        with self.lock:
+            self._refill()
+            return self.tokens
+
+
+class TaskStats:
+    """Counters and timings for one task"""
+    __slots__ = ("calls", "provider_calls", "coalesced", "retries", "failures",
+                 "queue_wait_total", "queue_wait_max", "provider_total", "provider_max")
+
+    def __init__(self):
+        self.calls = 0
+        self.provider_calls = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.failures = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.provider_total = 0.0
+        self.provider_max = 0.0
+
+    def to_dict(self) -> dict:
+        provider_calls = self.provider_calls or 1
+        return {
+            "calls": self.calls,
+            "provider_calls": self.provider_calls,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "failures": self.failures,
+            "queue_wait_seconds": {
+                "total": round(self.queue_wait_total, 4),
+                "avg": round(self.queue_wait_total / provider_calls, 4),
+                "max": round(self.queue_wait_max, 4)
+            },
+            "provider_seconds": {
+                "total": round(self.provider_total, 4),
+                "avg": round(self.provider_total / provider_calls, 4),
+                "max": round(self.provider_max, 4)
+            }
+        }
+
+
+class LLMGateway:
+    """Single entry point for outbound LLM calls"""
+
+    def __init__(self,
+                 requests_per_minute: float = GEMINI_REQUESTS_PER_MINUTE,
+                 burst: int = GEMINI_BURST,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 task_concurrency: Optional[Dict[str, int]] = None,
+                 default_task_concurrency: int = LLM_TASK_CONCURRENCY_DEFAULT,
+                 max_retries: int = LLM_MAX_RETRIES,
+                 backoff_base: float = LLM_BACKOFF_BASE_SECONDS,
+                 backoff_max: float = LLM_BACKOFF_MAX_SECONDS,
+                 provider: Optional[Callable[..., str]] = None,
+                 stream_provider: Optional[Callable[..., Iterator[str]]] = None,
+                 dependency: Dependency = gemini_dependency,
+                 hedge_tasks: Optional[set] = None,
+                 threads: int = LLM_GATEWAY_THREADS):
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self.global_slots = threading.BoundedSemaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.task_concurrency = task_concurrency if task_concurrency is not None else parse_task_limits(LLM_TASK_CONCURRENCY)
+        self.default_task_concurrency = default_task_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.provider = provider or default_provider()
+        self.stream_provider = stream_provider or default_stream_provider()
+        self.dependency = dependency
+        self.hedge_tasks = hedge_tasks if hedge_tasks is not None else {
+            task.strip() for task in LLM_HEDGE_TASKS.split(",") if task.strip()
+        }
+
+        self._lock = threading.Lock()
+        self._task_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._stats: Dict[str, TaskStats] = {}
+        self._active = 0
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="llm-gateway")
+
+    def _slots_for(self, task: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if task not in self._task_slots:
+                limit = self.task_concurrency.get(task, self.default_task_concurrency)
+                self._task_slots[task] = threading.BoundedSemaphore(limit)
+            return self._task_slots[task]
+
+    def _stats_for(self, task: str) -> TaskStats:
+        with self._lock:
+            if task not in self._stats:
+                self._stats[task] = TaskStats()
+            return self._stats[task]
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _call_provider(self, task: str, model_name: str, prompt: str, generation_config: Optional[dict],
+                       queued_at: Optional[float] = None) -> str:
+        """
+        Run one call under the rate limiter and the task/global limits, retrying
+        retryable errors. A caller passing queued_at has already taken the token
+        for the first attempt.
+        """
+        stats = self._stats_for(task)
+        task_slots = self._slots_for(task)
+        attempt = 0
+        while True:
+            if queued_at is None:
+                queued_at = time.perf_counter()
+                # The token comes first, so a call waiting on the rate limit holds no slot
+                self.bucket.acquire()
+            with task_slots, self.global_slots:
+                started_at = time.perf_counter()
+                with self._lock:
+                    self._active += 1
+                stage_duration.observe(started_at - queued_at, stage="gemini_queue", status="ok", task=task)
+                try:
+                    # Deadline, hedging and circuit breaking; hedges spend a rate-limit token too
+                    with span("gemini", task=task):
+                        return self.dependency.call(
+                            lambda timeout: self.provider(model_name, prompt, generation_config, timeout),
+                            hedge=task in self.hedge_tasks,
+                            allow_hedge=self.bucket.try_acquire
+                        )
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        stats.failures += 1
+                        raise
+                    error = e
+                finally:
+                    finished_at = time.perf_counter()
+                    with self._lock:
+                        self._active -= 1
+                        stats.provider_calls += 1
+                        queue_wait = started_at - queued_at
+                        provider_time = finished_at - started_at
+                        stats.queue_wait_total += queue_wait
+                        stats.queue_wait_max = max(stats.queue_wait_max, queue_wait)
+                        stats.provider_total += provider_time
+                        stats.provider_max = max(stats.provider_max, provider_time)
+            # Back off outside the concurrency slots so others can proceed
+            delay = self.backoff_delay(attempt)
+            logger.warning(f"LLM gateway: {task} attempt {attempt + 1} failed ({error}), retrying in {delay:.2f}s")
+            stats.retries += 1
+            attempt += 1
+            queued_at = None
+            time.sleep(delay)
+
+    def _claim(self, task: str, model_name: str, prompt: str,
+               generation_config: Optional[dict]) -> Tuple[str, Future, bool]:
+        """
+        (key, future, owner) for a request: identical in-flight requests (same model,
+        config and prompt) share the future of the first, whose caller is the owner
+        and makes the provider call
+        """
+        stats = self._stats_for(task)
+        key = hashlib.sha256(
+            json.dumps([model_name, generation_config, prompt], sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+        with self._lock:
+            stats.calls += 1
+            shared = self._inflight.get(key)
+            if shared is None:
+                future = self._inflight[key] = Future()
+                return key, future, True
+            stats.coalesced += 1
+            return key, shared, False
+
+    def _fulfil(self, key: str, future: Future, task: str, model_name: str, prompt: str,
+                generation_config: Optional[dict], queued_at: Optional[float] = None) -> str:
+        """Make the provider call for a claimed request and settle its future"""
+        try:
+            text = self._call_provider(task, model_name, prompt, generation_config, queued_at)
+            future.set_result(text)
+            return text
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def generate(self, prompt: str, task: str = "default", model_name: str = DEFAULT_MODEL,
+                 generation_config: Optional[dict] = None) -> str:
+        """
+        Generate text for prompt (blocking).
+        Identical in-flight requests (same model, config and prompt) share one provider call.
+        """
+        key, future, owner = self._claim(task, model_name, prompt, generation_config)
+        if not owner:
+            return future.result()
+        return self._fulfil(key, future, task, model_name, prompt, generation_config)
+
+    def stream(self, prompt: str, task: str = "default", model_name: str = DEFAULT_MODEL,
+               generation_config: Optional[dict] = None) -> Iterator[str]:
+        """
+        Generate text for prompt incrementally, yielding chunks as the provider
+        emits them. Same rate and concurrency limits as generate(), held until the
+        stream ends. Retried only until the first chunk arrives; never coalesced
+        or hedged.
+        """
+        stats = self._stats_for(task)
+        task_slots = self._slots_for(task)
+        with self._lock:
+            stats.calls += 1
+        attempt = 0
+        while True:
+            queued_at = time.perf_counter()
+            first_chunk = True
+            # The token comes first, so a stream waiting on the rate limit holds no slot
+            self.bucket.acquire()
+            with task_slots, self.global_slots:
+                started_at = time.perf_counter()
+                with self._lock:
+                    self._active += 1
+                stage_duration.observe(started_at - queued_at, stage="gemini_queue", status="ok", task=task)
+                try:
+                    with span("gemini", task=task):
+                        chunks = self.dependency.stream(
+                            lambda timeout: self.stream_provider(model_name, prompt, generation_config, timeout)
+                        )
+                        for chunk in chunks:
+                            if first_chunk:
+                                first_chunk = False
+                                stage_duration.observe(time.perf_counter() - started_at, stage="gemini_first_chunk",
+                                                       status="ok", task=task)
+                            yield chunk
+                    return
+                except Exception as e:
+                    # Once text has gone out, a retry would repeat it
+                    if not first_chunk or attempt >= self.max_retries or not is_retryable(e):
+                        stats.failures += 1
+                        raise
+                    error = e
+                finally:
+                    finished_at = time.perf_counter()
+                    with self._lock:
+                        self._active -= 1
+                        stats.provider_calls += 1
+                        queue_wait = started_at - queued_at
+                        provider_time = finished_at - started_at
+                        stats.queue_wait_total += queue_wait
+                        stats.queue_wait_max = max(stats.queue_wait_max, queue_wait)
+                        stats.provider_total += provider_time
+                        stats.provider_max = max(stats.provider_max, provider_time)
+            delay = self.backoff_delay(attempt)
+            logger.warning(f"LLM gateway: {task} stream attempt {attempt + 1} failed ({error}), retrying in {delay:.2f}s")
+            stats.retries += 1
+            attempt += 1
+            time.sleep(delay)
+
+    async def agenerate(self, prompt: str, task: str = "default", model_name: str = DEFAULT_MODEL,
+                        generation_config: Optional[dict] = None) -> str:
+        """
+        generate() for the event loop. A coalesced request and the wait for a rate
+        limit token hold no thread; the call itself runs on the gateway's executor.
+        """
+        key, future, owner = self._claim(task, model_name, prompt, generation_config)
+        if not owner:
+            return await asyncio.wrap_future(future)
+        queued_at = time.perf_counter()
+        try:
+            await self.bucket.acquire_async()
+        except BaseException:
+            # Cancelled before the call was made: callers sharing it get an error instead of waiting forever
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(RuntimeError("LLM request was cancelled before it was sent"))
+            raise
+        return await self.run(self._fulfil, key, future, task, model_name, prompt, generation_config, queued_at)
+
+    async def run(self, fn: Callable, *args):
+        """Run a blocking function that makes gateway calls on the gateway's threads, in the caller's context"""
+        call = functools.partial(contextvars.copy_context().run, fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    def metrics(self) -> dict:
+        """Snapshot of gateway state and per-task queue wait vs provider time"""
+        with self._lock:
+            tasks = {task: stats.to_dict() for task, stats in self._stats.items()}
+            in_flight = len(self._inflight)
+            active = self._active
+        return {
+            "limits": {
+                "requests_per_minute": self.bucket.rate * 60,
+                "burst": self.bucket.capacity,
+                "max_concurrency": self.max_concurrency,
+                "default_task_concurrency": self.default_task_concurrency,
+                "task_concurrency": self.task_concurrency,
+                "max_retries": self.max_retries
+            },
+            "rate_limiter_tokens": round(self.bucket.available(), 2),
+            "in_flight_requests": in_flight,
+            "active_provider_calls": active,
+            "tasks": tasks,
+            "dependency": self.dependency.status()
+        }
+
+
+llm_gateway = LLMGateway()
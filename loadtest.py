@@ -0,0 +1,250 @@
+"""
+Load generator: drives full candidate journeys against running main and mcq apps
+and reports throughput and p50/p95/p99 latency per endpoint.
+
+Run both apps against the in-process fakes, then point this at them:
+
+    LLM_BACKEND=fake TTS_BACKEND=fake GEMINI_API_KEY=fake uvicorn main:app --port 8000 --workers 1
+    LLM_BACKEND=fake GEMINI_API_KEY=fake uvicorn mcq:app --port 8080
+    python loadtest.py --concurrency 20 --journeys 200 --output results.json
+
+Use --baseline to compare with a previous run and fail on regressions.
+"""
+import argparse
+import base64
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from fakes import make_resume_pdf, make_wav_bytes
+
+API_BASE_URL = "http://localhost:8000"
+MCQ_API_URL = "http://localhost:8080"
+
+SAMPLE_ANSWER = (
+    "In my last role I owned the FastAPI service that handled application intake. "
+    "I profiled the slow endpoints, moved resume parsing off the request path and "
+    "added caching, which cut our p95 latency roughly in half."
+)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class LatencyRecorder:
+    """Thread-safe per-endpoint latency and error collection"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, endpoint, seconds, ok):
+        with self.lock:
+            self.samples.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, elapsed):
+        endpoints = {}
+        with self.lock:
+            for endpoint, values in self.samples.items():
+                ordered = sorted(values)
+                errors = self.errors.get(endpoint, 0)
+                endpoints[endpoint] = {
+                    "requests": len(ordered),
+                    "errors": errors,
+                    "error_rate": round(errors / len(ordered), 4),
+                    "throughput_rps": round(len(ordered) / elapsed, 3) if elapsed else 0.0,
+                    "p50_ms": round(percentile(ordered, 50) * 1000, 1),
+                    "p95_ms": round(percentile(ordered, 95) * 1000, 1),
+                    "p99_ms": round(percentile(ordered, 99) * 1000, 1),
+                    "max_ms": round(ordered[-1] * 1000, 1)
+                }
+        return endpoints
+
+
+class JourneyFailed(Exception):
+    pass
+
+
+class CandidateJourney:
+    """One candidate: apply, take the quiz, do the live interview, get evaluated"""
+
+    def __init__(self, args, number, resume_pdf, audio_base64, recorder):
+        self.args = args
+        self.number = number
+        self.resume_pdf = resume_pdf
+        self.audio_base64 = audio_base64
+        self.recorder = recorder
+        self.http = requests.Session()
+
+    def call(self, label, method, url, **kwargs):
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = self.http.request(method, url, timeout=self.args.timeout, **kwargs)
+            ok = response.status_code < 400
+            if not ok:
+                raise JourneyFailed(f"{label}: HTTP {response.status_code} {response.text[:200]}")
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            raise JourneyFailed(f"{label}: {e}")
+        finally:
+            self.recorder.record(label, time.perf_counter() - started, ok)
+
+    def run(self):
+        name = f"Load Candidate {self.number}"
+        email = f"candidate{self.number}@example.com"
+        position = self.args.position
+
+        application = self.call(
+            "POST /api/job-application", "POST", f"{self.args.main_url}/api/job-application",
+            data={"full_name": name, "email": email, "phone": "+15550100",
+                  "position": position, "cover_letter": "Load test application"},
+            files={"resume": ("resume.pdf", self.resume_pdf, "application/pdf")}
+        )
+        application_id = application["application_id"]
+
+        if not self.args.skip_quiz:
+            self.call(
+                "POST /generate-quiz", "POST", f"{self.args.mcq_url}/generate-quiz",
+                data={"name": name, "email": email, "position": position},
+                files={"resume": ("resume.pdf", self.resume_pdf, "application/pdf")}
+            )
+
+        started = self.call(
+            "POST /api/interview/start", "POST", f"{self.args.main_url}/api/interview/start",
+            json={"application_id": application_id}
+        )
+        session_id = started["session_id"]
+
+        answers = []
+        question = started["question"]
+        for turn in range(self.args.turns):
+            answers.append({"question_id": turn + 1, "question": question, "answer": SAMPLE_ANSWER})
+            reply = self.call(
+                "POST /api/interview/continue", "POST", f"{self.args.main_url}/api/interview/continue",
+                json={"session_id": session_id, "answer_text": SAMPLE_ANSWER,
+                      "audio_blob_base64": self.audio_base64}
+            )
+            if reply.get("is_final"):
+                break
+            question = reply["question"]
+
+        self.call(
+            "POST /api/interview/evaluate", "POST", f"{self.args.main_url}/api/interview/evaluate",
+            json={"application_id": application_id, "position": position, "answers": answers}
+        )
+
+
+def compare_to_baseline(report, baseline, max_regression, max_error_rate):
+    """Return a list of regressions of this run against a baseline report"""
+    problems = []
+    for endpoint, stats in report["endpoints"].items():
+        if stats["error_rate"] > max_error_rate:
+            problems.append(f"{endpoint}: error rate {stats['error_rate']:.2%} > {max_error_rate:.2%}")
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if not previous or not previous.get("p95_ms"):
+            continue
+        change = (stats["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"]
+        if change > max_regression:
+            problems.append(
+                f"{endpoint}: p95 {previous['p95_ms']}ms -> {stats['p95_ms']}ms (+{change:.0%})"
+            )
+    return problems
+
+
+def print_report(report):
+    print("\n" + "=" * 96)
+    print(f"  LOAD TEST: {report['journeys_completed']}/{report['journeys_started']} journeys, "
+          f"concurrency {report['concurrency']}, {report['elapsed_seconds']}s, "
+          f"{report['journeys_per_minute']} journeys/min")
+    print("=" * 96)
+    print(f"{'endpoint':34} {'reqs':>6} {'err':>5} {'rps':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for endpoint, stats in report["endpoints"].items():
+        print(f"{endpoint:34} {stats['requests']:>6} {stats['errors']:>5} {stats['throughput_rps']:>7} "
+              f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9} {stats['max_ms']:>9}")
+    for failure in report["sample_failures"]:
+        print(f"  ✗ {failure}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive full candidate journeys and report latency")
+    parser.add_argument("--main-url", default=API_BASE_URL)
+    parser.add_argument("--mcq-url", default=MCQ_API_URL)
+    parser.add_argument("--concurrency", type=int, default=10, help="candidates in flight at once")
+    parser.add_argument("--journeys", type=int, default=50, help="total candidate journeys")
+    parser.add_argument("--turns", type=int, default=4, help="continue calls per interview")
+    parser.add_argument("--audio-seconds", type=float, default=20.0, help="length of each answer clip")
+    parser.add_argument("--resume-pages", type=int, default=2)
+    parser.add_argument("--position", default="Software Engineer")
+    parser.add_argument("--skip-quiz", action="store_true", help="don't call the mcq service")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout in seconds")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed p95 increase (0.25 = 25%%)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    resume_pdf = make_resume_pdf(args.resume_pages)
+    audio_base64 = base64.b64encode(make_wav_bytes(args.audio_seconds)).decode("utf-8")
+    recorder = LatencyRecorder()
+    failures = []
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [
+            pool.submit(CandidateJourney(args, number, resume_pdf, audio_base64, recorder).run)
+            for number in range(1, args.journeys + 1)
+        ]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except JourneyFailed as e:
+                failures.append(str(e))
+            except Exception as e:
+                # An unexpected reply (missing key, bad JSON) fails this journey, not the run
+                failures.append(f"unexpected {type(e).__name__}: {e}")
+    elapsed = time.perf_counter() - started
+
+    completed = args.journeys - len(failures)
+    report = {
+        "concurrency": args.concurrency,
+        "journeys_started": args.journeys,
+        "journeys_completed": completed,
+        "elapsed_seconds": round(elapsed, 2),
+        "journeys_per_minute": round(completed / elapsed * 60, 2) if elapsed else 0.0,
+        "endpoints": recorder.report(elapsed),
+        "sample_failures": failures[:5]
+    }
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        problems = compare_to_baseline(report, baseline, args.max_regression, args.max_error_rate)
+        if problems:
+            print("\n✗ Regressions against baseline:")
+            for problem in problems:
+                print(f"  • {problem}")
+            sys.exit(1)
+        print("\n✓ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
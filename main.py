@@ -1,5 +1,5 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi import FastAPI, File, UploadFile, Form, Header, HTTPException
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List, Dict
@@ -7,21 +7,37 @@ import requests
 import io
 import os
 from datetime import datetime
-import google.generativeai as genai
 import json
+import re
+import secrets
 from dotenv import load_dotenv
 import base64
-import librosa
-import numpy as np
 import tempfile
 import time
-from mcq import extract_skills_from_resume
-import PyPDF2
-from docx import Document
+import asyncio
+import itertools
+from core import extract_resume_bytes, extract_skills_from_resume, resume_context
+from prompt_builder import prompt_builder
+from llm_gateway import llm_gateway
+from telemetry import logger, span, traced, render_prometheus, request_context_middleware
+from resilience import elevenlabs_dependency, gemini_dependency, DependencyUnavailable, UpstreamError
+from application_log import APPLICATION, CLEAR, INTERVIEW_SCORE, POSITION, UPDATE, create_application_log
+from application_table import RESUME_DIR, ApplicationTable, resume_path_for
+from bulk_ingest import IngestProgress, ingest, parse_manifest
+from search_index import search_index
+from ranking import parse_weights, ranking_engine
+from session_store import (EXPORT_BATCH, SESSION_UPDATE_RETRIES, SessionConflictError, create_session_store,
+                           is_finished)
+from json_responses import (CompressionMiddleware, FastJSONResponse, compress_stream, conditional, dumps, entity_tag,
+                            etag_matches, fragment, negotiate_encoding)
+from jobs import FINAL_STATUSES, PRIORITIES, JOB_POLL_SECONDS, JobQueue, JobRunner, callback_allowed, new_job_id
 load_dotenv()
 
 
-app = FastAPI(title="Job Application API")
+app = FastAPI(title="Job Application API", default_response_class=FastJSONResponse)
+
+# Request IDs and per-route latency metrics
+app.middleware("http")(request_context_middleware)
 
 # CORS middleware
 app.add_middleware(
@@ -32,12 +48,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for large JSON bodies (COMPRESSION_MIN_BYTES and up)
+app.add_middleware(CompressionMiddleware)
+
 # API Configuration
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 RESUME_CONTENT = "" # Global variable to hold resume content
-# Configure Gemini
-genai.configure(api_key=GEMINI_API_KEY)
+# "elevenlabs" for the real API, "fake" for the in-process stand-in in fakes.py
+TTS_BACKEND = os.getenv("TTS_BACKEND", "elevenlabs")
+# Per-question scoring fan-out for evaluation_mode="parallel"
+EVAL_QUESTION_CONCURRENCY = int(os.getenv("EVAL_QUESTION_CONCURRENCY", "10"))
+# Spoken empathetic line before each live-interview question (generated alongside it)
+EMPATHETIC_FEEDBACK = os.getenv("EMPATHETIC_FEEDBACK", "true").lower() == "true"
+# How long a turn waits for the empathetic line once the question is ready
+EMPATHY_GRACE_SECONDS = float(os.getenv("EMPATHY_GRACE_SECONDS", "0.3"))
+# Batch evaluation fan-out
+BATCH_EVAL_CONCURRENCY = int(os.getenv("BATCH_EVAL_CONCURRENCY", "8"))
+BATCH_EVAL_CONCURRENCY_LIMIT = int(os.getenv("BATCH_EVAL_CONCURRENCY_LIMIT", "32"))
+BATCH_EVAL_MAX_ITEMS = int(os.getenv("BATCH_EVAL_MAX_ITEMS", "1000"))
+# Uploaded archives, manifests and checkpoints for bulk imports
+BULK_IMPORT_DIR = os.getenv("BULK_IMPORT_DIR", "/tmp/bulk_imports")
+# Replaying application changes (indexing each for search and ranking) hands the event loop back
+# after SYNC_SLICE_SECONDS of work, for SYNC_PAUSE_SECONDS, so other requests get through a catch-up
+SYNC_SLICE_SECONDS = 0.005
+SYNC_PAUSE_SECONDS = 0.001
 
 # Pydantic Models
 class TextToSpeechRequest(BaseModel):
@@ -71,6 +106,7 @@ class InterviewSubmission(BaseModel):
     application_id: str
     position: str
     answers: List[QuestionAnswer]
+    evaluation_mode: Optional[str] = "single"  # single: one prompt, parallel: one prompt per answer
 
 class EvaluationResponse(BaseModel):
     application_id: str
@@ -81,9 +117,121 @@ class EvaluationResponse(BaseModel):
     recommendation: str
     summary: str
 
+class BatchEvaluationRequest(BaseModel):
+    submissions: Optional[List[InterviewSubmission]] = None
+    session_ids: Optional[List[str]] = None
+    concurrency: Optional[int] = None  # defaults to BATCH_EVAL_CONCURRENCY
+    evaluation_mode: Optional[str] = "single"  # used for submissions built from session_ids
+
+class ImportedApplication(BaseModel):
+    full_name: str
+    email: str
+    phone: Optional[str] = ""
+    position: str
+    cover_letter: Optional[str] = None
+    resume_filename: str
+    resume_base64: str
+    resume_text: Optional[str] = ""
+    resume_skills: List[str] = []
+    source_entry: Optional[str] = None
+
+class ApplicationBatchRequest(BaseModel):
+    applications: List[ImportedApplication]
+
+class PositionDescription(BaseModel):
+    title: str
+    description: str
+    required_skills: List[str] = []
+
+class QuizScoreRequest(BaseModel):
+    quiz_score: float
+
 # In-memory storage (replace with database in production)
-job_applications = []
-interview_sessions = {}  # Store interview questions and answers
+job_applications = ApplicationTable()  # columnar; records read like dicts
+# Every write to the applications, shared between workers (APPLICATION_STORE); replayed into
+# job_applications, search_index and ranking_engine by sync_applications
+application_log = create_application_log()
+applied_change = 0  # sequence number of the last change replayed here
+application_sync = asyncio.Lock()
+session_store = create_session_store()  # interview sessions, shared between workers (SESSION_STORE)
+# Live-interview answers being scored in the background on this worker, keyed by (session ID, answer number)
+pending_answer_scores: Dict[tuple, asyncio.Task] = {}
+bulk_import_jobs = {}  # job_id -> bulk import state
+
+def index_application(application: dict):
+    """Make a stored application searchable and rankable"""
+    search_index.add(application)
+    ranking_engine.add(application)
+
+def apply_application_change(kind: str, data: dict):
+    """Replay one logged change into this worker's table, search index and ranking engine"""
+    if kind == APPLICATION:
+        index_application(job_applications.append(data))
+    elif kind == UPDATE:
+        application = job_applications.get(data["application_id"])
+        if application is None:
+            return
+        for key, value in data["fields"].items():
+            application[key] = value
+        if "quiz_score" in data["fields"]:
+            ranking_engine.set_quiz_score(data["application_id"], data["fields"]["quiz_score"])
+    elif kind == INTERVIEW_SCORE:
+        ranking_engine.set_interview_score(data["application_id"], data["score"])
+    elif kind == POSITION:
+        ranking_engine.register_position(data["title"], data["description"], data["required_skills"],
+                                         data["registered_at"])
+    elif kind == CLEAR:
+        job_applications.clear()
+        search_index.clear()
+        ranking_engine.clear()
+
+async def sync_applications():
+    """
+    Replay the application changes recorded since the last sync, by this worker
+    or another one. Called before applications are read and after they are
+    written; returns without awaiting when nothing is new on a single worker.
+    Changes are applied a time slice at a time, so catching up on a bulk import
+    does not hold up requests that don't read applications.
+    """
+    global applied_change
+    async with application_sync:
+        while True:
+            if application_log.shared:
+                changes = await asyncio.to_thread(application_log.since, applied_change)
+            else:
+                changes = application_log.since(applied_change)
+            if not changes:
+                return
+            slice_ends = time.perf_counter() + SYNC_SLICE_SECONDS
+            for seq, kind, data in changes:
+                apply_application_change(kind, data)
+                applied_change = seq
+                if time.perf_counter() >= slice_ends:
+                    await asyncio.sleep(SYNC_PAUSE_SECONDS)
+                    slice_ends = time.perf_counter() + SYNC_SLICE_SECONDS
+
+def store_applications(applications: List[dict]) -> List[str]:
+    """
+    Save the resume files of new applications and record them, which gives them
+    their IDs (blocking). Each dict carries resume_bytes, which is kept on disk only.
+    """
+    os.makedirs(RESUME_DIR, exist_ok=True)
+    staged = []
+    for application in applications:
+        # The file is named after the ID, which is only known once the application is recorded
+        path = os.path.join(RESUME_DIR, f".upload-{secrets.token_hex(8)}")
+        with open(path, "wb") as f:
+            f.write(application.pop("resume_bytes"))
+        staged.append(path)
+    try:
+        application_ids = application_log.add(applications)
+    except Exception:
+        for path in staged:
+            os.remove(path)
+        raise
+    for application_id, application, path in zip(application_ids, applications, staged):
+        os.replace(path, resume_path_for(application_id, application["resume_filename"]))
+    return application_ids
 
 @app.get("/")
 async def root():
@@ -118,38 +266,34 @@ async def submit_job_application(
                 detail=f"Invalid file type. Allowed: {', '.join(allowed_extensions)}"
             )
         
-        resume_content = await resume.read()
-        application_id = f"APP-{len(job_applications) + 1:05d}"
-        submission_time = datetime.now().isoformat()
-        
-        # Save resume
-        resume_dir = "/tmp/resumes"
-        os.makedirs(resume_dir, exist_ok=True)
+        with span("upload"):
+            resume_content = await resume.read()
         
-        safe_filename = f"{application_id}_{resume.filename}"
-        resume_path = os.path.join(resume_dir, safe_filename)
+        # Extract once at submission so search (and later stages) can use the text.
+        # Done before anything is stored, so a failure leaves no half-filled application
+        resume_text = await asyncio.to_thread(extract_resume_bytes, resume_content, file_extension)
+        resume_skills = await asyncio.to_thread(extract_skills_from_resume, resume_text) if resume_text else []
         
-        with open(resume_path, "wb") as f:
-            f.write(resume_content)
+        submission_time = datetime.now().isoformat()
         
         # Store resume content globally for interview use
         RESUME_CONTENT = resume_content  
         
-        application_data = {
-            "application_id": application_id,
+        # The resume itself stays on disk (RESUME_DIR), not in memory
+        application_id, = await asyncio.to_thread(store_applications, [{
             "full_name": full_name,
             "email": email,
             "phone": phone,
             "position": position,
             "cover_letter": cover_letter,
             "resume_filename": resume.filename,
-            "resume_path": resume_path,
-            "resume_content": resume_content,  # Store the raw content
+            "resume_bytes": resume_content,
             "resume_size": len(resume_content),
-            "submitted_at": submission_time
-        }
-        
-        job_applications.append(application_data)
+            "submitted_at": submission_time,
+            "resume_text": resume_text,
+            "resume_skills": resume_skills
+        }])
+        await sync_applications()
         
         return JobApplicationResponse(
             message="Application submitted successfully",
@@ -183,63 +327,63 @@ async def text_to_speech(request: TextToSpeechRequest):
             }
         }
         
-        response = requests.post(url, headers=headers, json=data)
+        try:
+            response = await asyncio.to_thread(post_elevenlabs, url, headers, data)
+        except UpstreamError as e:
+            raise HTTPException(status_code=e.code, detail=str(e))
+        except DependencyUnavailable as e:
+            raise HTTPException(status_code=503, detail=f"Text-to-speech unavailable: {str(e)}")
         
-        if response.status_code == 200:
-            # Return audio as streaming response
-            audio_stream = io.BytesIO(response.content)
-            return StreamingResponse(
-                audio_stream,
-                media_type="audio/mpeg",
-                headers={
-                    "Content-Disposition": "attachment; filename=speech.mp3"
-                }
-            )
-        else:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"ElevenLabs API error: {response.text}"
-            )
+        # Return audio as streaming response
+        audio_stream = io.BytesIO(response.content)
+        return StreamingResponse(
+            audio_stream,
+            media_type="audio/mpeg",
+            headers={
+                "Content-Disposition": "attachment; filename=speech.mp3"
+            }
+        )
             
+    except HTTPException:
+        raise
     except requests.exceptions.RequestException as e:
         raise HTTPException(status_code=500, detail=f"Request failed: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/applications")
-async def get_applications():
+async def get_applications(if_none_match: Optional[str] = Header(None)):
     """
-    Get all job applications (Admin endpoint - add authentication in production)
+    Get all job applications (Admin endpoint - add authentication in production).
+    Answers 304 while the applications are unchanged since the ETag the client sent.
     """
-    return {
+    await sync_applications()
+    return conditional(if_none_match, entity_tag("applications", job_applications.revision), lambda: {
         "total": len(job_applications),
-        "applications": job_applications
-    }
+        "applications": job_applications.dicts()
+    })
 
 @app.get("/api/applications/{application_id}")
-async def get_application(application_id: str):
+async def get_application(application_id: str, if_none_match: Optional[str] = Header(None)):
     """
     Get specific application by ID
     """
-    application = next(
-        (app for app in job_applications if app["application_id"] == application_id),
-        None
-    )
+    await sync_applications()
+    application = job_applications.get(application_id)
     
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
     
-    return application
+    tag = entity_tag("application", application_id, job_applications.revision)
+    return conditional(if_none_match, tag, application.to_dict)
 
 @app.get("/api/applications/{application_id}/resume")
 async def download_resume(application_id: str):
     """
     Download the resume file for a specific application
     """
-    application = next(
-        (app for app in job_applications if app["application_id"] == application_id),
-        None
-    )
+    await sync_applications()
+    application = job_applications.get(application_id)
     
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
@@ -271,26 +415,66 @@ async def download_resume(application_id: str):
         }
     )
 
+@app.get("/api/applications/{application_id}/resume-context")
+async def get_resume_context(application_id: str):
+    """
+    Applicant fields with the resume text and skills extracted at submission,
+    so the quiz service can build a quiz without re-uploading or re-parsing the resume
+    """
+    await sync_applications()
+    application = job_applications.get(application_id)
+    
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+    
+    had_text = bool(application.get("resume_text"))
+    context = await asyncio.to_thread(resume_context, application)
+    if not had_text and context["resume_text"]:
+        # Remember what had to be extracted (records from before extraction at submit)
+        await asyncio.to_thread(application_log.record, UPDATE, {
+            "application_id": application_id,
+            "fields": {"resume_text": context["resume_text"], "resume_skills": context["resume_skills"]}
+        })
+        await sync_applications()
+    
+    return {
+        "application_id": application_id,
+        "full_name": application["full_name"],
+        "email": application["email"],
+        "position": application["position"],
+        "resume_filename": application.get("resume_filename"),
+        **context
+    }
+
 @app.get("/api/resumes")
 async def list_all_resumes():
     """
     List all resume files with download links
     """
+    await sync_applications()
     resumes = []
+    # One directory listing per resume directory instead of a stat per application
+    listings = {}
     
-    for app in job_applications:
-        resume_path = app.get("resume_path")
-        file_exists = resume_path and os.path.exists(resume_path)
+    for application_id, name, position, filename, size, submitted_at, resume_path in job_applications.scan(
+        "application_id", "full_name", "position", "resume_filename", "resume_size", "submitted_at", "resume_path"
+    ):
+        file_exists = False
+        if resume_path:
+            directory, _, basename = resume_path.rpartition("/")
+            if directory not in listings:
+                listings[directory] = set(os.listdir(directory)) if os.path.isdir(directory) else set()
+            file_exists = basename in listings[directory]
         
         resumes.append({
-            "application_id": app["application_id"],
-            "applicant_name": app["full_name"],
-            "position": app["position"],
-            "filename": app["resume_filename"],
-            "file_size": app["resume_size"],
+            "application_id": application_id,
+            "applicant_name": name,
+            "position": position,
+            "filename": filename,
+            "file_size": size,
             "file_exists": file_exists,
-            "download_url": f"/api/applications/{app['application_id']}/resume" if file_exists else None,
-            "submitted_at": app["submitted_at"]
+            "download_url": f"/api/applications/{application_id}/resume" if file_exists else None,
+            "submitted_at": submitted_at
         })
     
     return {
@@ -298,14 +482,99 @@ async def list_all_resumes():
         "resumes": resumes
     }
 
+@app.get("/api/search")
+async def search_applications(
+    q: Optional[str] = "",
+    position: Optional[str] = None,
+    skills: Optional[str] = None,
+    submitted_from: Optional[str] = None,
+    submitted_to: Optional[str] = None,
+    match: str = "all",
+    page: int = 1,
+    page_size: int = 20,
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Full-text search over name, email, position, cover letter, resume text and
+    skills, ranked by BM25. End a term with * for a prefix query ("kube*").
+    skills is a comma-separated list; every listed skill is required.
+    """
+    if match not in ("all", "any"):
+        raise HTTPException(status_code=400, detail="match must be 'all' or 'any'")
+    skill_filter = [skill for skill in (skills or "").split(",") if skill.strip()]
+    await sync_applications()
+    # The index is written together with the application table
+    tag = entity_tag("search", job_applications.revision, q, position, skill_filter, submitted_from, submitted_to,
+                     match, page, page_size)
+
+    def run_search():
+        with span("search"):
+            return search_index.search(
+                q, position=position, skills=skill_filter, submitted_from=submitted_from,
+                submitted_to=submitted_to, match=match, page=page, page_size=page_size
+            )
+    return conditional(if_none_match, tag, run_search)
+
+@app.post("/api/positions")
+async def register_position(position: PositionDescription):
+    """
+    Register (or replace) a position description used to rank candidates
+    """
+    await asyncio.to_thread(application_log.record, POSITION, {
+        **position.model_dump(), "registered_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+    })
+    await sync_applications()
+    return ranking_engine.descriptions[position.title.strip().lower()]
+
+@app.get("/api/positions")
+async def list_positions():
+    """
+    List registered position descriptions
+    """
+    await sync_applications()
+    return {
+        "total": len(ranking_engine.descriptions),
+        "positions": list(ranking_engine.descriptions.values())
+    }
+
+@app.get("/api/positions/{position}/ranking")
+async def rank_candidates(position: str, limit: int = 50, scope: str = "applicants", weights: Optional[str] = None):
+    """
+    Ranked shortlist for a position: resume/description TF-IDF similarity and
+    skill coverage, blended with interview and quiz scores where present.
+    scope=all ranks every candidate, not only those who applied for the position.
+    weights overrides the blend, e.g. "text=0.5,skills=0.5,interview=0,quiz=0".
+    """
+    if scope not in ("applicants", "all"):
+        raise HTTPException(status_code=400, detail="scope must be 'applicants' or 'all'")
+    try:
+        weight_overrides = parse_weights(weights) if weights else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="weights must look like text=0.4,skills=0.4")
+    await sync_applications()
+    with span("ranking"):
+        return ranking_engine.rank(position, limit=max(1, min(limit, 500)), scope=scope, weights=weight_overrides)
+
+@app.post("/api/applications/{application_id}/quiz-score")
+async def record_quiz_score(application_id: str, request: QuizScoreRequest):
+    """
+    Record an application's MCQ quiz score (sent by the quiz service) for ranking
+    """
+    await sync_applications()
+    if not job_applications.get(application_id):
+        raise HTTPException(status_code=404, detail="Application not found")
+    await asyncio.to_thread(application_log.record, UPDATE, {
+        "application_id": application_id, "fields": {"quiz_score": request.quiz_score}
+    })
+    await sync_applications()
+    return {"application_id": application_id, "quiz_score": request.quiz_score}
+
 @app.post("/api/interview/generate-questions")
 async def generate_interview_questions(request: GenerateQuestionsRequest):
     """
     Generate interview questions using Gemini API based on position and requirements
     """
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        
         # Build prompt for question generation
         categories_str = ", ".join(request.categories) if request.categories else "technical, behavioral, and situational"
         
@@ -332,28 +601,16 @@ Return the response in the following JSON format ONLY (no markdown, no extra tex
 }}
 """
         
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
-        
-        # Remove markdown code blocks if present
-        if response_text.startswith("```"):
-            response_text = response_text.split("```")[1]
-            if response_text.startswith("json"):
-                response_text = response_text[4:]
-            response_text = response_text.strip()
-        
-        questions_data = json.loads(response_text)
+        response_text = await llm_gateway.agenerate(prompt, task="interview_questions")
+        questions_data = parse_gemini_json(response_text)
         
-        # Create session ID
-        session_id = f"SESSION-{len(interview_sessions) + 1:05d}"
-        
-        # Store questions in session
-        interview_sessions[session_id] = {
+        # Store questions in a new session
+        session_id = await asyncio.to_thread(session_store.create, "SESSION", {
             "position": request.position,
             "difficulty": request.difficulty,
             "questions": questions_data["questions"],
             "created_at": datetime.now().isoformat()
-        }
+        })
         
         return {
             "session_id": session_id,
@@ -366,15 +623,183 @@ Return the response in the following JSON format ONLY (no markdown, no extra tex
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating questions: {str(e)}")
 
-@app.post("/api/interview/evaluate", response_model=EvaluationResponse)
-async def evaluate_interview_answers(submission: InterviewSubmission):
+def parse_gemini_json(response_text: str):
+    """Parse a JSON reply from Gemini, removing markdown code blocks if present"""
+    response_text = response_text.strip()
+    if response_text.startswith("```"):
+        response_text = response_text.split("```")[1]
+        if response_text.startswith("json"):
+            response_text = response_text[4:]
+        response_text = response_text.strip()
+    return json.loads(response_text)
+
+async def store_evaluation(application_id: str, evaluation_data: dict):
     """
-    Evaluate interview answers using Gemini API
-    Returns detailed evaluation with scores and feedback
+    Store evaluation results keyed by application ID, and the overall score for ranking
+    """
+    def record(session: dict):
+        session["evaluation"] = {
+            **evaluation_data,
+            "evaluated_at": datetime.now().isoformat()
+        }
+
+    await asyncio.to_thread(session_store.update, application_id, record, create=True)
+    await record_interview_score(application_id, evaluation_data.get("overall_score"))
+
+async def record_interview_score(application_id: Optional[str], score: Optional[float]):
+    """Rank an application by its interview score, on every worker"""
+    if application_id:
+        await asyncio.to_thread(application_log.record, INTERVIEW_SCORE, {"application_id": application_id, "score": score})
+        await sync_applications()
+
+def score_single_answer(position: str, answer: QuestionAnswer) -> dict:
+    """
+    Score one question/answer pair with a short Gemini prompt (blocking)
+    Never raises: a failed answer is returned with score None and an error
+    """
+    try:
+        prompt = f"""You are an expert technical interviewer evaluating a candidate for a {position} position.
+
+Question: {answer.question}
+Answer: {answer.answer}
+
+Score this single answer. Return JSON ONLY (no markdown, no extra text):
+{{"score": 0.0, "feedback": "Specific feedback for this answer"}}
+
+Scoring Guidelines:
+- score: 0-10 scale
+- Consider technical accuracy, communication skills, problem-solving approach
+- Provide specific, actionable feedback in one or two sentences
+"""
+        data = parse_gemini_json(llm_gateway.generate(prompt, task="answer_scoring"))
+        return {
+            "question_id": answer.question_id,
+            "score": max(0.0, min(10.0, float(data["score"]))),
+            "feedback": str(data.get("feedback", ""))
+        }
+    except Exception as e:
+        logger.warning(f"Scoring failed for Q{answer.question_id}: {e}")
+        return {
+            "question_id": answer.question_id,
+            "score": None,
+            "feedback": "This answer could not be scored automatically.",
+            "error": str(e)
+        }
+
+def aggregate_scored_answers(position: str, detailed_scores: List[Dict],
+                             final_answer: Optional[QuestionAnswer] = None) -> dict:
+    """
+    Produce the overall evaluation from per-question scores (blocking)
+    The aggregation prompt only sees scores and feedback, not the full answers;
+    an unscored final_answer is sent in full and scored by the same call
+    """
+    scored = [item for item in detailed_scores if item.get("score") is not None]
+    overall_score = round(sum(item["score"] for item in scored) / len(scored) * 10, 1) if scored else 0.0
+
+    feedback_text = "\n".join(
+        f"Q{item['question_id']} ({item['score']}/10): {item['feedback']}" for item in scored
+    )
+    final_text = final_json = ""
+    if final_answer:
+        final_text = f"""
+Final answer (not scored yet, 0-10 scale):
+Q{final_answer.question_id}: {final_answer.question}
+Answer: {final_answer.answer}
+"""
+        final_json = '\n    "final_answer": {"score": 0.0, "feedback": "Specific feedback for the final answer"},'
+    try:
+        if not scored and not final_answer:
+            raise ValueError("no answers could be scored")
+        prompt = f"""You are summarizing an interview for a {position} position.
+{"Score before the final answer" if final_answer else "Overall score"}: {overall_score}/100
+
+Per-question feedback:
+{feedback_text}
+{final_text}
+Return JSON ONLY (no markdown, no extra text):
+{{{final_json}
+    "strengths": ["List key strengths demonstrated"],
+    "areas_for_improvement": ["List areas that need improvement"],
+    "recommendation": "hire/maybe/reject with brief explanation",
+    "summary": "Brief overall assessment of the candidate"
+}}"""
+        summary_data = parse_gemini_json(llm_gateway.generate(prompt, task="evaluation_summary"))
+    except Exception as e:
+        logger.warning(f"Aggregation failed, using score-based summary: {e}")
+        summary_data = {}
+
+    if final_answer:
+        final = summary_data.get("final_answer") or {}
+        try:
+            score = max(0.0, min(10.0, float(final["score"])))
+            final_item = {"question_id": final_answer.question_id, "score": score, "feedback": str(final.get("feedback", ""))}
+            scored.append(final_item)
+        except (KeyError, TypeError, ValueError):
+            final_item = {
+                "question_id": final_answer.question_id,
+                "score": None,
+                "feedback": "This answer could not be scored automatically."
+            }
+        detailed_scores = [*detailed_scores, final_item]
+        overall_score = round(sum(item["score"] for item in scored) / len(scored) * 10, 1) if scored else 0.0
+
+    if "summary" not in summary_data:
+        recommendation = "hire" if overall_score >= 70 else "maybe" if overall_score >= 50 else "reject"
+        summary_data = {
+            "strengths": [],
+            "areas_for_improvement": [],
+            "recommendation": recommendation,
+            "summary": f"Scored {overall_score}/100 across {len(scored)} of {len(detailed_scores)} answers."
+        }
+
+    return {
+        "overall_score": overall_score,
+        "detailed_scores": detailed_scores,
+        "strengths": list(summary_data.get("strengths", [])),
+        "areas_for_improvement": list(summary_data.get("areas_for_improvement", [])),
+        "recommendation": str(summary_data.get("recommendation", "")),
+        "summary": str(summary_data.get("summary", ""))
+    }
+
+@traced("evaluation", mode="parallel")
+async def evaluate_answers_parallel(submission: InterviewSubmission, on_score=None) -> EvaluationResponse:
+    """
+    Score every answer concurrently, then run one short aggregation call.
+    on_score (optional coroutine function) is awaited with each score as it completes.
+    """
+    semaphore = asyncio.Semaphore(max(EVAL_QUESTION_CONCURRENCY, 1))
+
+    async def score(answer: QuestionAnswer) -> dict:
+        async with semaphore:
+            return await llm_gateway.run(score_single_answer, submission.position, answer)
+
+    detailed_scores = []
+    for next_done in asyncio.as_completed([score(answer) for answer in submission.answers]):
+        item = await next_done
+        detailed_scores.append(item)
+        if on_score:
+            await on_score(item)
+    detailed_scores.sort(key=lambda item: item["question_id"])
+
+    evaluation_data = await llm_gateway.run(aggregate_scored_answers, submission.position, detailed_scores)
+    await store_evaluation(submission.application_id, evaluation_data)
+    return EvaluationResponse(application_id=submission.application_id, **evaluation_data)
+
+async def evaluate_submission(submission: InterviewSubmission) -> EvaluationResponse:
+    """Evaluate a submission in the mode it asks for"""
+    if submission.evaluation_mode == "parallel":
+        return await evaluate_answers_parallel(submission)
+    evaluation = await llm_gateway.run(run_interview_evaluation, submission)
+    await store_evaluation(submission.application_id, evaluation.model_dump(exclude={"application_id"}))
+    return evaluation
+
+@traced("evaluation", mode="single")
+def run_interview_evaluation(submission: InterviewSubmission) -> EvaluationResponse:
+    """
+    Evaluate interview answers using Gemini API (blocking)
+    Shared by the single and batch evaluation endpoints; the caller stores the result
     """
     try:
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
         # Build evaluation prompt
         answers_text = "\n\n".join([
             f"Q{ans.question_id}: {ans.question}\nAnswer: {ans.answer}"
@@ -410,26 +835,8 @@ Scoring Guidelines:
 - Provide specific, actionable feedback
 """
         
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
-        
-        # Remove markdown code blocks if present
-        if response_text.startswith("```"):
-            response_text = response_text.split("```")[1]
-            if response_text.startswith("json"):
-                response_text = response_text[4:]
-            response_text = response_text.strip()
-        
-        evaluation_data = json.loads(response_text)
-        
-        # Store evaluation results
-        if submission.application_id not in interview_sessions:
-            interview_sessions[submission.application_id] = {}
-        
-        interview_sessions[submission.application_id]["evaluation"] = {
-            **evaluation_data,
-            "evaluated_at": datetime.now().isoformat()
-        }
+        response_text = llm_gateway.generate(prompt, task="evaluation")
+        evaluation_data = parse_gemini_json(response_text)
         
         return EvaluationResponse(
             application_id=submission.application_id,
@@ -438,74 +845,305 @@ Scoring Guidelines:
         
     except json.JSONDecodeError as e:
         raise HTTPException(status_code=500, detail=f"Failed to parse evaluation response: {str(e)}")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error evaluating answers: {str(e)}")
 
+@app.post("/api/interview/evaluate", response_model=EvaluationResponse)
+async def evaluate_interview_answers(submission: InterviewSubmission):
+    """
+    Evaluate interview answers using Gemini API
+    Returns detailed evaluation with scores and feedback
+    """
+    return await evaluate_submission(submission)
+
+@app.post("/api/interview/evaluate/stream")
+async def evaluate_interview_answers_stream(submission: InterviewSubmission):
+    """
+    Score each answer concurrently and stream detailed scores as NDJSON
+    as they complete, followed by the aggregated evaluation
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def push_score(item: dict):
+        await queue.put({"type": "score", **item})
+
+    async def run():
+        try:
+            evaluation = await evaluate_answers_parallel(submission, on_score=push_score)
+            await queue.put({"type": "evaluation", **evaluation.model_dump()})
+        except Exception as e:
+            await queue.put({"type": "error", "error": str(e)})
+        await queue.put(None)
+
+    async def stream_events():
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield json.dumps(event) + "\n"
+        finally:
+            task.cancel()
+
+    return StreamingResponse(stream_events(), media_type="application/x-ndjson")
+
+def submission_from_session(session_id: str, evaluation_mode: str = "single") -> InterviewSubmission:
+    """Build an InterviewSubmission from a stored live interview session (blocking)"""
+    found = session_store.get(session_id)
+    if not found:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+    session = found[0]
+
+    answers = []
+    question = None
+    for item in session.get('conversation', []):
+        if item.get('role') == 'interviewer':
+            question = item.get('question', '')
+        elif item.get('role') == 'candidate' and question is not None:
+            answers.append(QuestionAnswer(
+                question_id=len(answers) + 1,
+                question=question,
+                answer=item.get('answer', '')
+            ))
+            question = None
+
+    if not answers:
+        raise HTTPException(status_code=400, detail=f"Session {session_id} has no answers to evaluate")
+
+    return InterviewSubmission(
+        application_id=session.get('application_id', session_id),
+        position=session.get('position', ''),
+        answers=answers,
+        evaluation_mode=evaluation_mode
+    )
+
+@app.post("/api/interview/evaluate/batch")
+async def evaluate_interview_batch(request: BatchEvaluationRequest, format: str = "ndjson"):
+    """
+    Evaluate many submissions (or stored sessions) concurrently.
+    Streams one result per candidate as it finishes, then a summary line.
+    Failures are reported per item and never abort the batch.
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+
+    items = [(None, submission) for submission in (request.submissions or [])]
+    items += [(session_id, None) for session_id in (request.session_ids or [])]
+    if not items:
+        raise HTTPException(status_code=400, detail="Provide submissions or session_ids")
+    if len(items) > BATCH_EVAL_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch too large. Maximum is {BATCH_EVAL_MAX_ITEMS} items")
+
+    concurrency = min(request.concurrency or BATCH_EVAL_CONCURRENCY, BATCH_EVAL_CONCURRENCY_LIMIT)
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def evaluate_item(index: int, session_id: Optional[str], submission: Optional[InterviewSubmission]) -> dict:
+        result = {"index": index, "session_id": session_id,
+                  "application_id": submission.application_id if submission else None}
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if submission is None:
+                    submission = await asyncio.to_thread(submission_from_session, session_id, request.evaluation_mode)
+                    result["application_id"] = submission.application_id
+                evaluation = await evaluate_submission(submission)
+                result.update(status="ok", evaluation=evaluation.model_dump())
+            except HTTPException as e:
+                result.update(status="error", error=e.detail)
+            except Exception as e:
+                result.update(status="error", error=str(e))
+            result["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    def encode(payload: dict, event: str) -> str:
+        if format == "sse":
+            return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps(payload) + "\n"
+
+    async def stream_results():
+        batch_started = time.perf_counter()
+        tasks = [
+            asyncio.create_task(evaluate_item(index, session_id, submission))
+            for index, (session_id, submission) in enumerate(items)
+        ]
+        succeeded = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if result["status"] == "ok":
+                    succeeded += 1
+                yield encode(result, "result")
+            yield encode({
+                "type": "summary",
+                "total": len(items),
+                "succeeded": succeeded,
+                "failed": len(items) - succeeded,
+                "concurrency": concurrency,
+                "elapsed_seconds": round(time.perf_counter() - batch_started, 3)
+            }, "summary")
+        finally:
+            # Client went away: don't keep evaluating for nobody
+            for task in tasks:
+                task.cancel()
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream_results(), media_type=media_type)
+
 @app.get("/api/interview/session/{session_id}")
-async def get_interview_session(session_id: str):
+async def get_interview_session(session_id: str, if_none_match: Optional[str] = Header(None)):
     """
     Get interview session details including questions and evaluation if available
     """
-    if session_id not in interview_sessions:
+    found = await asyncio.to_thread(session_store.get, session_id)
+    if not found:
         raise HTTPException(status_code=404, detail="Interview session not found")
     
-    return interview_sessions[session_id]
+    data, version = found
+    return conditional(if_none_match, entity_tag("session", session_id, version), lambda: data)
 
 @app.get("/api/interview/sessions")
-async def get_all_sessions():
+async def get_all_sessions(include_archived: bool = False, if_none_match: Optional[str] = Header(None)):
     """
-    Get all interview sessions (Admin endpoint)
+    Get interview sessions (Admin endpoint). Finished and idle sessions are
+    archived; they are listed only with include_archived=true.
     """
-    return {
-        "total": len(interview_sessions),
-        "sessions": interview_sessions
-    }
+    def build():
+        # Stored JSON goes out as it is, without decoding and re-encoding each session
+        sessions = {session_id: fragment(encoded) for session_id, encoded in session_store.encoded(include_archived)}
+        stats = session_store.stats()
+        return {
+            "total": stats["live"] + stats["archived"],
+            "archived": stats["archived"],
+            "sessions": sessions
+        }
+    # The store is read in a worker thread, and only when the client's copy is stale
+    tag = entity_tag("sessions", include_archived, await asyncio.to_thread(session_store.revision))
+    payload = None if etag_matches(if_none_match, tag) else await asyncio.to_thread(build)
+    return conditional(if_none_match, tag, lambda: payload)
 
 @app.get("/api/admin/storage")
-async def get_all_storage():
-    """
-    Admin endpoint: Get complete view of all in-memory storage
-    """
-    # Remove resume_content (bytes) from applications before serializing
-    serializable_applications = []
-    for app in job_applications:
-        app_copy = app.copy()
-        # Remove the bytes content that can't be JSON serialized
-        if 'resume_content' in app_copy:
-            del app_copy['resume_content']
-        serializable_applications.append(app_copy)
-    
-    return {
-        "applications": {
-            "count": len(job_applications),
-            "data": serializable_applications
-        },
-        "interview_sessions": {
-            "count": len(interview_sessions),
-            "data": interview_sessions
-        },
-        "summary": {
-            "total_applications": len(job_applications),
-            "total_interview_sessions": len(interview_sessions),
-            "applications_with_evaluations": sum(
-                1 for session in interview_sessions.values() 
-                if isinstance(session, dict) and "evaluation" in session
-            )
+async def get_all_storage(if_none_match: Optional[str] = Header(None)):
+    """
+    Admin endpoint: Get complete view of all in-memory storage. The ETag comes
+    from store revisions, so an unchanged store is answered with 304 without
+    building the payload.
+    """
+    def read_sessions():
+        return ({session_id: fragment(encoded) for session_id, encoded in session_store.encoded(include_archived=True)},
+                session_store.stats())
+
+    await sync_applications()
+    tag = entity_tag("storage", job_applications.revision, await asyncio.to_thread(session_store.revision))
+    if etag_matches(if_none_match, tag):
+        return conditional(if_none_match, tag, dict)
+    sessions, stats = await asyncio.to_thread(read_sessions)
+
+    def build():
+        # Rows are built as JSON-ready dicts and sessions spliced in as stored, so the
+        # payload is serialized once by orjson with no jsonable_encoder copy
+        return {
+            "applications": {
+                "count": len(job_applications),
+                "data": job_applications.dicts()
+            },
+            "interview_sessions": {
+                "count": len(sessions),
+                "data": sessions
+            },
+            "summary": {
+                "total_applications": len(job_applications),
+                "total_interview_sessions": len(sessions),
+                # Evaluated sessions are always moved to the archive
+                "applications_with_evaluations": stats["archived_finished"]
+            }
         }
-    }
+    return conditional(if_none_match, tag, build)
+
+# What /api/admin/export can include, and how much NDJSON it sends at a time
+EXPORT_KINDS = ("applications", "sessions", "quiz_results")
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+def parse_since(since: Optional[str]) -> Optional[datetime]:
+    """An ISO timestamp as naive local time (how submitted_at is stored), or None"""
+    if not since:
+        return None
+    try:
+        moment = datetime.fromisoformat(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since must be an ISO 8601 timestamp")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment
+
+@app.get("/api/admin/export")
+async def export_storage(since: Optional[str] = None, include: str = ",".join(EXPORT_KINDS),
+                         accept_encoding: str = Header("")):
+    """
+    Admin endpoint: stream applications, interview sessions and quiz results as
+    NDJSON, read from the stores a batch at a time, so memory stays flat however
+    much there is. since limits the export to records submitted, saved or scored
+    from then on; the last line carries the time to pass as since next time.
+    """
+    cutoff = parse_since(since)
+    kinds = [kind.strip() for kind in include.split(",") if kind.strip()]
+    if set(kinds) - set(EXPORT_KINDS):
+        raise HTTPException(status_code=400, detail=f"include must be a subset of {', '.join(EXPORT_KINDS)}")
+    # Taken before reading, so records changed during the export are in the next one too
+    until = datetime.now().isoformat()
+    counts = dict.fromkeys(kinds, 0)
+    await sync_applications()
+
+    async def records():
+        if "applications" in counts:
+            for row in job_applications.rows_since(cutoff):
+                counts["applications"] += 1
+                yield {"type": "application", "data": job_applications.row_dict(row)}
+        if "quiz_results" in counts:
+            for application_id, quiz_score, recorded_at in job_applications.quiz_scores_since(cutoff):
+                counts["quiz_results"] += 1
+                yield {"type": "quiz_result", "data": {"application_id": application_id, "quiz_score": quiz_score,
+                                                       "recorded_at": recorded_at}}
+        if "sessions" in counts:
+            # Read from the store in a worker thread, a batch at a time
+            changed = session_store.changed(cutoff.timestamp() if cutoff else None)
+            while batch := await asyncio.to_thread(list, itertools.islice(changed, EXPORT_BATCH)):
+                for session_id, encoded in batch:
+                    counts["sessions"] += 1
+                    yield {"type": "session", "id": session_id, "data": fragment(encoded)}
+
+    async def chunks():
+        lines, size = [], 0
+        async for record in records():
+            line = dumps(record)
+            lines.append(line)
+            size += len(line) + 1
+            if size >= EXPORT_CHUNK_BYTES:
+                yield b"\n".join(lines) + b"\n"
+                lines, size = [], 0
+                await asyncio.sleep(0)  # let other requests in between chunks
+        lines.append(dumps({"type": "end", "counts": counts, "since": since, "until": until}))
+        yield b"\n".join(lines) + b"\n"
+
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None:
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+    return StreamingResponse(compress_stream(chunks(), encoding), media_type="application/x-ndjson",
+                             headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"})
 
 @app.delete("/api/admin/storage/reset")
 async def reset_storage():
     """
     Admin endpoint: Clear all in-memory storage (useful for testing)
     """
-    global job_applications, interview_sessions
-    
+    await sync_applications()
     old_app_count = len(job_applications)
-    old_session_count = len(interview_sessions)
     
-    job_applications.clear()
-    interview_sessions.clear()
+    await asyncio.to_thread(application_log.clear)
+    old_session_count = await asyncio.to_thread(session_store.clear)
+    await sync_applications()
     
     return {
         "message": "Storage reset successfully",
@@ -515,6 +1153,224 @@ async def reset_storage():
         }
     }
 
+@app.get("/api/admin/llm-gateway")
+async def get_llm_gateway_metrics():
+    """
+    Admin endpoint: Gemini gateway limits, queue wait vs provider time per task
+    """
+    return llm_gateway.metrics()
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics: per-stage and per-route latency histograms and error counters
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/admin/dependencies")
+async def get_dependency_health():
+    """
+    Admin endpoint: circuit state, live p95 and current deadline per external dependency
+    """
+    return {
+        "gemini": gemini_dependency.status(),
+        "elevenlabs": elevenlabs_dependency.status()
+    }
+
+# ==================== BULK IMPORT ====================
+
+def store_imported_applications(applications: List[dict]) -> List[str]:
+    """
+    Save resume files and record a batch of imported applications (blocking, so
+    run in a worker thread); workers pick them up on their next sync_applications
+    """
+    submission_time = datetime.now().isoformat()
+    # The resume is kept on disk only, like for submitted applications
+    return store_applications([{
+        "full_name": application["full_name"],
+        "email": application["email"],
+        "phone": application.get("phone") or "",
+        "position": application["position"],
+        "cover_letter": application.get("cover_letter"),
+        "resume_filename": application["resume_filename"],
+        "resume_bytes": application["resume_bytes"],
+        "resume_size": len(application["resume_bytes"]),
+        "resume_text": application.get("resume_text") or "",
+        "resume_skills": application.get("resume_skills") or [],
+        "submitted_at": submission_time,
+        "source": "bulk_import"
+    } for application in applications])
+
+
+BULK_IMPORT_JOB_ID_RE = re.compile(r"IMPORT-[0-9a-f]{16}")
+
+
+def bulk_import_state_path(job_id: str) -> str:
+    return os.path.join(BULK_IMPORT_DIR, f"{job_id}.json")
+
+
+def save_bulk_import_job(job: dict):
+    """
+    Persist a job next to its checkpoint (written to a temp file and renamed, so
+    a crash leaves the previous state), so it can be resumed after a restart
+    """
+    state = {key: job[key] for key in ("job_id", "source", "manifest", "checkpoint", "created_at")}
+    state["progress"] = job["progress"].to_dict()
+    path = bulk_import_state_path(job["job_id"])
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(path + ".part", path)
+
+
+def load_bulk_import_job(job_id: str) -> Optional[dict]:
+    """A job run by this process, or one persisted by an earlier one (None if unknown)"""
+    if job_id in bulk_import_jobs:
+        return bulk_import_jobs[job_id]
+    if not BULK_IMPORT_JOB_ID_RE.fullmatch(job_id):
+        return None
+    try:
+        with open(bulk_import_state_path(job_id), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Saved as running means the process running it stopped before it finished
+    if state["progress"]["status"] == "running":
+        state["progress"]["status"] = "interrupted"
+    return state
+
+
+def bulk_import_path(path: str, field: str) -> str:
+    """path resolved (symlinks included); it must exist under BULK_IMPORT_DIR"""
+    root = os.path.realpath(BULK_IMPORT_DIR)
+    resolved = os.path.realpath(path)
+    if os.path.commonpath([root, resolved]) != root or not os.path.exists(resolved):
+        raise HTTPException(status_code=400, detail=f"{field} must be an existing path under BULK_IMPORT_DIR")
+    return resolved
+
+
+async def run_bulk_import(job: dict):
+    loop = asyncio.get_running_loop()
+
+    def writer(applications: List[dict]) -> List[str]:
+        # Runs on the ingest thread; the batch is indexed on the event loop afterwards, without waiting for it
+        application_ids = store_imported_applications(applications)
+        asyncio.run_coroutine_threadsafe(sync_applications(), loop)
+        return application_ids
+
+    try:
+        with span("bulk_import"):
+            await asyncio.to_thread(
+                ingest, job["source"], job["manifest"], writer,
+                checkpoint_path=job["checkpoint"], progress=job["progress"]
+            )
+    except Exception as e:
+        logger.error(f"Bulk import {job['job_id']} failed: {e}")
+    finally:
+        save_bulk_import_job(job)
+
+
+async def save_upload(upload: UploadFile, path: str):
+    """Write an upload to disk in chunks instead of reading it into memory"""
+    with open(path, "wb") as f:
+        while True:
+            chunk = await upload.read(1024 * 1024)
+            if not chunk:
+                break
+            f.write(chunk)
+
+
+@app.post("/api/admin/bulk-import")
+async def start_bulk_import(
+    archive: Optional[UploadFile] = File(None),
+    manifest: Optional[UploadFile] = File(None),
+    source_path: Optional[str] = Form(None),
+    manifest_path: Optional[str] = Form(None),
+    resume_job_id: Optional[str] = Form(None)
+):
+    """
+    Admin endpoint: import a zip archive (uploaded, or a zip/directory already on
+    this server) of resumes with a CSV/JSON manifest. Runs in the background;
+    poll GET /api/admin/bulk-import/{job_id}. Server paths must be under
+    BULK_IMPORT_DIR. Pass resume_job_id to restart an interrupted job from its
+    checkpoint, also after a server restart.
+    """
+    if resume_job_id:
+        previous = load_bulk_import_job(resume_job_id)
+        if not previous:
+            raise HTTPException(status_code=404, detail="Bulk import job not found")
+        if isinstance(previous["progress"], IngestProgress) and previous["progress"].status == "running":
+            raise HTTPException(status_code=409, detail="Bulk import job is still running")
+        job = dict(previous, progress=IngestProgress())
+    else:
+        os.makedirs(BULK_IMPORT_DIR, exist_ok=True)
+        job_id = f"IMPORT-{secrets.token_hex(8)}"
+
+        if archive is not None:
+            source = os.path.join(BULK_IMPORT_DIR, f"{job_id}.zip")
+            await save_upload(archive, source)
+        elif source_path:
+            source = bulk_import_path(source_path, "source_path")
+        else:
+            raise HTTPException(status_code=400, detail="Provide an archive upload or a source_path")
+
+        if manifest is not None:
+            manifest_rows = parse_manifest(await manifest.read(), manifest.filename or "manifest.csv")
+        elif manifest_path:
+            with open(bulk_import_path(manifest_path, "manifest_path"), "rb") as f:
+                manifest_rows = parse_manifest(f.read(), manifest_path)
+        else:
+            raise HTTPException(status_code=400, detail="Provide a manifest upload or a manifest_path")
+        if not manifest_rows:
+            raise HTTPException(status_code=400, detail="Manifest has no rows with a resume_file")
+
+        job = {
+            "job_id": job_id,
+            "source": source,
+            "manifest": manifest_rows,
+            "checkpoint": os.path.join(BULK_IMPORT_DIR, f"{job_id}.checkpoint"),
+            "progress": IngestProgress(),
+            "created_at": datetime.now().isoformat()
+        }
+
+    save_bulk_import_job(job)
+    bulk_import_jobs[job["job_id"]] = job
+    asyncio.create_task(run_bulk_import(job))
+    return {
+        "job_id": job["job_id"],
+        "status_url": f"/api/admin/bulk-import/{job['job_id']}",
+        "manifest_rows": len(job["manifest"])
+    }
+
+
+@app.get("/api/admin/bulk-import/{job_id}")
+async def get_bulk_import(job_id: str):
+    """
+    Admin endpoint: progress of a bulk import job
+    """
+    job = load_bulk_import_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Bulk import job not found")
+    progress = job["progress"] if isinstance(job["progress"], dict) else job["progress"].to_dict()
+    return {"job_id": job_id, "created_at": job["created_at"], **progress}
+
+
+@app.post("/api/admin/applications/batch")
+async def import_application_batch(request: ApplicationBatchRequest):
+    """
+    Admin endpoint: store a batch of already-extracted applications (used by bulk_ingest.py)
+    """
+    try:
+        applications = []
+        for application in request.applications:
+            data = application.model_dump()
+            data["resume_bytes"] = base64.b64decode(data.pop("resume_base64"))
+            applications.append(data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid resume_base64: {str(e)}")
+    application_ids = await asyncio.to_thread(store_imported_applications, applications)
+    await sync_applications()
+    return {"application_ids": application_ids}
+
 # from fastapi import FastAPI, File, UploadFile, Form, HTTPException
 # from fastapi.responses import StreamingResponse, JSONResponse
 # from fastapi.middleware.cors import CORSMiddleware
@@ -567,121 +1423,70 @@ class ContinueInterviewRequest(BaseModel):
     session_id: str
     answer_text: str
     audio_blob_base64: Optional[str] = None
+    # Final turn only: queue the evaluation as a job and return its ID at once
+    evaluate_in_background: bool = False
 
-# In-memory storage
-job_applications = []
-interview_sessions = {}
+class EvaluationJobRequest(BaseModel):
+    submission: Optional[InterviewSubmission] = None
+    session_id: Optional[str] = None  # evaluate a stored session instead
+    evaluation_mode: Optional[str] = "single"  # for session_id
+    priority: str = "normal"  # high, normal or low
+    callback_url: Optional[str] = None  # POSTed the finished job; host must be in JOB_CALLBACK_ALLOWED_HOSTS
 
 # ==================== HELPER FUNCTIONS ====================
 
-def extract_resume_text(resume_path: str) -> str:
-    """Extract text from resume file (PDF, DOC, or DOCX)"""
-    try:
-        if not resume_path or not os.path.exists(resume_path):
-            print(f"Resume file not found: {resume_path}")
-            return ""
-        
-        file_extension = os.path.splitext(resume_path)[1].lower()
-        text = ""
-        
-        if file_extension == '.pdf':
-            # Extract text from PDF
-            try:
-                with open(resume_path, 'rb') as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
-                print(f"Extracted {len(text)} characters from PDF")
-            except Exception as e:
-                print(f"Error extracting text from PDF: {e}")
-                return ""
-        
-        elif file_extension == '.docx':
-            # Extract text from DOCX
-            try:
-                doc = Document(resume_path)
-                text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-                print(f"Extracted {len(text)} characters from DOCX")
-            except Exception as e:
-                print(f"Error extracting text from DOCX: {e}")
-                return ""
-        
-        elif file_extension == '.doc':
-            # Note: python-docx only works with .docx files
-            # For .doc files, we would need additional libraries like textract or antiword
-            print("Warning: .doc files are not fully supported. Please use .docx or .pdf format.")
-            # Try to read as .docx anyway (won't work, but provides clearer error)
-            try:
-                doc = Document(resume_path)
-                text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-                print(f"Extracted {len(text)} characters from DOC")
-            except Exception as e:
-                print(f"Error: Cannot extract text from .doc file. Please convert to .docx or .pdf format. Error: {e}")
-                return ""
-        
-        else:
-            print(f"Unsupported file extension: {file_extension}")
-            return ""
-        
-        # Clean up the extracted text
-        text = text.strip()
-        if not text:
-            print("Warning: No text extracted from resume")
-        
-        return text
-        
-    except Exception as e:
-        print(f"Error extracting resume text: {e}")
-        import traceback
-        traceback.print_exc()
-        return ""
-
 def analyze_audio_emotions(audio_base64: str) -> dict:
     """Analyze emotions from audio"""
+    # Loaded on first use: librosa and numpy dominate the app's import time
+    import librosa
+    import numpy as np
+
     try:
-        # Decode base64
-        audio_bytes = base64.b64decode(audio_base64)
+        with span("audio_decode"):
+            # Decode base64
+            audio_bytes = base64.b64decode(audio_base64)
         
-        # Save to temp file - use .webm extension for WebM audio, librosa will handle it
-        # If audio format detection fails, we'll try .wav as fallback
-        temp_path = None
-        try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.webm') as temp_file:
-                temp_file.write(audio_bytes)
-                temp_path = temp_file.name
+            # Save to temp file - use .webm extension for WebM audio, librosa will handle it
+            # If audio format detection fails, we'll try .wav as fallback
+            temp_path = None
+            try:
+                with tempfile.NamedTemporaryFile(delete=False, suffix='.webm') as temp_file:
+                    temp_file.write(audio_bytes)
+                    temp_path = temp_file.name
             
-            # Load with librosa (supports WebM if ffmpeg is available)
-            y, sr = librosa.load(temp_path, sr=None)
-        except Exception as e:
-            # If WebM fails, try saving as WAV and converting
-            print(f"WebM load failed, trying alternative: {e}")
-            if temp_path and os.path.exists(temp_path):
-                os.unlink(temp_path)
+                # Load with librosa (supports WebM if ffmpeg is available)
+                y, sr = librosa.load(temp_path, sr=None)
+            except Exception as e:
+                # If WebM fails, try saving as WAV and converting
+                logger.warning(f"WebM load failed, trying alternative: {e}")
+                if temp_path and os.path.exists(temp_path):
+                    os.unlink(temp_path)
             
-            # Try with .wav extension (librosa might still work)
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-                temp_file.write(audio_bytes)
-                temp_path = temp_file.name
+                # Try with .wav extension (librosa might still work)
+                with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
+                    temp_file.write(audio_bytes)
+                    temp_path = temp_file.name
             
-            y, sr = librosa.load(temp_path, sr=None)
+                y, sr = librosa.load(temp_path, sr=None)
         
-        # Extract features
-        rms = librosa.feature.rms(y=y)[0]
-        avg_energy = np.mean(rms)
+        with span("audio_features"):
+            # Extract features
+            rms = librosa.feature.rms(y=y)[0]
+            avg_energy = np.mean(rms)
         
-        pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-        pitch_values = []
-        for t in range(pitches.shape[1]):
-            index = magnitudes[:, t].argmax()
-            pitch = pitches[index, t]
-            if pitch > 0:
-                pitch_values.append(pitch)
+            pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
+            pitch_values = []
+            for t in range(pitches.shape[1]):
+                index = magnitudes[:, t].argmax()
+                pitch = pitches[index, t]
+                if pitch > 0:
+                    pitch_values.append(pitch)
         
-        avg_pitch = np.mean(pitch_values) if pitch_values else 0
-        pitch_variance = np.std(pitch_values) if pitch_values else 0
+            avg_pitch = np.mean(pitch_values) if pitch_values else 0
+            pitch_variance = np.std(pitch_values) if pitch_values else 0
         
-        zcr = librosa.feature.zero_crossing_rate(y)[0]
-        avg_zcr = np.mean(zcr)
+            zcr = librosa.feature.zero_crossing_rate(y)[0]
+            avg_zcr = np.mean(zcr)
         
         # Clean up
         os.unlink(temp_path)
@@ -708,20 +1513,19 @@ def analyze_audio_emotions(audio_base64: str) -> dict:
             "confidence_score": float(avg_energy * 100)
         }
     except Exception as e:
-        print(f"Audio analysis error: {e}")
+        logger.warning(f"Audio analysis error: {e}")
         return {
             "tone": "neutral",
             "energy": "medium",
             "confidence_score": 50.0
         }
 
-def generate_empathetic_response(audio_data: dict) -> str:
+async def generate_empathetic_response(audio_data: dict) -> str:
     """Generate empathetic response using Gemini"""
     try:
         tone = audio_data.get('tone', 'neutral')
         energy = audio_data.get('energy', 'medium')
         
-        model = genai.GenerativeModel("gemini-2.5-flash")
         prompt = f"""Generate a brief (1 sentence) empathetic response for an interviewer based on:
 - Tone: {tone}
 - Energy: {energy}
@@ -729,11 +1533,42 @@ def generate_empathetic_response(audio_data: dict) -> str:
 Be encouraging if nervous, engaging if confident, supportive if low energy.
 Return ONLY the empathetic sentence, nothing else."""
         
-        response = model.generate_content(prompt)
-        return response.text.strip()
-    except:
+        return (await llm_gateway.agenerate(prompt, task="empathy")).strip()
+    except Exception:
         return "Thank you for your response."
 
+async def empathetic_line(task: Optional[asyncio.Task]) -> str:
+    """
+    The empathetic line once the next question is ready. It was generated
+    alongside the question; if it is still running it gets EMPATHY_GRACE_SECONDS,
+    then the turn goes ahead without it.
+    """
+    if task is None:
+        return ""
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), EMPATHY_GRACE_SECONDS)
+    except asyncio.TimeoutError:
+        return ""
+
+def post_elevenlabs(url: str, headers: dict, data: dict):
+    """
+    POST to ElevenLabs with a p95-derived deadline, a hedged duplicate for slow
+    requests (TTS is idempotent) and a circuit breaker. Raises on non-200.
+    """
+    if TTS_BACKEND == "fake":
+        from fakes import fake_elevenlabs_post as http_post
+    else:
+        http_post = requests.post
+
+    def post(timeout: float):
+        response = http_post(url, headers=headers, json=data, timeout=timeout)
+        if response.status_code != 200:
+            raise UpstreamError(f"ElevenLabs API error: {response.text}", response.status_code)
+        return response
+
+    with span("elevenlabs_tts"):
+        return elevenlabs_dependency.call(post, hedge=True)
+
 def text_to_speech_bytes(text: str, audio_data: dict = None, config: dict = None) -> str:
     """Convert text to speech"""
     try:
@@ -792,21 +1627,15 @@ def text_to_speech_bytes(text: str, audio_data: dict = None, config: dict = None
                 }
             }
         
-        response = requests.post(url, headers=headers, json=data)
-        
-        if response.status_code == 200:
-            return base64.b64encode(response.content).decode('utf-8')
-        
-        return None
+        # Fails fast (no audio) while ElevenLabs is unhealthy
+        response = post_elevenlabs(url, headers, data)
+        return base64.b64encode(response.content).decode('utf-8')
     except Exception as e:
-        print(f"TTS error: {e}")
+        logger.warning(f"TTS error: {e}")
         return None
 
 # ==================== API ENDPOINTS ====================
 
-job_applications = []  # Example storage
-interview_sessions = {}  # Example session storage
-
 @app.get("/interview")
 async def root():
     return {
@@ -824,31 +1653,23 @@ async def start_live_interview(request: StartInterviewRequest):
     """Start interview based on resume"""
     try:
         # Step 1: Fetch application
-        app_data = next((a for a in job_applications if a["application_id"] == request.application_id), None)
+        await sync_applications()
+        app_data = job_applications.get(request.application_id)
         if not app_data:
             raise HTTPException(status_code=404, detail="Application not found")
 
-        # Step 2: Extract resume text from the saved resume file
-        resume_path = app_data.get('resume_path')
-        if not resume_path or not os.path.exists(resume_path):
-            raise HTTPException(status_code=400, detail="Resume file not found")
-            
-        resume_text = extract_resume_text(resume_path)
+        # Step 2: Resume text and skills extracted at submission (or from the saved file)
+        context = await asyncio.to_thread(resume_context, app_data)
+        resume_text = context["resume_text"]
         if not resume_text:
             raise HTTPException(status_code=400, detail="Could not extract resume text from file")
 
-        # Step 3: Generate first question via Gemini
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        prompt = f"""You are an expert interviewer. The first question should be about candidate's skills and experience be specific like university name,project name.
-        Keep it brief and make the question warm and welcoming. Make sure candiate feels comfortable.
+        # Step 3: Build the resume digest once; every turn reuses it
+        resume_digest = prompt_builder.digest_for(resume_text, context["resume_skills"])
 
-Skills/Experience:
-{resume_text}
-
-Return ONLY a SHORT one sentence question text."""
-        response = model.generate_content(prompt)
-        question_text = response.text.strip()
-        session_id = f"LIVE-{len(interview_sessions) + 1:05d}"
+        # Step 4: Generate first question via Gemini
+        prompt = prompt_builder.first_question_prompt(resume_digest)
+        question_text = (await llm_gateway.agenerate(prompt, task="live_question")).strip()
         
         config = {
             "stability": 0.35,
@@ -860,12 +1681,13 @@ Return ONLY a SHORT one sentence question text."""
         }
         audio_base64 = text_to_speech_bytes(question_text, config=config)
 
-        # Step 5: Create interview session
-       
-        interview_sessions[session_id] = {
+        # Step 5: Create interview session (any worker can continue it). The resume
+        # stays on the application; the session keeps only the digest.
+        session = {
             "application_id": request.application_id,
             "position": app_data['position'],
-            "resume_text": resume_text,
+            "resume_digest": resume_digest,
+            "history_lines": [],
             "conversation": [
                 {"role": "interviewer", "question": question_text, "emotion": "neutral"}
             ],
@@ -873,6 +1695,8 @@ Return ONLY a SHORT one sentence question text."""
             "max_questions": 4,
             "started_at": datetime.now().isoformat()
         }
+        prompt_builder.record_question(session, question_text)
+        session_id = await asyncio.to_thread(session_store.create, "LIVE", session)
 
         return {
             "session_id": session_id,
@@ -882,58 +1706,75 @@ Return ONLY a SHORT one sentence question text."""
             "total_questions": 4
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/interview/continue")
 async def continue_live_interview(request: ContinueInterviewRequest):
-    """Continue interview: analyze user audio, generate empathetic question, and return emotional TTS"""
+    """
+    Continue interview: analyze user audio, generate empathetic question, and return emotional TTS.
+    Independent steps overlap: the audio is analyzed while the answer is stored,
+    the empathetic line is generated alongside the next question, and the
+    session is saved while the combined text is spoken.
+    """
+    turn_saved = asyncio.get_running_loop().create_future()
     try:
-        session = interview_sessions.get(request.session_id)
-        if not session:
+        found = await asyncio.to_thread(session_store.get, request.session_id)
+        if not found:
             raise HTTPException(status_code=404, detail="Session not found")
-
-        # Step 1: Analyze candidate audio
-        audio_analysis = {}
-        empathetic_feedback = ""
+        session, version = found
+        turn = len(session['conversation'])
+        if session.get('evaluation_job') and not is_finished(session):
+            # The final answer is in and its evaluation is queued
+            return await queue_live_evaluation(request.session_id, session['evaluation_job'])
+
+        # Step 1: Analyze candidate audio (CPU-bound) in a worker thread
+        audio_task = None
         if request.audio_blob_base64:
-            audio_analysis = analyze_audio_emotions(request.audio_blob_base64)
-            # empathetic_feedback = generate_empathetic_response(audio_analysis)
+            audio_task = asyncio.create_task(asyncio.to_thread(analyze_audio_emotions, request.audio_blob_base64))
 
-        # Step 2: Store candidate answer
-        session['conversation'].append({
+        # Step 2: Store candidate answer; its audio analysis is filled in when ready
+        answer_entry = {
             "role": "candidate",
             "answer": request.answer_text,
-            "audio_analysis": audio_analysis,
+            "audio_analysis": {},
             "timestamp": datetime.now().isoformat()
-        })
-
-        # Step 3: Check if maximum questions reached
-        if session['question_count'] >= session['max_questions']:
-            return await evaluate_live_interview(request.session_id)
-
-        # Step 4: Generate next question using Gemini, incorporating candidate emotion
-        conversation_history = "\n".join([
-            f"Q: {item['question']}" if 'question' in item else
-            f"A: {item['answer']} [Tone: {item.get('audio_analysis', {}).get('tone', 'neutral')}]"
-            for item in session['conversation']
-        ])
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        print("Generating prompt through gemini start" )
-        prompt = f"""You are an empathetic interviewer.
-
-Resume: {session['resume_text'][:1000]}
-
-Conversation:
-{conversation_history}
+        }
+        session['conversation'].append(answer_entry)
+        is_last = session['question_count'] >= session['max_questions']
+        if not is_last:
+            # Score this answer while the next question is generated and spoken
+            start_answer_scoring(request.session_id, session, turn_saved)
 
-Candidate tone: {audio_analysis.get('tone', 'neutral')}
+        audio_analysis = answer_entry['audio_analysis'] = await audio_task if audio_task else {}
+        detected_tone = audio_analysis.get('tone', 'neutral')
+        prompt_builder.record_answer(session, request.answer_text, detected_tone)
 
-Generate next question. Be encouraging if nervous, probe deeper if confident.
-Return ONLY a SHORT one sentence question text."""
-        response = model.generate_content(prompt)
-        question_text = response.text.strip()
+        # Step 3: Check if maximum questions reached
+        if is_last:
+            if request.evaluate_in_background:
+                session['evaluation_job'] = new_job_id()
+                await asyncio.to_thread(save_live_session, request.session_id, session, version, turn)
+                return await queue_live_evaluation(request.session_id, session['evaluation_job'])
+            return await evaluate_live_interview(request.session_id, session, version, turn)
+
+        # Step 4: Generate next question using Gemini, incorporating candidate emotion, with
+        # the empathetic line for the detected tone alongside. The digest and history are
+        # maintained on the session, so the prompt stays within the token budget however
+        # long the interview runs.
+        prompt = prompt_builder.next_question_prompt(session, detected_tone)
+        empathy_task = None
+        if audio_analysis and EMPATHETIC_FEEDBACK:
+            empathy_task = asyncio.create_task(generate_empathetic_response(audio_analysis))
+        try:
+            question_text = (await llm_gateway.agenerate(prompt, task="live_question")).strip()
+            empathetic_feedback = await empathetic_line(empathy_task)
+        finally:
+            if empathy_task:
+                empathy_task.cancel()
         config = {
             "stability": 0.35,
             "similarity_boost": 0.9,
@@ -942,24 +1783,29 @@ Return ONLY a SHORT one sentence question text."""
             "speaking_rate": 0.98,
             "emotion": "reflective, thoughtful, hopeful"
         }
-        print("Generating prompt through gemini end")
 
         # Step 5: Combine empathetic feedback + question
         full_response = f"{empathetic_feedback} {question_text}" if empathetic_feedback else question_text
 
-        # Step 6: Convert to emotional speech using ElevenLabs with config
-        detected_tone = audio_analysis.get('tone', 'neutral')
-        audio_base64 = text_to_speech_bytes(full_response, config=config)
-
-        # Step 7: Update session
+        # Step 6: Update session
         session['conversation'].append({
             "role": "interviewer",
             "question": question_text,
             "empathetic_feedback": empathetic_feedback,
             "emotion": detected_tone
         })
+        prompt_builder.record_question(session, question_text)
         session['question_count'] += 1
 
+        # Step 7: Convert to emotional speech using ElevenLabs with config, once for the
+        # combined text, while the session is saved. The save fails if another request
+        # advanced this interview in the meantime.
+        audio_base64, _ = await asyncio.gather(
+            asyncio.to_thread(text_to_speech_bytes, full_response, config=config),
+            asyncio.to_thread(save_live_session, request.session_id, session, version, turn)
+        )
+        turn_saved.set_result(True)
+
         return {
             "question": question_text,
             "empathetic_feedback": empathetic_feedback,
@@ -970,14 +1816,78 @@ Return ONLY a SHORT one sentence question text."""
             "is_final": False
         }
 
+    except HTTPException:
+        raise
+    except SessionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # A failed turn drops its background score
+        if not turn_saved.done():
+            turn_saved.set_result(False)
+
+
+def live_answers(session: dict) -> List[QuestionAnswer]:
+    """Question/answer pairs of a live interview, numbered from 1"""
+    conversation = session['conversation']
+    return [
+        QuestionAnswer(question_id=i // 2 + 1, question=conversation[i - 1].get('question', ''), answer=item.get('answer', ''))
+        for i, item in enumerate(conversation[1:], 1) if item.get('role') == 'candidate'
+    ]
+
+def start_answer_scoring(session_id: str, session: dict, turn_saved: asyncio.Future):
+    """Score the latest answer in the background; the score is stored once the turn is saved"""
+    answer = live_answers(session)[-1]
 
+    async def score() -> Optional[dict]:
+        item = await llm_gateway.run(score_single_answer, session['position'], answer)
+        if not await turn_saved:
+            return None
 
-async def evaluate_live_interview(session_id: str):
-    """Evaluate completed interview using Gemini and aggregate audio analytics"""
+        def record(latest: dict):
+            latest.setdefault('answer_scores', {})[str(answer.question_id)] = item
+
+        try:
+            await asyncio.to_thread(session_store.update, session_id, record)
+        except Exception as e:
+            logger.warning(f"Could not store the score of {session_id} answer {answer.question_id}: {e}")
+        return item
+
+    def forget(done: asyncio.Task):
+        if pending_answer_scores.get(key) is done:
+            del pending_answer_scores[key]
+
+    key = (session_id, answer.question_id)
+    pending_answer_scores[key] = asyncio.create_task(score())
+    pending_answer_scores[key].add_done_callback(forget)
+
+def save_live_session(session_id: str, session: dict, version: int, turn: int) -> int:
+    """
+    Save a live-interview turn read at version, when the conversation had turn
+    entries (blocking). Background answer scores stored since then are merged
+    in; only another turn counts as a conflict.
+    """
+    for _ in range(SESSION_UPDATE_RETRIES):
+        try:
+            return session_store.save(session_id, session, version)
+        except SessionConflictError:
+            latest = session_store.get(session_id)
+            if latest is None or len(latest[0]['conversation']) != turn or is_finished(latest[0]):
+                raise
+            stored, version = latest
+            session['answer_scores'] = {**stored.get('answer_scores', {}), **session.get('answer_scores', {})}
+    raise SessionConflictError(f"Session {session_id} kept changing; giving up")
+
+
+@traced("evaluation", mode="live")
+async def evaluate_live_interview(session_id: str, session: dict, version: int, turn: int):
+    """
+    Evaluate a completed interview from the per-answer scores taken during it,
+    with one short summary call that also scores the last answer, and aggregate
+    audio analytics; saves the session (read at version) with its evaluation
+    """
     try:
-        session = interview_sessions[session_id]
 
         # Step 1: Aggregate tones and confidence
         all_tones = [
@@ -988,46 +1898,29 @@ async def evaluate_live_interview(session_id: str):
             item.get('audio_analysis', {}).get('confidence_score', 50)
             for item in session['conversation'] if item.get('role') == 'candidate'
         ]
-        avg_confidence = np.mean(confidence_scores) if confidence_scores else 50
-
-        # Step 2: Build conversation text for evaluation
-        conversation_text = "\n\n".join([
-            f"Q{i+1}: {session['conversation'][i*2].get('question', '')}\n"
-            f"A: {session['conversation'][i*2+1].get('answer', '')}\n"
-            f"[Tone: {session['conversation'][i*2+1].get('audio_analysis', {}).get('tone', 'N/A')}]"
-            for i in range(len(all_tones))
-        ])
-
-        # Step 3: Evaluate with Gemini
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        prompt = f"""Evaluate this interview:
-
-{conversation_text}
-
-Confidence: {avg_confidence:.1f}%
-Tone patterns: {', '.join(set(all_tones))}
-
-Return JSON only:
-{{
-    "overall_score": 0-100,
-    "technical_score": 0-100,
-    "confidence_score": 0-100,
-    "communication_score": 0-100,
-    "strengths": ["list"],
-    "areas_for_improvement": ["list"],
-    "recommendation": "hire/maybe/reject",
-    "summary": "brief assessment"
-}}"""
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
-
-        # Cleanup potential code blocks
-        if response_text.startswith("```"):
-            response_text = response_text.split("```")[1]
-            if response_text.startswith("json"):
-                response_text = response_text[4:]
-            response_text = response_text.strip()
-        evaluation = json.loads(response_text)
+        avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 50
+
+        # Step 2: Collect the answer scores. Earlier answers were scored in the background
+        # (still running ones are awaited, missing ones scored now); the last answer is
+        # scored by the summary call
+        *earlier, last = live_answers(session)
+        stored = session.get('answer_scores', {})
+
+        async def answer_score(answer: QuestionAnswer) -> dict:
+            item = stored.get(str(answer.question_id))
+            task = pending_answer_scores.get((session_id, answer.question_id))
+            if item is None and task is not None:
+                item = await task
+            if item is None:
+                item = await llm_gateway.run(score_single_answer, session['position'], answer)
+            return item
+
+        detailed_scores = list(await asyncio.gather(*[answer_score(answer) for answer in earlier]))
+
+        # Step 3: Aggregate with one short summary call
+        evaluation = await llm_gateway.run(aggregate_scored_answers, session['position'], detailed_scores, last)
+        session['answer_scores'] = {str(item['question_id']): item for item in evaluation['detailed_scores']}
+        evaluation['confidence_score'] = round(float(avg_confidence), 1)
 
         # Step 4: Add audio analytics
         evaluation['audio_analytics'] = {
@@ -1039,6 +1932,8 @@ Return JSON only:
         # Step 5: Store evaluation
         session['evaluation'] = evaluation
         session['evaluated_at'] = datetime.now().isoformat()
+        await asyncio.to_thread(save_live_session, session_id, session, version, turn)
+        await record_interview_score(session.get('application_id'), evaluation.get('overall_score'))
 
         return {
             "is_final": True,
@@ -1046,18 +1941,138 @@ Return JSON only:
             "evaluation": evaluation
         }
 
+    except SessionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/applications")
-async def get_applications():
-    return {"total": len(job_applications), "applications": job_applications}
+# ==================== EVALUATION JOBS ====================
+
+async def run_evaluation_job(payload: dict) -> dict:
+    if payload.get("session_id"):
+        submission = await asyncio.to_thread(submission_from_session, payload["session_id"],
+                                             payload.get("evaluation_mode") or "single")
+    else:
+        submission = InterviewSubmission(**payload["submission"])
+    return (await evaluate_submission(submission)).model_dump()
+
+async def run_live_evaluation_job(payload: dict) -> dict:
+    session_id = payload["session_id"]
+    found = await asyncio.to_thread(session_store.get, session_id)
+    if not found:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+    session, version = found
+    if is_finished(session):
+        # Evaluated by an earlier run that was interrupted before recording the job
+        return {"is_final": True, "session_id": session_id, "evaluation": session['evaluation']}
+    return await evaluate_live_interview(session_id, session, version, len(session['conversation']))
+
+# Persistent, shared by workers on the host; jobs interrupted by a restart resume
+job_queue = JobQueue()
+job_runner = JobRunner(job_queue, {"evaluation": run_evaluation_job, "live_evaluation": run_live_evaluation_job})
+
+@app.on_event("startup")
+async def start_job_runner():
+    job_runner.start()
+
+@app.on_event("startup")
+async def load_applications():
+    # Replays the shared log, so a restarted worker has every stored application
+    await sync_applications()
+
+@app.on_event("shutdown")
+async def stop_job_runner():
+    await job_runner.stop()
+
+def job_links(job: dict) -> dict:
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/api/jobs/{job['job_id']}",
+        "events_url": f"/api/jobs/{job['job_id']}/events"
+    }
 
+async def queue_live_evaluation(session_id: str, job_id: str) -> dict:
+    """Final-turn response for a live interview evaluated as a job (queued now unless it already is)"""
+    job = await asyncio.to_thread(job_queue.get, job_id) or await job_runner.submit(
+        "live_evaluation", {"session_id": session_id}, "high", job_id=job_id
+    )
+    return {"is_final": True, "session_id": session_id, **job_links(job)}
+
+@app.post("/api/jobs/evaluations", status_code=202)
+async def submit_evaluation_job(request: EvaluationJobRequest):
+    """
+    Queue an evaluation (a submission, or a stored session by ID) and return
+    its job ID at once. Poll GET /api/jobs/{job_id}, follow
+    /api/jobs/{job_id}/events, or pass callback_url to have the finished job
+    POSTed (only to hosts in JOB_CALLBACK_ALLOWED_HOSTS).
+    """
+    if (request.submission is None) == (request.session_id is None):
+        raise HTTPException(status_code=400, detail="Provide either submission or session_id")
+    if request.priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"priority must be one of {', '.join(PRIORITIES)}")
+    if request.callback_url and not callback_allowed(request.callback_url):
+        raise HTTPException(status_code=400, detail="callback_url must be http(s) on a host in JOB_CALLBACK_ALLOWED_HOSTS")
+    if request.session_id:
+        if not await asyncio.to_thread(session_store.get, request.session_id):
+            raise HTTPException(status_code=404, detail=f"Session {request.session_id} not found")
+        payload = {"session_id": request.session_id, "evaluation_mode": request.evaluation_mode}
+    else:
+        payload = {"submission": request.submission.model_dump()}
+    job = await job_runner.submit("evaluation", payload, request.priority, request.callback_url)
+    return job_links(job)
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of a job, with its result (or error) once finished"""
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Server-sent events for a job: a status event on each change, then a final
+    result (succeeded) or error (failed) event carrying the job. A comment line
+    every 15 seconds keeps proxies from timing the stream out.
+    """
+    if not await asyncio.to_thread(job_queue.get, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    def encode(payload: dict, event: str) -> str:
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    async def stream_events():
+        last_status = None
+        last_sent = time.monotonic()
+        while True:
+            job = await asyncio.to_thread(job_queue.get, job_id)
+            if job is None:
+                # Deleted from the queue while we were streaming
+                yield encode({"job_id": job_id, "status": "missing", "error": "Job not found"}, "error")
+                return
+            if job["status"] in FINAL_STATUSES:
+                yield encode(job, "result" if job["status"] == "succeeded" else "error")
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                last_sent = time.monotonic()
+                yield encode({"job_id": job_id, "status": last_status, "attempts": job["attempts"]}, "status")
+            elif time.monotonic() - last_sent >= 15:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            # Woken by jobs finishing on this worker; jobs run elsewhere are polled
+            await job_runner.wait(JOB_POLL_SECONDS * 2)
+
+    return StreamingResponse(stream_events(), media_type="text/event-stream")
+
+@app.get("/api/admin/jobs")
+async def get_job_runner_status():
+    """Admin endpoint: job counts by status and this worker's runner"""
+    return await asyncio.to_thread(job_runner.status)
 
-@app.get("/api/interview/sessions")
-async def get_all_sessions():
-    return {"total": len(interview_sessions), "sessions": interview_sessions}
 
 if __name__ == "__main__":
     import uvicorn
@@ -2,17 +2,20 @@ from fastapi import FastAPI, File, UploadFile, Form, HTTPException
 import fastapi
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
-from typing import List, Optional
-import PyPDF2
-import io
+from pydantic import BaseModel, Field, ValidationError
+from typing import Iterator, List, Optional
 import json
 import os
 from dotenv import load_dotenv
-import google.generativeai as genai
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-import httpx
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+import asyncio
+import itertools
+from llm_gateway import genai_client, llm_gateway
+from telemetry import logger, span, traced, render_prometheus, request_context_middleware
+from core import extract_skills_from_resume, resume_text_from_bytes
+from mcq_bank import QuestionBank, TopUpWorker, candidate_key
+from json_stream import ArrayItemStream
 
 # Load environment variables
 load_dotenv()
@@ -20,6 +23,9 @@ load_dotenv()
 # Initialize FastAPI app
 app = FastAPI(title="Resume MCQ Generator Service")
 
+# Request IDs and per-route latency metrics
+app.middleware("http")(request_context_middleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -32,22 +38,24 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PUBLIC_DIR = os.path.join(BASE_DIR, "public")
 
 
-# Configure Gemini API
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY environment variable is required")
+# Main application API, told about quiz scores so it can rank candidates
+MAIN_API_URL = os.getenv("MAIN_API_URL", "http://localhost:8000")
 
-genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+# Questions per quiz
+QUIZ_LENGTH = 5
 
 # Global storage for quiz results
 quiz_results = []
+# Fire-and-forget tasks, referenced until they finish
+background_tasks = set()
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     try:
-        # Test Gemini API connection
-        genai.list_models()
+        # Test Gemini API connection (skipped when running against the fake backend)
+        if os.getenv("LLM_BACKEND", "gemini") != "fake":
+            genai_client().list_models()
         return {
             "status": "healthy", 
             "service": "Resume MCQ Generator",
@@ -68,10 +76,14 @@ class MCQOption(BaseModel):
 class MCQuestion(BaseModel):
     question: str
     options: List[MCQOption] = Field(..., min_items=4, max_items=4)
+    skill: Optional[str] = None
     
 
 class MCQResponse(BaseModel):
-    questions: List[MCQuestion] = Field(..., min_items=5, max_items=5)
+    questions: List[MCQuestion] = Field(..., min_items=1, max_items=20)
+
+class TopUpRequest(BaseModel):
+    skills: List[str]
 
 class ApplicantInfo(BaseModel):
     name: str
@@ -98,97 +110,64 @@ class FinalResponse(BaseModel):
     resume_skills: List[str]
 
 
-def extract_text_from_pdf(pdf_file: bytes) -> str:
-    """Extract text content from PDF file"""
+@traced("resume_extraction")
+def extract_text_from_pdf(pdf_file: bytes, extension: str = ".pdf") -> str:
+    """Extract text content from an uploaded PDF (or DOCX) file"""
     try:
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_file))
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        return text
+        return resume_text_from_bytes(pdf_file, extension)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error reading PDF: {str(e)}")
-
-
-def extract_skills_from_resume(resume_text: str) -> List[str]:
-    """
-    Extract skills that are typically bolded or in skills section
-    This is a simplified version - you may want to enhance with NLP
-    """
-    # Common skill keywords to look for
-    skill_keywords = [
-        "python", "java", "javascript", "typescript", "react", "angular", "vue",
-        "docker", "kubernetes", "aws", "azure", "gcp", "terraform",
-        "machine learning", "deep learning", "nlp", "computer vision",
-        "sql", "nosql", "mongodb", "postgresql", "mysql", "redis",
-        "fastapi", "django", "flask", "spring boot", "node.js", "express",
-        "git", "ci/cd", "jenkins", "github actions", "agile", "scrum",
-        "microservices", "rest api", "graphql", "kafka", "rabbitmq"
-    ]
-    
-    resume_lower = resume_text.lower()
-    found_skills = []
-    
-    for skill in skill_keywords:
-        if skill in resume_lower:
-            found_skills.append(skill)
-    
-    return found_skills[:10]  # Return top 10 found skills
-
-
-def generate_mcqs_with_gemini(resume_text: str, skills: List[str]) -> MCQResponse:
-    """
-    Generate MCQs using Gemini with structured output (guided decoding)
-    """
-    # Define a flat JSON schema for the response to avoid $defs issues
-    QUIZ_RESPONSE_SCHEMA = {
-        "type": "object",
-        "properties": {
-            "questions": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "question": {"type": "string"},
-                        "options": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "option": {"type": "string"},
-                                    "is_correct": {"type": "boolean"}
-                                },
-                                "required": ["option", "is_correct"]
+        raise HTTPException(status_code=400, detail=f"Error reading resume: {str(e)}")
+
+
+# Define a flat JSON schema for the response to avoid $defs issues
+QUIZ_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "questions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "question": {"type": "string"},
+                    "skill": {"type": "string"},
+                    "options": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "option": {"type": "string"},
+                                "is_correct": {"type": "boolean"}
                             },
+                            "required": ["option", "is_correct"]
                         },
                     },
-                    "required": ["question", "options"]
                 },
-            }
-        },
-        "required": ["questions"]
-    }
-    
-    try:
-        # Initialize Gemini model with JSON schema for structured output
-        model = genai.GenerativeModel(
-            model_name="gemini-2.5-flash",
-            generation_config={
-                "temperature": 0.7,
-                "response_mime_type": "application/json",
-                "response_schema": QUIZ_RESPONSE_SCHEMA
-            }
-        )
-        
-        prompt = f"""
+                "required": ["question", "options"]
+            },
+        }
+    },
+    "required": ["questions"]
+}
+
+
+# Gemini generation config with JSON schema for structured output
+MCQ_GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "response_mime_type": "application/json",
+    "response_schema": QUIZ_RESPONSE_SCHEMA
+}
+
+
+def mcq_prompt(resume_text: str, skills: List[str], count: int) -> str:
+    return f"""
 You are an expert MCQ creator. Using the following resume text and list of technical skills,
-generate exactly 5 multiple-choice questions (MCQs) that assess the candidate's knowledge and understanding.
+generate exactly {count} multiple-choice questions (MCQs) that assess the candidate's knowledge and understanding.
 
 Each question should:
 - Be directly related to the candidate's skills.
 - Have exactly 4 options, with exactly one marked as correct (is_correct: true for the correct option, false for others).
 - Be moderately challenging, targeting practical knowledge.
-- Include a skill and difficulty level.
+- Set "skill" to the identified skill it tests.
 
 Return ONLY JSON matching the given response_schema.
 
@@ -199,38 +178,141 @@ Identified Skills:
 {', '.join(skills)}
 """
 
-        response = model.generate_content(prompt)
-        return MCQResponse.model_validate_json(response.text)
+
+def generate_mcqs_with_gemini(resume_text: str, skills: List[str], count: int = QUIZ_LENGTH) -> MCQResponse:
+    """
+    Generate MCQs using Gemini with structured output (guided decoding)
+    """
+    try:
+        response_text = llm_gateway.generate(
+            mcq_prompt(resume_text, skills, count),
+            task="mcq",
+            model_name="gemini-2.5-flash",
+            generation_config=MCQ_GENERATION_CONFIG
+        )
+        return MCQResponse.model_validate_json(response_text)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating MCQs: {str(e)}")
 
 
-@app.post("/generate-quiz")
-async def generate_quiz(
-    request: fastapi.Request,
-    name: str = Form(...),
-    email: str = Form(...),
-    position: str = Form(...),
-    resume: UploadFile = File(...)
-):
+def stream_mcqs_with_gemini(resume_text: str, skills: List[str], count: int = QUIZ_LENGTH) -> Iterator[MCQuestion]:
     """
-    Endpoint to receive applicant information and resume from client, 
-    extract text from PDF, and generate MCQ questions based on skills
+    Streaming variant of generate_mcqs_with_gemini: yields each question as soon
+    as Gemini has finished generating it and it validates (invalid ones are skipped)
     """
-    print("RECEIVED REQUEST")
-    
+    parser = ArrayItemStream("questions")
+    try:
+        for chunk in llm_gateway.stream(
+            mcq_prompt(resume_text, skills, count),
+            task="mcq",
+            model_name="gemini-2.5-flash",
+            generation_config=MCQ_GENERATION_CONFIG
+        ):
+            for item in parser.feed(chunk):
+                try:
+                    yield MCQuestion.model_validate(item)
+                except ValidationError as e:
+                    logger.warning(f"Skipping invalid streamed MCQ: {e.errors()[0]['msg']}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating MCQs: {str(e)}")
+
+
+def generate_skill_questions(skill: str, count: int, avoid: List[str]) -> List[dict]:
+    """Generate resume-independent MCQs for one skill, for the question bank"""
+    avoid_text = "\n".join(f"- {question}" for question in avoid) or "- (none yet)"
+    prompt = f"""
+You are an expert MCQ creator. For the technical skill below,
+generate exactly {count} multiple-choice questions (MCQs) that assess a candidate's practical knowledge of it.
+
+Each question should:
+- Stand on its own, without referring to any particular resume or candidate.
+- Have exactly 4 options, with exactly one marked as correct (is_correct: true for the correct option, false for others).
+- Be moderately challenging, targeting practical knowledge.
+- Set "skill" to the skill below.
+- Differ from the existing questions listed.
+
+Return ONLY JSON matching the given response_schema.
+
+Skill: {skill}
+
+Existing questions:
+{avoid_text}
+"""
+    response_text = llm_gateway.generate(
+        prompt,
+        task="mcq_topup",
+        model_name="gemini-2.5-flash",
+        generation_config={
+            "temperature": 0.9,
+            "response_mime_type": "application/json",
+            "response_schema": QUIZ_RESPONSE_SCHEMA
+        }
+    )
+    return [q.model_dump() for q in MCQResponse.model_validate_json(response_text).questions]
+
+
+# Persistent question bank, replenished in the background (see mcq_bank.py)
+question_bank = QuestionBank()
+question_topup = TopUpWorker(question_bank, generate_skill_questions)
+
+
+def gap_skills_for(questions: List[dict], skills: List[str]) -> List[str]:
+    """Skills the bank supplied no question for (all skills if it covered every one)"""
+    covered = {q["skill"] for q in questions}
+    return [skill for skill in skills if skill.lower() not in covered] or skills
+
+
+def assemble_quiz(resume_text: str, skills: List[str], email: str) -> List[dict]:
+    """
+    Build a quiz from the question bank, sampling across the candidate's skills;
+    Gemini generates only the questions the bank cannot supply. Those are written
+    from the candidate's resume, so they are served but never banked; the
+    background top-up fills the bank with resume-independent questions instead
+    """
+    candidate = candidate_key(email)
+    questions = question_bank.serve(skills, QUIZ_LENGTH, candidate)
+    missing = QUIZ_LENGTH - len(questions)
+    if missing:
+        gap_skills = gap_skills_for(questions, skills)
+        generated = generate_mcqs_with_gemini(resume_text, gap_skills, count=missing).questions[:missing]
+        questions += [q.model_dump() for q in generated]
+    question_topup.request(skills)
+    return questions
+
+
+def iter_quiz(resume_text: str, skills: List[str], email: str) -> Iterator[dict]:
+    """assemble_quiz, yielding bank questions at once and generated ones as they stream in"""
+    candidate = candidate_key(email)
+    questions = question_bank.serve(skills, QUIZ_LENGTH, candidate)
+    yield from questions
+    missing = QUIZ_LENGTH - len(questions)
+    if missing:
+        gap_skills = gap_skills_for(questions, skills)
+        generated = stream_mcqs_with_gemini(resume_text, gap_skills, count=missing)
+        try:
+            for question in itertools.islice(generated, missing):
+                yield question.model_dump()
+        finally:
+            generated.close()  # release the gateway slot if the stream is abandoned
+    question_topup.request(skills)
+
+
+async def read_resume_and_skills(resume: UploadFile):
+    """Validate the uploaded resume and return (resume_text, skills), raising 400s for unusable resumes"""
     # Validate file type
-    if not resume.filename.lower().endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="Only PDF files are supported")
+    extension = os.path.splitext(resume.filename.lower())[1]
+    if extension not in (".pdf", ".docx"):
+        raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
     
     # Validate file size (max 10MB)
-    resume_bytes = await resume.read()
+    with span("upload"):
+        resume_bytes = await resume.read()
     if len(resume_bytes) > 10 * 1024 * 1024:
         raise HTTPException(status_code=400, detail="Resume file too large. Maximum size is 10MB")
     
-    # Extract text from the uploaded PDF
-    resume_text = extract_text_from_pdf(resume_bytes)
+    # Extract text from the uploaded resume
+    resume_text = extract_text_from_pdf(resume_bytes, extension)
     
     if not resume_text.strip():
         raise HTTPException(status_code=400, detail="Could not extract text from resume")
@@ -240,23 +322,131 @@ async def generate_quiz(
     
     if not skills:
         raise HTTPException(status_code=400, detail="Could not identify any technical skills in resume")
+    return resume_text, skills
+
+
+async def fetch_resume_context(application_id: str) -> dict:
+    """Applicant fields, resume text and skills of a submitted application, from the main API"""
+    import httpx  # imported on first use to keep startup fast
+
+    try:
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.get(f"{MAIN_API_URL}/api/applications/{application_id}/resume-context")
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Could not reach the application API: {str(e)}")
+    if response.status_code == 404:
+        raise HTTPException(status_code=404, detail="Application not found")
+    if response.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"Application API returned {response.status_code}")
+    return response.json()
+
+
+async def resolve_quiz_input(name: Optional[str], email: Optional[str], position: Optional[str],
+                             resume: Optional[UploadFile], application_id: Optional[str]):
+    """
+    (applicant_info, resume_text, skills) for a quiz request: from a submitted
+    application when application_id is given, otherwise from the uploaded resume
+    """
+    if application_id:
+        context = await fetch_resume_context(application_id)
+        resume_text = context.get("resume_text") or ""
+        if not resume_text.strip():
+            raise HTTPException(status_code=400, detail="Could not extract text from resume")
+        skills = context.get("resume_skills") or []
+        if not skills:
+            raise HTTPException(status_code=400, detail="Could not identify any technical skills in resume")
+        applicant_info = {
+            "name": name or context["full_name"],
+            "email": email or context["email"],
+            "position": position or context["position"],
+            "application_id": application_id
+        }
+        return applicant_info, resume_text, skills
+
+    if resume is None or not (name and email and position):
+        raise HTTPException(status_code=400, detail="Provide application_id, or name, email, position and resume")
+    resume_text, skills = await read_resume_and_skills(resume)
+    return {"name": name, "email": email, "position": position}, resume_text, skills
+
+
+@app.post("/generate-quiz")
+async def generate_quiz(
+    request: fastapi.Request,
+    name: Optional[str] = Form(None),
+    email: Optional[str] = Form(None),
+    position: Optional[str] = Form(None),
+    resume: Optional[UploadFile] = File(None),
+    application_id: Optional[str] = Form(None)
+):
+    """
+    Endpoint to receive applicant information and resume from client, 
+    extract text from PDF, and generate MCQ questions based on skills.
+    With application_id, the resume text and skills extracted when the
+    application was submitted are reused instead (no upload needed).
+    """
+    logger.info("Received a quiz generation request")
+    
+    applicant_info, resume_text, skills = await resolve_quiz_input(name, email, position, resume, application_id)
     
-    # Generate MCQs using Gemini with structured output
-    mcq_response = generate_mcqs_with_gemini(resume_text, skills)
+    # Assemble MCQs from the question bank, generating only what it lacks
+    questions = await llm_gateway.run(assemble_quiz, resume_text, skills, applicant_info["email"])
     
     # Prepare response
     response = {
-        "applicant_info": {
-            "name": name,
-            "email": email,
-            "position": position
-        },
+        "applicant_info": applicant_info,
         "identified_skills": skills,
-        "questions": [q.model_dump() for q in mcq_response.questions]
+        "questions": questions
     }
     return JSONResponse(content=response)
 
 
+@app.post("/generate-quiz/stream")
+async def generate_quiz_stream(
+    request: fastapi.Request,
+    name: Optional[str] = Form(None),
+    email: Optional[str] = Form(None),
+    position: Optional[str] = Form(None),
+    resume: Optional[UploadFile] = File(None),
+    application_id: Optional[str] = Form(None)
+):
+    """
+    Streaming variant of /generate-quiz: a "start" event with applicant info and
+    skills, one "question" event per question as soon as it is available, then
+    "done" (or "error"). NDJSON by default; SSE if the client accepts text/event-stream.
+    """
+    applicant_info, resume_text, skills = await resolve_quiz_input(name, email, position, resume, application_id)
+    sse = "text/event-stream" in request.headers.get("accept", "")
+
+    def events():
+        yield {
+            "type": "start",
+            "applicant_info": applicant_info,
+            "identified_skills": skills,
+            "total_questions": QUIZ_LENGTH
+        }
+        count = 0
+        try:
+            for question in iter_quiz(resume_text, skills, applicant_info["email"]):
+                yield {"type": "question", "index": count, "question": question}
+                count += 1
+        except Exception as e:
+            yield {"type": "error", "detail": e.detail if isinstance(e, HTTPException) else str(e)}
+            return
+        yield {"type": "done", "total_questions": count}
+
+    def encoded():
+        # A sync generator: Starlette runs each step in its threadpool
+        for event in events():
+            data = json.dumps(event)
+            yield f"event: {event['type']}\ndata: {data}\n\n" if sse else data + "\n"
+
+    return StreamingResponse(
+        encoded(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/submit-quiz", response_model=FinalResponse)
 async def submit_quiz(submission: QuizSubmission):
     """
@@ -296,15 +486,61 @@ async def submit_quiz(submission: QuizSubmission):
         "submitted_at": "2025-11-08T16:39:47"  # Placeholder, use datetime
     })
     
+    if submission.applicant_info.application_id:
+        task = asyncio.create_task(report_quiz_score(submission.applicant_info.application_id, round(quiz_score, 2)))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+    
     return final_response
 
 
+async def report_quiz_score(application_id: str, quiz_score: float):
+    """Send a quiz score to the main API for candidate ranking; best effort"""
+    import httpx
+
+    try:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            response = await client.post(
+                f"{MAIN_API_URL}/api/applications/{application_id}/quiz-score",
+                json={"quiz_score": quiz_score}
+            )
+            response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.warning(f"Could not report quiz score for {application_id}: {e}")
+
+
 @app.get("/admin/quiz-results")
 async def get_quiz_results():
     """Get all quiz results for admin dashboard"""
     return {"quiz_results": quiz_results}
 
 
+@app.get("/admin/question-bank")
+async def get_question_bank():
+    """Question bank stock per skill and background top-up status"""
+    stats = await asyncio.to_thread(question_bank.stats)
+    return {**stats, "top_up": question_topup.status()}
+
+
+@app.post("/admin/question-bank/top-up")
+async def top_up_question_bank(request: TopUpRequest):
+    """Queue skills for background generation (e.g. to warm the bank before a hiring drive)"""
+    question_topup.request(request.skills)
+    return {"queued": [skill.strip().lower() for skill in request.skills], "top_up": question_topup.status()}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage and per-route latency histograms and error counters"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/admin/llm-gateway")
+async def get_llm_gateway_metrics():
+    """Gemini gateway limits, queue wait vs provider time per task"""
+    return llm_gateway.metrics()
+
+
 # Mount static files LAST so API routes take precedenc
 
 
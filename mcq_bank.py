@@ -0,0 +1,258 @@
+"""
+Persistent skill-keyed MCQ bank: quizzes are assembled from validated questions
+of past generations, a background worker tops up skills that run low, and
+reuse limits keep answers from spreading
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from telemetry import logger, span
+
+MCQ_BANK_PATH = os.getenv("MCQ_BANK_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "mcq_bank.sqlite3"))
+# A question is retired after being served this many times
+MCQ_BANK_MAX_SERVES = int(os.getenv("MCQ_BANK_MAX_SERVES", "50"))
+# Active questions the top-up worker keeps per requested skill
+MCQ_BANK_TARGET_PER_SKILL = int(os.getenv("MCQ_BANK_TARGET_PER_SKILL", "25"))
+MCQ_BANK_TOPUP_BATCH = int(os.getenv("MCQ_BANK_TOPUP_BATCH", "5"))
+# Pause after a failed top-up before trying that skill again
+MCQ_BANK_TOPUP_COOLDOWN_SECONDS = float(os.getenv("MCQ_BANK_TOPUP_COOLDOWN_SECONDS", "300"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    skill TEXT NOT NULL,
+    question TEXT NOT NULL,
+    options TEXT NOT NULL,
+    fingerprint TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    times_served INTEGER NOT NULL DEFAULT 0,
+    retired INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS questions_by_skill ON questions (skill, retired, times_served);
+CREATE TABLE IF NOT EXISTS served (
+    candidate TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    served_at REAL NOT NULL,
+    PRIMARY KEY (candidate, question_id)
+);
+"""
+
+
+def fingerprint(question: str) -> str:
+    """Identity of a question regardless of case, spacing and punctuation"""
+    normalized = re.sub(r"[^a-z0-9]+", " ", question.lower()).strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def candidate_key(email: str) -> str:
+    """Hashed candidate identity for the served-questions table (no raw emails on disk)"""
+    return hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()[:32]
+
+
+def validate_question(item: dict) -> Optional[dict]:
+    """A cleaned {"question", "options"} dict, or None if the question is unusable"""
+    question = (item.get("question") or "").strip()
+    options = item.get("options") or []
+    if not 10 <= len(question) <= 600 or len(options) != 4:
+        return None
+    cleaned = []
+    for option in options:
+        text = str(option.get("option", "")).strip()
+        if not text:
+            return None
+        cleaned.append({"option": text, "is_correct": bool(option.get("is_correct"))})
+    if sum(option["is_correct"] for option in cleaned) != 1:
+        return None
+    if len({option["option"].lower() for option in cleaned}) != 4:
+        return None
+    return {"question": question, "options": cleaned}
+
+
+class QuestionBank:
+    """SQLite-backed; safe to share between threads, and between worker processes via WAL"""
+
+    def __init__(self, path: str = MCQ_BANK_PATH, max_serves: int = MCQ_BANK_MAX_SERVES):
+        self.path = path
+        self.max_serves = max_serves
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def add(self, skill: str, questions: List[dict], source: str) -> List[int]:
+        """Validate and store questions for a skill; returns IDs of the ones that were new"""
+        skill = skill.strip().lower()
+        added = []
+        with self.lock:
+            for item in questions:
+                cleaned = validate_question(item)
+                if cleaned is None:
+                    continue
+                cursor = self.connection.execute(
+                    "INSERT OR IGNORE INTO questions (skill, question, options, fingerprint, source, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (skill, cleaned["question"], json.dumps(cleaned["options"]),
+                     fingerprint(cleaned["question"]), source, time.time())
+                )
+                if cursor.rowcount:
+                    added.append(cursor.lastrowid)
+        return added
+
+    def active_count(self, skill: str) -> int:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT COUNT(*) FROM questions WHERE skill = ? AND retired = 0", (skill.strip().lower(),)
+            ).fetchone()
+        return row[0]
+
+    def sample_questions(self, skill: str, limit: int = 20) -> List[str]:
+        """Existing question texts for a skill, so generators can avoid repeats"""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT question FROM questions WHERE skill = ? ORDER BY id DESC LIMIT ?",
+                (skill.strip().lower(), limit)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def serve(self, skills: List[str], count: int, candidate: str,
+              question_ids: Optional[List[int]] = None) -> List[dict]:
+        """
+        Take up to count questions for a candidate, round-robin across skills in
+        order, least-served first and never one this candidate has already seen.
+        question_ids serves those specific questions instead. Serving counts
+        towards each question's reuse limit; options are shuffled per serve.
+        """
+        now = time.time()
+        picked = []
+        with self.lock, span("mcq_bank_serve"):
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                if question_ids is not None:
+                    placeholders = ",".join("?" * len(question_ids))
+                    picked = self.connection.execute(
+                        f"SELECT id, skill, question, options FROM questions WHERE id IN ({placeholders})",
+                        question_ids
+                    ).fetchall()[:count]
+                else:
+                    pools = {}
+                    for skill in dict.fromkeys(s.strip().lower() for s in skills):
+                        pools[skill] = self.connection.execute(
+                            "SELECT id, skill, question, options FROM questions "
+                            "WHERE skill = ? AND retired = 0 AND id NOT IN "
+                            "(SELECT question_id FROM served WHERE candidate = ?) "
+                            "ORDER BY times_served, RANDOM() LIMIT ?",
+                            (skill, candidate, count)
+                        ).fetchall()
+                    while len(picked) < count and any(pools.values()):
+                        for skill in list(pools):
+                            if pools[skill] and len(picked) < count:
+                                picked.append(pools[skill].pop(0))
+
+                for question_id, _, _, _ in picked:
+                    self.connection.execute(
+                        "UPDATE questions SET times_served = times_served + 1, "
+                        "retired = CASE WHEN times_served + 1 >= ? THEN 1 ELSE retired END WHERE id = ?",
+                        (self.max_serves, question_id)
+                    )
+                    self.connection.execute(
+                        "INSERT OR IGNORE INTO served (candidate, question_id, served_at) VALUES (?, ?, ?)",
+                        (candidate, question_id, now)
+                    )
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+        served = []
+        for question_id, skill, question, options in picked:
+            options = json.loads(options)
+            random.shuffle(options)
+            served.append({"question": question, "options": options, "skill": skill, "bank_id": question_id})
+        return served
+
+    def stats(self) -> dict:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT skill, SUM(retired = 0), SUM(retired), SUM(times_served) FROM questions GROUP BY skill ORDER BY skill"
+            ).fetchall()
+        return {
+            "max_serves": self.max_serves,
+            "target_per_skill": MCQ_BANK_TARGET_PER_SKILL,
+            "skills": {skill: {"active": active, "retired": retired, "times_served": served}
+                       for skill, active, retired, served in rows}
+        }
+
+
+class TopUpWorker:
+    """
+    Background thread that generates questions for skills below the target.
+    generate(skill, count, avoid) returns candidate question dicts.
+    """
+
+    def __init__(self, bank: QuestionBank, generate: Callable[[str, int, List[str]], List[dict]],
+                 target: int = MCQ_BANK_TARGET_PER_SKILL, batch: int = MCQ_BANK_TOPUP_BATCH):
+        self.bank = bank
+        self.generate = generate
+        self.target = target
+        self.batch = batch
+        self.pending: List[str] = []
+        self.cooldown_until: Dict[str, float] = {}
+        self.generated = 0
+        self.failures = 0
+        self.condition = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+
+    def request(self, skills: List[str]):
+        """Queue skills for a top-up check; duplicates and cooling-down skills are ignored"""
+        now = time.time()
+        with self.condition:
+            for skill in skills:
+                skill = skill.strip().lower()
+                if skill not in self.pending and self.cooldown_until.get(skill, 0) <= now:
+                    self.pending.append(skill)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="mcq-bank-topup", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                skill = self.pending.pop(0)
+            try:
+                if self.bank.active_count(skill) >= self.target:
+                    continue
+                with span("mcq_bank_topup"):
+                    added = self.bank.add(skill, self.generate(skill, self.batch, self.bank.sample_questions(skill)), "topup")
+                self.generated += len(added)
+                if added:
+                    self.request([skill])  # keep going until the skill reaches the target
+                else:
+                    self._cool_down(skill)
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"MCQ bank top-up for '{skill}' failed: {e}")
+                self._cool_down(skill)
+
+    def _cool_down(self, skill: str):
+        with self.condition:
+            self.cooldown_until[skill] = time.time() + MCQ_BANK_TOPUP_COOLDOWN_SECONDS
+
+    def status(self) -> dict:
+        with self.condition:
+            return {
+                "pending_skills": list(self.pending),
+                "cooling_down": sorted(s for s, until in self.cooldown_until.items() if until > time.time()),
+                "generated": self.generated,
+                "failures": self.failures
+            }
@@ -0,0 +1,177 @@
+"""
+Token-budgeted prompt assembly for the live interview
+"""
+import os
+import re
+from typing import Dict, List, Optional
+
+# Total input budget per Gemini call (approximate tokens)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1200"))
+# Share of the budget reserved for the resume digest
+DIGEST_BUDGET_SHARE = float(os.getenv("PROMPT_DIGEST_SHARE", "0.4"))
+# Longest a single candidate answer may be inside the history
+ANSWER_MAX_TOKENS = int(os.getenv("PROMPT_ANSWER_MAX_TOKENS", "120"))
+
+# Rough heuristic for English text, good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+# Resume section headings we keep in the digest, in display order
+DIGEST_SECTIONS = {
+    "skills": ["skills", "technical skills", "technologies", "tools", "core competencies"],
+    "experience": ["experience", "work experience", "professional experience", "employment", "internships", "internship"],
+    "projects": ["projects", "academic projects", "personal projects", "key projects"],
+    "education": ["education", "academics", "academic background", "qualifications"],
+}
+
+# Lines kept per section before the budget is applied
+SECTION_LINE_LIMIT = 6
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the number of tokens in text"""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def clip_to_tokens(text: str, max_tokens: int) -> str:
+    """Clip text to roughly max_tokens, cutting on a word boundary"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    clipped = text[:max_chars].rsplit(" ", 1)[0]
+    return clipped.rstrip(" ,;:-") + "..."
+
+
+def _match_heading(line: str) -> Optional[str]:
+    """Return the digest section a heading line belongs to, if any"""
+    normalized = re.sub(r"[^a-z ]", "", line.lower()).strip()
+    if not normalized or len(normalized) > 40:
+        return None
+    for section, headings in DIGEST_SECTIONS.items():
+        if normalized in headings:
+            return section
+    return None
+
+
+def split_resume_sections(resume_text: str) -> Dict[str, List[str]]:
+    """Group resume lines under the digest sections they appear in"""
+    sections: Dict[str, List[str]] = {name: [] for name in DIGEST_SECTIONS}
+    current = None
+    for raw_line in resume_text.splitlines():
+        line = " ".join(raw_line.split())
+        if not line:
+            continue
+        heading = _match_heading(line)
+        if heading:
+            current = heading
+            continue
+        # A short all-caps line is most likely a heading we don't keep
+        if line.isupper() and len(line) < 40:
+            current = None
+            continue
+        if current and len(sections[current]) < SECTION_LINE_LIMIT:
+            sections[current].append(line.lstrip("•-*· "))
+    return sections
+
+
+def build_resume_digest(resume_text: str, skills: Optional[List[str]] = None,
+                        max_tokens: Optional[int] = None) -> str:
+    """
+    Build a compact digest of the resume (skills, experience, projects, education).
+    Computed once per session and reused on every turn.
+    """
+    if max_tokens is None:
+        max_tokens = int(PROMPT_TOKEN_BUDGET * DIGEST_BUDGET_SHARE)
+
+    sections = split_resume_sections(resume_text)
+    parts = []
+    if skills:
+        parts.append("Skills: " + ", ".join(skills))
+    elif sections["skills"]:
+        parts.append("Skills: " + "; ".join(sections["skills"]))
+
+    for name in ("experience", "projects", "education"):
+        if sections[name]:
+            parts.append(f"{name.capitalize()}: " + "; ".join(sections[name]))
+
+    if len(parts) <= 1:
+        # No recognizable headings, fall back to the top of the resume
+        head = " ".join(resume_text.split())
+        parts.append("Summary: " + head)
+
+    # Give each part an equal share of the digest budget
+    per_part = max(1, max_tokens // len(parts))
+    return "\n".join(clip_to_tokens(part, per_part) for part in parts)
+
+
+class InterviewPromptBuilder:
+    """Assembles interview prompts from a cached digest and an incremental history"""
+
+    def __init__(self, token_budget: int = PROMPT_TOKEN_BUDGET,
+                 digest_share: float = DIGEST_BUDGET_SHARE,
+                 answer_max_tokens: int = ANSWER_MAX_TOKENS):
+        self.token_budget = token_budget
+        self.digest_tokens = int(token_budget * digest_share)
+        self.answer_max_tokens = answer_max_tokens
+
+    def digest_for(self, resume_text: str, skills: Optional[List[str]] = None) -> str:
+        """Compute the resume digest within this builder's budget"""
+        return build_resume_digest(resume_text, skills, max_tokens=self.digest_tokens)
+
+    def record_question(self, session: dict, question: str):
+        """Append an interviewer question to the session's rendered history"""
+        session.setdefault("history_lines", []).append(f"Q: {question}")
+
+    def record_answer(self, session: dict, answer: str, tone: str = "neutral"):
+        """Append a candidate answer (clipped) to the session's rendered history"""
+        answer = clip_to_tokens(" ".join(answer.split()), self.answer_max_tokens)
+        session.setdefault("history_lines", []).append(f"A: {answer} [Tone: {tone}]")
+
+    def _fit_history(self, lines: List[str], max_tokens: int) -> str:
+        """Keep the most recent history lines that fit into max_tokens"""
+        kept = []
+        used = 0
+        for line in reversed(lines):
+            cost = estimate_tokens(line) + 1
+            if used + cost > max_tokens:
+                break
+            kept.append(line)
+            used += cost
+        kept.reverse()
+        omitted = len(lines) - len(kept)
+        if omitted:
+            kept.insert(0, f"({omitted} earlier lines omitted)")
+        return "\n".join(kept)
+
+    def first_question_prompt(self, digest: str) -> str:
+        """Prompt for the opening question"""
+        return f"""You are an expert interviewer. The first question should be about candidate's skills and experience be specific like university name,project name.
+Keep it brief and make the question warm and welcoming. Make sure candiate feels comfortable.
+
+Skills/Experience:
+{digest}
+
+Return ONLY a SHORT one sentence question text."""
+
+    def next_question_prompt(self, session: dict, tone: str = "neutral") -> str:
+        """Prompt for the next question, with the history fitted to the remaining budget"""
+        digest = session.get("resume_digest", "")
+        header = f"""You are an empathetic interviewer.
+
+Resume: {digest}
+
+Conversation:
+"""
+        footer = f"""
+
+Candidate tone: {tone}
+
+Generate next question. Be encouraging if nervous, probe deeper if confident.
+Return ONLY a SHORT one sentence question text."""
+        remaining = self.token_budget - estimate_tokens(header) - estimate_tokens(footer)
+        history = self._fit_history(session.get("history_lines", []), max(remaining, 0))
+        return header + history + footer
+
+
+prompt_builder = InterviewPromptBuilder()
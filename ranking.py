@@ -0,0 +1,292 @@
+"""
+Candidate-to-position ranking: sparse TF-IDF and skill vectors scored against a
+position description in one matrix product, blended with interview and quiz
+scores. Purely local; never calls an LLM.
+"""
+import math
+import os
+import time
+from array import array
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from search_index import search_terms
+from skill_matcher import get_skill_matcher
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def parse_weights(value: str) -> Dict[str, float]:
+    """'text=0.35,skills=0.35' -> {"text": 0.35, "skills": 0.35}"""
+    weights = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, weight = item.split("=", 1)
+            weights[name.strip()] = float(weight)
+    return weights
+
+
+SIGNALS = ("text", "skills", "interview", "quiz")
+# Blend of the ranking signals; a candidate missing a signal (no interview yet)
+# is ranked on the remaining ones, reweighted to sum to one
+RANKING_WEIGHTS = {"text": 0.35, "skills": 0.35, "interview": 0.2, "quiz": 0.1}
+RANKING_WEIGHTS.update(parse_weights(os.getenv("RANKING_WEIGHTS", "")))
+
+
+class RankingEngine:
+    """
+    Each application is turned into a sparse term-frequency row and a binary
+    skill row as it arrives, appended to growable CSR arrays. IDF weighting and
+    row normalization happen once per change in the corpus, when the next
+    ranking needs the matrix, so rankings between writes reuse it.
+    """
+
+    def __init__(self):
+        self.descriptions: Dict[str, dict] = {}
+        self.clear()
+
+    def clear(self):
+        """Drop every candidate; registered position descriptions are kept"""
+        self.terms: Dict[str, int] = {}
+        self.skills: Dict[str, int] = {}
+        self.document_frequency = array("i")
+        # CSR parts: row i spans indices[indptr[i]:indptr[i + 1]]
+        self.text_indptr = array("q", [0])
+        self.text_indices = array("i")
+        self.text_data = array("f")
+        self.skill_indptr = array("q", [0])
+        self.skill_indices = array("i")
+
+        self.application_ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.documents: List[Optional[dict]] = []
+        self.position_ids = array("i")
+        self.positions: Dict[str, int] = {}
+        self.alive = bytearray()
+        self.interview_scores = array("f")
+        self.quiz_scores = array("f")
+
+        self.version = 0
+        self._matrix_version = -1
+        self._text_matrix = None
+        self._skill_matrix = None
+        self._idf = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    # ==================== WRITES ====================
+
+    def add(self, application: dict):
+        """Vectorize an application and append it (replacing an earlier version)"""
+        application_id = application["application_id"]
+        previous = self.rows.get(application_id)
+        if previous is not None:
+            self.alive[previous] = 0
+            # The old row no longer counts towards the document frequency of its terms
+            for column in self.text_indices[self.text_indptr[previous]:self.text_indptr[previous + 1]]:
+                self.document_frequency[column] -= 1
+
+        text = " ".join(filter(None, [application.get("resume_text"), application.get("cover_letter")]))
+        counts: Dict[int, int] = {}
+        for term in search_terms(text):
+            column = self.terms.get(term)
+            if column is None:
+                column = self.terms[term] = len(self.terms)
+                self.document_frequency.append(0)
+            counts[column] = counts.get(column, 0) + 1
+        for column in sorted(counts):
+            self.text_indices.append(column)
+            self.text_data.append(1.0 + math.log(counts[column]))  # sublinear tf
+            self.document_frequency[column] += 1
+        self.text_indptr.append(len(self.text_indices))
+
+        skill_columns = sorted({self._skill_column(skill) for skill in application.get("resume_skills") or []})
+        self.skill_indices.extend(skill_columns)
+        self.skill_indptr.append(len(self.skill_indices))
+
+        position = (application.get("position") or "").strip().lower()
+        if position not in self.positions:
+            self.positions[position] = len(self.positions)
+
+        row = len(self.application_ids)
+        self.application_ids.append(application_id)
+        self.documents.append(application)
+        self.rows[application_id] = row
+        self.position_ids.append(self.positions[position])
+        self.alive.append(1)
+        carried = (self.interview_scores[previous], self.quiz_scores[previous]) if previous is not None else (math.nan, math.nan)
+        self.interview_scores.append(carried[0])
+        self.quiz_scores.append(carried[1])
+        self.version += 1
+
+    def _skill_column(self, skill: str) -> int:
+        skill = skill.strip().lower()
+        column = self.skills.get(skill)
+        if column is None:
+            column = self.skills[skill] = len(self.skills)
+        return column
+
+    def set_interview_score(self, application_id: str, score) -> bool:
+        """Record an interview score (0-100) for an application"""
+        row = self.rows.get(application_id)
+        if row is None or score is None:
+            return False
+        self.interview_scores[row] = float(score)
+        return True
+
+    def set_quiz_score(self, application_id: str, score) -> bool:
+        """Record a quiz score (0-100) for an application"""
+        row = self.rows.get(application_id)
+        if row is None or score is None:
+            return False
+        self.quiz_scores[row] = float(score)
+        return True
+
+    def register_position(self, title: str, description: str, required_skills: Optional[List[str]] = None,
+                          registered_at: Optional[str] = None) -> dict:
+        """Store a position description with its skills (taxonomy matches plus any listed)"""
+        found = [match.name for match in get_skill_matcher().match(f"{title}\n{description}")]
+        skills = list(dict.fromkeys([skill.strip().lower() for skill in required_skills or [] if skill.strip()] + found))
+        entry = {
+            "title": title,
+            "description": description,
+            "skills": skills,
+            "registered_at": registered_at or time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        self.descriptions[title.strip().lower()] = entry
+        return entry
+
+    # ==================== RANKING ====================
+
+    def _matrices(self):
+        """IDF-weighted, L2-normalized text matrix and binary skill matrix for the current corpus"""
+        if self._matrix_version == self.version:
+            return self._text_matrix, self._skill_matrix, self._idf
+
+        # numpy and scipy load on the first ranking, so importing the app stays fast
+        import numpy as np
+        from scipy import sparse
+
+        rows = len(self.application_ids)
+        df = np.array(self.document_frequency, dtype=np.float32)
+        # Replaced rows stay in the matrix but count neither here nor in df
+        idf = np.log((1.0 + len(self.rows)) / (1.0 + df)) + 1.0
+
+        indices = np.array(self.text_indices, dtype=np.int32)
+        data = np.array(self.text_data, dtype=np.float32) * idf[indices]
+        indptr = np.array(self.text_indptr, dtype=np.int64)
+        row_of_entry = np.repeat(np.arange(rows), np.diff(indptr))
+        norms = np.sqrt(np.bincount(row_of_entry, weights=data * data, minlength=rows)).astype(np.float32)
+        norms[norms == 0] = 1.0
+        data /= norms[row_of_entry]
+        text_matrix = sparse.csr_matrix((data, indices, indptr), shape=(rows, len(self.terms)))
+
+        skill_indices = np.array(self.skill_indices, dtype=np.int32)
+        skill_matrix = sparse.csr_matrix(
+            (np.ones(len(skill_indices), dtype=np.float32), skill_indices, np.array(self.skill_indptr, dtype=np.int64)),
+            shape=(rows, len(self.skills))
+        )
+
+        self._text_matrix, self._skill_matrix, self._idf = text_matrix, skill_matrix, idf
+        self._matrix_version = self.version
+        return text_matrix, skill_matrix, idf
+
+    def _position_vectors(self, text: str, skills: List[str], idf: "np.ndarray"):
+        import numpy as np
+
+        text_vector = np.zeros(len(self.terms), dtype=np.float32)
+        counts: Dict[int, int] = {}
+        for term in search_terms(text):
+            column = self.terms.get(term)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+        for column, count in counts.items():
+            text_vector[column] = (1.0 + math.log(count)) * idf[column]
+        norm = np.linalg.norm(text_vector)
+        if norm:
+            text_vector /= norm
+
+        skill_vector = np.zeros(len(self.skills), dtype=np.float32)
+        known = [self.skills[skill] for skill in skills if skill in self.skills]
+        skill_vector[known] = 1.0
+        return text_vector, skill_vector, len(skills)
+
+    def rank(self, position: str, limit: int = 50, scope: str = "applicants",
+             weights: Optional[Dict[str, float]] = None) -> dict:
+        """
+        Rank candidates for a position. scope="applicants" ranks those who applied
+        for it; "all" ranks every candidate in the store.
+        """
+        import numpy as np
+
+        started = time.perf_counter()
+        weights = {**RANKING_WEIGHTS, **(weights or {})}
+        entry = self.descriptions.get(position.strip().lower())
+        description_text = f"{entry['title']}\n{entry['description']}" if entry else position
+        position_skills = entry["skills"] if entry else [m.name for m in get_skill_matcher().match(position)]
+
+        rows = len(self.application_ids)
+        candidates = np.frombuffer(self.alive, dtype=np.uint8, count=rows).astype(bool)
+        if scope != "all":
+            position_id = self.positions.get(position.strip().lower(), -1)
+            candidates &= np.array(self.position_ids, dtype=np.int32) == position_id
+        candidate_rows = np.flatnonzero(candidates)
+
+        results = []
+        if len(candidate_rows):
+            text_matrix, skill_matrix, idf = self._matrices()
+            text_vector, skill_vector, skill_count = self._position_vectors(description_text, position_skills, idf)
+
+            signals = np.full((len(candidate_rows), len(SIGNALS)), np.nan, dtype=np.float32)
+            signals[:, 0] = text_matrix[candidate_rows] @ text_vector
+            if skill_count:
+                signals[:, 1] = (skill_matrix[candidate_rows] @ skill_vector) / skill_count
+            signals[:, 2] = np.array(self.interview_scores, dtype=np.float32)[candidate_rows] / 100.0
+            signals[:, 3] = np.array(self.quiz_scores, dtype=np.float32)[candidate_rows] / 100.0
+
+            weight_vector = np.array([weights.get(name, 0.0) for name in SIGNALS], dtype=np.float32)
+            available = ~np.isnan(signals)
+            effective = available * weight_vector
+            totals = effective.sum(axis=1)
+            totals[totals == 0] = 1.0
+            blended = np.nansum(signals * weight_vector, axis=1) / totals
+
+            limit = max(1, min(limit, len(candidate_rows)))
+            top = np.argpartition(-blended, limit - 1)[:limit]
+            top = top[np.argsort(-blended[top], kind="stable")]
+
+            wanted = set(position_skills)
+            for index in top:
+                row = candidate_rows[index]
+                application = self.documents[row]
+
+                def signal(column):
+                    value = signals[index, column]
+                    return None if np.isnan(value) else round(float(value), 4)
+
+                results.append({
+                    "application_id": self.application_ids[row],
+                    "full_name": application.get("full_name"),
+                    "position": application.get("position"),
+                    "score": round(float(blended[index]), 4),
+                    "text_similarity": signal(0),
+                    "skill_match": signal(1),
+                    "interview_score": None if signal(2) is None else round(signal(2) * 100, 1),
+                    "quiz_score": None if signal(3) is None else round(signal(3) * 100, 1),
+                    "matched_skills": [skill for skill in application.get("resume_skills") or [] if skill in wanted]
+                })
+
+        return {
+            "position": position,
+            "description_registered": entry is not None,
+            "position_skills": position_skills,
+            "scope": scope,
+            "candidates_considered": int(len(candidate_rows)),
+            "weights": weights,
+            "results": results,
+            "took_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+
+
+ranking_engine = RankingEngine()
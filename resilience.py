@@ -0,0 +1,306 @@
+"""
+Latency-aware deadlines, hedged requests and circuit breakers for external dependencies
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterator, Optional
+
+from telemetry import logger
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+HEDGE_WORKERS = int(os.getenv("HEDGE_WORKERS", "32"))
+
+# Calls run here so a deadline can be enforced and a hedge raced against them
+_executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="dependency")
+
+
+def _submit(fn, *args):
+    """Submit to the pool, carrying over context (request ID) to the worker thread"""
+    return _executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+class DependencyUnavailable(Exception):
+    """Base class for fail-fast dependency errors"""
+
+
+class CircuitOpenError(DependencyUnavailable):
+    """The circuit breaker is open; the dependency is considered unhealthy"""
+
+
+class DependencyTimeout(DependencyUnavailable):
+    """The call did not finish within its deadline"""
+
+
+class UpstreamError(Exception):
+    """Non-success HTTP status from an upstream API"""
+
+    def __init__(self, message: str, code: int):
+        super().__init__(message)
+        self.code = code
+
+
+def counts_as_failure(error: Exception) -> bool:
+    """Client errors (4xx other than 429) are our fault, not the dependency's"""
+    code = getattr(error, "code", None)
+    if not isinstance(code, int):
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(code, int) and 400 <= code < 500 and code != 429:
+        return False
+    return True
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies with a p95-derived deadline"""
+
+    def __init__(self, default_timeout: float, min_timeout: float, max_timeout: float,
+                 multiplier: float = 2.0, window: int = 200, min_samples: int = 20):
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self.lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def p95(self) -> Optional[float]:
+        return self.percentile(95)
+
+    def deadline(self) -> float:
+        """Per-call deadline: a multiple of the live p95, clamped to [min, max]"""
+        p95 = self.p95()
+        if p95 is None:
+            return self.default_timeout
+        return max(self.min_timeout, min(self.max_timeout, p95 * self.multiplier))
+
+    def hedge_delay(self) -> float:
+        """Start a hedged duplicate once a call runs past the p95"""
+        p95 = self.p95()
+        if p95 is None:
+            return self.default_timeout / 2
+        return max(p95, 0.05)
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, lets one trial call through after a cooldown"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_seconds: float = CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self.trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.trial_in_flight = False
+
+
+def call_with_deadline(fn: Callable[[float], object], deadline: float):
+    """Run fn(timeout) and give up after deadline seconds"""
+    future = _submit(fn, deadline)
+    done, _ = wait([future], timeout=deadline)
+    if not done:
+        future.cancel()
+        raise DependencyTimeout(f"call exceeded {deadline:.2f}s deadline")
+    return future.result()
+
+
+def hedged_call(fn: Callable[[float], object], hedge_after: float, deadline: float,
+                allow_hedge: Callable[[], bool] = lambda: True):
+    """
+    Run fn(timeout); if it is still running after hedge_after seconds, start a
+    duplicate and return whichever succeeds first. Only use for idempotent calls.
+    Returns (result, hedged).
+    """
+    ends_at = time.monotonic() + deadline
+    pending = {_submit(fn, deadline)}
+    hedged = False
+    hedge_decided = False  # asked once; a refused hedge is not asked for again
+    errors = []
+
+    while pending:
+        remaining = ends_at - time.monotonic()
+        if remaining <= 0:
+            break
+        wait_for = remaining
+        if not hedge_decided:
+            wait_for = min(remaining, max(hedge_after - (deadline - remaining), 0))
+        done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return future.result(), hedged
+            errors.append(future.exception())
+        retry_worthy = bool(errors) and counts_as_failure(errors[-1])
+        if not hedge_decided and time.monotonic() < ends_at and (pending or retry_worthy):
+            hedge_decided = True
+            if allow_hedge():
+                # Either the first attempt is slow or it failed quickly: race a duplicate
+                hedged = True
+                pending.add(_submit(fn, max(ends_at - time.monotonic(), 0.001)))
+
+    if errors and not pending:
+        raise errors[-1]
+    raise DependencyTimeout(f"call exceeded {deadline:.2f}s deadline")
+
+
+class Dependency:
+    """An external API guarded by a latency tracker and a circuit breaker"""
+
+    def __init__(self, name: str, default_timeout: float, min_timeout: float, max_timeout: float):
+        self.name = name
+        self.tracker = LatencyTracker(default_timeout, min_timeout, max_timeout)
+        self.breaker = CircuitBreaker()
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.rejected = 0
+
+    def call(self, fn: Callable[[float], object], hedge: bool = False,
+             allow_hedge: Callable[[], bool] = lambda: True):
+        """
+        Call fn(timeout) under the dependency's deadline, hedging if requested.
+        Raises CircuitOpenError immediately while the dependency is unhealthy.
+        """
+        if not self.breaker.allow():
+            with self.lock:
+                self.rejected += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        deadline = self.tracker.deadline()
+        started = time.perf_counter()
+        with self.lock:
+            self.calls += 1
+        try:
+            if hedge:
+                result, hedged = hedged_call(fn, self.tracker.hedge_delay(), deadline, allow_hedge)
+                if hedged:
+                    with self.lock:
+                        self.hedges += 1
+            else:
+                result = call_with_deadline(fn, deadline)
+        except Exception as e:
+            self._record_error(e)
+            raise
+
+        self.tracker.record(time.perf_counter() - started)
+        self.breaker.record_success()
+        return result
+
+    def stream(self, fn: Callable[[float], Iterator]) -> Iterator:
+        """
+        Iterate fn(timeout), a streaming call, under the circuit breaker. The
+        deadline is handed to the provider as its timeout; streams are never hedged.
+        """
+        if not self.breaker.allow():
+            with self.lock:
+                self.rejected += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        with self.lock:
+            self.calls += 1
+        try:
+            yield from fn(self.tracker.deadline())
+        except GeneratorExit:
+            # The consumer stopped early (it had what it needed); what arrived was fine,
+            # and a half-open trial must not stay in flight forever
+            self.breaker.record_success()
+            raise
+        except Exception as e:
+            self._record_error(e)
+            raise
+        self.breaker.record_success()
+
+    def _record_error(self, error: Exception):
+        if counts_as_failure(error):
+            with self.lock:
+                self.failures += 1
+                if isinstance(error, DependencyTimeout):
+                    self.timeouts += 1
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def status(self) -> dict:
+        p95 = self.tracker.p95()
+        with self.lock:
+            counters = {
+                "calls": self.calls,
+                "failures": self.failures,
+                "timeouts": self.timeouts,
+                "hedged_calls": self.hedges,
+                "rejected_by_circuit": self.rejected
+            }
+        return {
+            "name": self.name,
+            "circuit_state": self.breaker.state,
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+            "deadline_seconds": round(self.tracker.deadline(), 3),
+            **counters
+        }
+
+
+gemini_dependency = Dependency(
+    "gemini",
+    default_timeout=float(os.getenv("GEMINI_TIMEOUT_SECONDS", "30")),
+    min_timeout=float(os.getenv("GEMINI_MIN_TIMEOUT_SECONDS", "5")),
+    max_timeout=float(os.getenv("GEMINI_MAX_TIMEOUT_SECONDS", "60")),
+)
+
+elevenlabs_dependency = Dependency(
+    "elevenlabs",
+    default_timeout=float(os.getenv("ELEVENLABS_TIMEOUT_SECONDS", "15")),
+    min_timeout=float(os.getenv("ELEVENLABS_MIN_TIMEOUT_SECONDS", "3")),
+    max_timeout=float(os.getenv("ELEVENLABS_MAX_TIMEOUT_SECONDS", "30")),
+)
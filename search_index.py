@@ -0,0 +1,284 @@
+"""
+Incremental full-text index over applications: BM25 ranking, prefix queries,
+filters and pagination, updated on every write to the application store
+"""
+import bisect
+import math
+import time
+from array import array
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from skill_matcher import TOKEN_RE
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Integer weights so term frequencies stay small integers
+FIELD_WEIGHTS = {
+    "full_name": 3,
+    "email": 3,
+    "position": 2,
+    "resume_skills": 3,
+    "cover_letter": 1,
+    "resume_text": 1,
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have i in is it its of on or our that the this to was "
+    "were will with my me we you your".split()
+)
+
+# Longest prefix expansion considered, so "a*" cannot touch the whole vocabulary
+MAX_PREFIX_EXPANSION = 200
+
+
+def search_terms(text: str) -> List[str]:
+    """Lowercased index terms of text (same tokens as the skill matcher, minus separators)"""
+    if not text:
+        return []
+    return [token for token in (m.group(0).lower() for m in TOKEN_RE.finditer(text))
+            if token not in STOPWORDS and token not in ("/", "&", "-")]
+
+
+def _timestamp(value) -> float:
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return 0.0
+
+
+class ApplicationSearchIndex:
+    """
+    Postings are append-only arrays (document ids only ever grow), read at query
+    time as numpy views, so scoring a term is one vectorized pass over its
+    postings. Removal leaves a tombstone; re-adding an application indexes it
+    under a new document id. Not thread-safe: the app reads and writes it from
+    the event loop only (a numpy view would block a concurrent append).
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.postings: Dict[str, tuple] = {}  # term -> (array of doc ids, array of weighted tf)
+        self.skill_postings: Dict[str, array] = {}  # skill -> doc ids, for filters
+        self.doc_ids: Dict[str, int] = {}  # application_id -> live doc id
+        self.documents: List[Optional[dict]] = []  # doc id -> application record
+        self.lengths = array("f")
+        self.submitted = array("d")
+        self.position_ids = array("i")
+        self.positions: Dict[str, int] = {}
+        self.alive = bytearray()
+        self.live_count = 0
+        self.total_length = 0.0
+        self._sorted_terms: Optional[List[str]] = None
+
+    def __len__(self):
+        return self.live_count
+
+    # ==================== WRITES ====================
+
+    def add(self, application: dict):
+        """Index an application (replacing an earlier version with the same ID)"""
+        application_id = application["application_id"]
+        if application_id in self.doc_ids:
+            self.remove(application_id)
+
+        frequencies: Dict[str, int] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            value = application.get(field)
+            if not value:
+                continue
+            text = " ".join(value) if isinstance(value, (list, tuple)) else str(value)
+            for term in search_terms(text):
+                frequencies[term] = frequencies.get(term, 0) + weight
+        email = (application.get("email") or "").lower()
+        if email:
+            frequencies[email] = frequencies.get(email, 0) + FIELD_WEIGHTS["email"]
+
+        doc_id = len(self.documents)
+        for term, frequency in frequencies.items():
+            entry = self.postings.get(term)
+            if entry is None:
+                entry = self.postings[term] = (array("I"), array("H"))
+                # Kept sorted once a prefix query has built it (a memmove, not a re-sort)
+                if self._sorted_terms is not None:
+                    bisect.insort(self._sorted_terms, term)
+            entry[0].append(doc_id)
+            entry[1].append(min(frequency, 65535))
+        for skill in application.get("resume_skills") or []:
+            self.skill_postings.setdefault(skill.lower(), array("I")).append(doc_id)
+
+        position = (application.get("position") or "").strip().lower()
+        if position not in self.positions:
+            self.positions[position] = len(self.positions)
+
+        length = float(sum(frequencies.values()))
+        self.documents.append(application)
+        self.lengths.append(length)
+        self.submitted.append(_timestamp(application.get("submitted_at")))
+        self.position_ids.append(self.positions[position])
+        self.alive.append(1)
+        self.doc_ids[application_id] = doc_id
+        self.live_count += 1
+        self.total_length += length
+
+    def add_many(self, applications: Iterable[dict]):
+        for application in applications:
+            self.add(application)
+
+    def remove(self, application_id: str) -> bool:
+        doc_id = self.doc_ids.pop(application_id, None)
+        if doc_id is None:
+            return False
+        self.alive[doc_id] = 0
+        self.documents[doc_id] = None
+        self.live_count -= 1
+        self.total_length -= self.lengths[doc_id]
+        return True
+
+    # ==================== QUERIES ====================
+
+    def _expand(self, term: str) -> List[str]:
+        """Index terms for a query term; "kube*" expands to every term with that prefix"""
+        if not term.endswith("*"):
+            return [term] if term in self.postings else []
+        prefix = term.rstrip("*").lower()
+        if not prefix:
+            return []
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        expanded = []
+        for candidate in self._sorted_terms[start:start + MAX_PREFIX_EXPANSION]:
+            if not candidate.startswith(prefix):
+                break
+            expanded.append(candidate)
+        return expanded
+
+    def _parse(self, query: str) -> List[List[str]]:
+        """Each query term as the list of index terms it matches"""
+        groups = []
+        for raw in (query or "").split():
+            if raw.endswith("*"):
+                terms = search_terms(raw[:-1])
+                if terms:
+                    groups.append(self._expand(terms[-1] + "*"))
+                    groups.extend([term] for term in terms[:-1])
+            elif "@" in raw:
+                groups.append(self._expand(raw.lower()))
+            else:
+                groups.extend(self._expand(term) or [] for term in search_terms(raw))
+        return groups
+
+    def _filter_mask(self, count: int, position: Optional[str], skills: Optional[List[str]],
+                     submitted_from: Optional[str], submitted_to: Optional[str]) -> "np.ndarray":
+        import numpy as np
+
+        mask = np.frombuffer(self.alive, dtype=np.uint8, count=count).astype(bool)
+        if position:
+            position_id = self.positions.get(position.strip().lower(), -1)
+            mask &= np.frombuffer(self.position_ids, dtype=np.int32, count=count) == position_id
+        for skill in skills or []:
+            skill_mask = np.zeros(count, dtype=bool)
+            docs = self.skill_postings.get(skill.strip().lower())
+            if docs is not None:
+                skill_mask[np.frombuffer(docs, dtype=np.uint32)] = True
+            mask &= skill_mask
+        if submitted_from or submitted_to:
+            submitted = np.frombuffer(self.submitted, dtype=np.float64, count=count)
+            if submitted_from:
+                mask &= submitted >= _timestamp(submitted_from)
+            if submitted_to:
+                mask &= submitted <= _timestamp(submitted_to)
+        return mask
+
+    def search(self, query: str = "", position: Optional[str] = None, skills: Optional[List[str]] = None,
+               submitted_from: Optional[str] = None, submitted_to: Optional[str] = None,
+               match: str = "all", page: int = 1, page_size: int = 20) -> dict:
+        """
+        BM25-ranked applications matching query and filters. match="all" requires
+        every query term (or one of its prefix expansions); "any" requires one.
+        Without a query, filtered applications are returned newest first.
+        """
+        import numpy as np  # on first query, so importing the app stays fast
+
+        started = time.perf_counter()
+        count = len(self.documents)
+        page = max(1, page)
+        page_size = max(1, min(page_size, 100))
+        if not self.live_count:
+            return {"query": query, "total": 0, "page": page, "page_size": page_size, "results": [], "took_ms": 0.0}
+        mask = self._filter_mask(count, position, skills, submitted_from, submitted_to)
+
+        groups = self._parse(query)
+        if groups:
+            scores = np.zeros(count, dtype=np.float32)
+            required = np.zeros(count, dtype=np.int32)
+            lengths = np.frombuffer(self.lengths, dtype=np.float32, count=count)
+            average_length = self.total_length / self.live_count if self.live_count else 1.0
+            for terms in groups:
+                hit = np.zeros(count, dtype=bool)
+                for term in terms:
+                    doc_array, tf_array = self.postings[term]
+                    docs = np.frombuffer(doc_array, dtype=np.uint32)
+                    tf = np.frombuffer(tf_array, dtype=np.uint16).astype(np.float32)
+                    idf = math.log(1 + (self.live_count - len(docs) + 0.5) / (len(docs) + 0.5))
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[docs] / average_length)
+                    scores[docs] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    hit[docs] = True
+                required += hit
+            mask &= required >= (len(groups) if match == "all" else 1)
+            candidates = np.flatnonzero(mask)
+            order_keys = -scores[candidates]
+        else:
+            scores = None
+            candidates = np.flatnonzero(mask)
+            order_keys = -np.frombuffer(self.submitted, dtype=np.float64, count=count)[candidates]
+
+        total = len(candidates)
+        end = page * page_size
+        if end < total:
+            top = np.argpartition(order_keys, end - 1)[:end]
+            top = top[np.argsort(order_keys[top], kind="stable")]
+        else:
+            top = np.argsort(order_keys, kind="stable")
+        selected = candidates[top[(page - 1) * page_size:end]]
+
+        results = []
+        for doc_id in selected:
+            application = self.documents[doc_id]
+            results.append({
+                "application_id": application["application_id"],
+                "score": round(float(scores[doc_id]), 4) if scores is not None else None,
+                "full_name": application.get("full_name"),
+                "email": application.get("email"),
+                "position": application.get("position"),
+                "resume_skills": application.get("resume_skills", []),
+                "submitted_at": application.get("submitted_at")
+            })
+        return {
+            "query": query,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "results": results,
+            "took_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+
+    def stats(self) -> dict:
+        return {
+            "documents": self.live_count,
+            "terms": len(self.postings),
+            "postings": sum(len(docs) for docs, _ in self.postings.values()),
+            "positions": len(self.positions)
+        }
+
+
+search_index = ApplicationSearchIndex()
@@ -0,0 +1,564 @@
+"""
+Interview session storage shared by every API worker. Sessions are JSON
+documents with a version number; saves are optimistic, so a save based on a
+stale read fails instead of overwriting a concurrent turn. The in-process
+store suits a single worker; the SQLite store is shared by workers on one host.
+SQLite's locking needs a local disk: don't put the file on a network filesystem.
+
+Live sessions are bounded: finished (evaluated) sessions, sessions idle for
+SESSION_IDLE_TTL_SECONDS and the least recently used beyond
+SESSION_MAX_LIVE move to a compressed archive on disk, which reads fall back
+to. Saving an archived, unfinished session makes it live again. The in-process
+store archives to a temporary file of its own, deleted at exit, so like its
+live sessions (and application IDs, which start again at APP-00001) nothing
+outlives the process.
+"""
+import atexit
+import json
+import os
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from telemetry import span
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# memory (single worker) or sqlite (shared between workers)
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", os.path.join(HERE, "sessions.sqlite3"))
+# Used by the SQLite store; the in-process store archives to a temporary file
+SESSION_ARCHIVE_PATH = os.getenv("SESSION_ARCHIVE_PATH", os.path.join(HERE, "sessions_archive.sqlite3"))
+SESSION_IDLE_TTL_SECONDS = float(os.getenv("SESSION_IDLE_TTL_SECONDS", "3600"))
+SESSION_MAX_LIVE = int(os.getenv("SESSION_MAX_LIVE", "1000"))
+# How often idle sessions are looked for
+SESSION_SWEEP_SECONDS = 30.0
+# Attempts of a read-modify-write before giving up on a busy session
+SESSION_UPDATE_RETRIES = 5
+# Sessions read per query while streaming an export
+EXPORT_BATCH = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    data TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_update ON sessions (updated_at);
+"""
+
+ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archived_sessions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    data BLOB NOT NULL,
+    version INTEGER NOT NULL,
+    finished INTEGER NOT NULL,
+    archived_at REAL NOT NULL
+);
+"""
+
+
+class SessionConflictError(Exception):
+    """The session was saved by someone else since it was read"""
+
+
+def new_session_id(prefix: str) -> str:
+    """Globally unique session ID such as LIVE-3f9a0c41d27be815 (64 random bits)"""
+    return f"{prefix}-{secrets.token_hex(8)}"
+
+
+def is_finished(data: dict) -> bool:
+    return "evaluation" in data
+
+
+def remove_database(path: str):
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+class SessionArchive:
+    """
+    Finished and idle sessions as zlib-compressed JSON in SQLite; opened on first
+    use. Without a path, a temporary file private to this process is used.
+    """
+
+    def __init__(self, path: Optional[str] = SESSION_ARCHIVE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self.writes = 0
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            if self.path is None:
+                fd, self.path = tempfile.mkstemp(prefix="sessions_archive-", suffix=".sqlite3")
+                os.close(fd)
+                atexit.register(remove_database, self.path)
+            connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(ARCHIVE_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def get(self, session_id: str) -> Optional[Tuple[str, int]]:
+        """(encoded session, version) or None"""
+        with self.lock, span("session_archive"):
+            row = self.connection.execute(
+                "SELECT data, version FROM archived_sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return zlib.decompress(row[0]).decode("utf-8"), row[1]
+
+    def put(self, session_id: str, encoded: str, version: int, finished: bool):
+        blob = zlib.compress(encoded.encode("utf-8"))
+        with self.lock, span("session_archive"):
+            self.writes += 1
+            self.connection.execute(
+                "INSERT OR REPLACE INTO archived_sessions (id, data, version, finished, archived_at) VALUES (?, ?, ?, ?, ?)",
+                (session_id, blob, version, int(finished), time.time())
+            )
+
+    def replace(self, session_id: str, encoded: str, version: int, finished: bool) -> bool:
+        """Overwrite an archived session if it is still at version"""
+        blob = zlib.compress(encoded.encode("utf-8"))
+        with self.lock, span("session_archive"):
+            self.writes += 1
+            cursor = self.connection.execute(
+                "UPDATE archived_sessions SET data = ?, version = version + 1, finished = ?, archived_at = ? "
+                "WHERE id = ? AND version = ?",
+                (blob, int(finished), time.time(), session_id, version)
+            )
+        return cursor.rowcount == 1
+
+    def remove(self, session_id: str):
+        with self.lock:
+            self.writes += 1
+            self.connection.execute("DELETE FROM archived_sessions WHERE id = ?", (session_id,))
+
+    def items(self) -> List[Tuple[str, str]]:
+        """(session ID, encoded session), oldest archived first"""
+        with self.lock:
+            rows = self.connection.execute("SELECT id, data FROM archived_sessions ORDER BY seq").fetchall()
+        return [(session_id, zlib.decompress(blob).decode("utf-8")) for session_id, blob in rows]
+
+    def changed(self, since: float = 0.0) -> Iterator[Tuple[str, str]]:
+        """(session ID, encoded session) archived or updated at or after since, read a batch at a time"""
+        after = 0
+        while True:
+            with self.lock:
+                rows = self.connection.execute(
+                    "SELECT seq, id, data FROM archived_sessions WHERE seq > ? AND archived_at >= ? ORDER BY seq LIMIT ?",
+                    (after, since, EXPORT_BATCH)
+                ).fetchall()
+            for after, session_id, blob in rows:
+                yield session_id, zlib.decompress(blob).decode("utf-8")
+            if len(rows) < EXPORT_BATCH:
+                return
+
+    def counts(self) -> Tuple[int, int]:
+        """(archived sessions, of which finished)"""
+        with self.lock:
+            row = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(finished), 0) FROM archived_sessions").fetchone()
+        return row[0], row[1]
+
+    def clear(self) -> int:
+        with self.lock:
+            self.writes += 1
+            return self.connection.execute("DELETE FROM archived_sessions").rowcount
+
+    def revision(self) -> Tuple[int, int]:
+        """Changes by this process and SQLite's count of commits by other connections"""
+        with self.lock:
+            return self.writes, self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+
+class SessionStore(ABC):
+    """
+    Sessions as JSON documents with optimistic versioning. get returns a private
+    copy and its version; save(session_id, data, version) stores it only if the
+    version is unchanged and returns the new version. Backends provide the
+    primitives for live sessions (the abstract _methods); archiving is shared.
+    """
+
+    def __init__(self, archive: SessionArchive, idle_ttl: float = SESSION_IDLE_TTL_SECONDS,
+                 max_live: int = SESSION_MAX_LIVE):
+        self.archive = archive
+        self.idle_ttl = idle_ttl
+        self.max_live = max_live
+        self.next_sweep = 0.0
+
+    # ---- live-session primitives ----
+
+    @abstractmethod
+    def _load(self, session_id: str) -> Optional[Tuple[str, int]]:
+        ...
+
+    @abstractmethod
+    def _insert(self, session_id: str, encoded: str, version: int) -> bool:
+        ...
+
+    @abstractmethod
+    def _replace(self, session_id: str, encoded: str, version: int) -> bool:
+        """Compare-and-swap: store encoded as version + 1 if the session is at version"""
+
+    @abstractmethod
+    def _remove(self, session_id: str, version: int) -> bool:
+        ...
+
+    @abstractmethod
+    def _live(self) -> List[Tuple[str, str]]:
+        ...
+
+    @abstractmethod
+    def _changed(self, since: float) -> Iterator[Tuple[str, str]]:
+        """Live sessions saved at or after since, as (id, encoded), without loading them all at once"""
+
+    @abstractmethod
+    def _count(self) -> int:
+        ...
+
+    @abstractmethod
+    def _revision(self) -> tuple:
+        """Changes whenever a live session is written, removed or cleared"""
+
+    @abstractmethod
+    def _evictable(self, idle_before: float, over: int) -> List[Tuple[str, str, int]]:
+        """Sessions idle since idle_before plus the over least recently used, as (id, encoded, version)"""
+
+    @abstractmethod
+    def _clear(self) -> int:
+        ...
+
+    # ---- public interface ----
+
+    def get(self, session_id: str) -> Optional[Tuple[dict, int]]:
+        found = self._load(session_id) or self.archive.get(session_id)
+        if found is None:
+            return None
+        return json.loads(found[0]), found[1]
+
+    def insert(self, session_id: str, data: dict) -> bool:
+        """Store a new session; False if the ID is taken"""
+        if self.archive.get(session_id) is not None:
+            return False
+        encoded = json.dumps(data)
+        if not self._insert(session_id, encoded, 1):
+            return False
+        self._after_write(session_id, encoded, 1, data)
+        return True
+
+    def save(self, session_id: str, data: dict, version: int) -> int:
+        encoded = json.dumps(data)
+        if self._replace(session_id, encoded, version):
+            self._after_write(session_id, encoded, version + 1, data)
+            return version + 1
+        archived = self.archive.get(session_id)
+        if archived is not None and archived[1] == version:
+            if is_finished(data):
+                if self.archive.replace(session_id, encoded, version, True):
+                    return version + 1
+            elif self._insert(session_id, encoded, version + 1):
+                # Back in play (e.g. a candidate resuming after the idle TTL)
+                self.archive.remove(session_id)
+                self._after_write(session_id, encoded, version + 1, data)
+                return version + 1
+        raise SessionConflictError(f"Session {session_id} changed since it was read")
+
+    def create(self, prefix: str, data: dict) -> str:
+        """Store a new session under a fresh unique ID and return the ID"""
+        while True:
+            session_id = new_session_id(prefix)
+            if self.insert(session_id, data):
+                return session_id
+
+    def update(self, session_id: str, change: Callable[[dict], None], create: bool = False) -> dict:
+        """
+        Apply change to the session (re-reading and retrying on conflict) and
+        return the saved session. create=True starts from an empty session when
+        the ID is unknown.
+        """
+        for _ in range(SESSION_UPDATE_RETRIES):
+            found = self.get(session_id)
+            if found is None:
+                if not create:
+                    raise KeyError(session_id)
+                data = {}
+                change(data)
+                if self.insert(session_id, data):
+                    return data
+                continue
+            data, version = found
+            change(data)
+            try:
+                self.save(session_id, data, version)
+                return data
+            except SessionConflictError:
+                continue
+        raise SessionConflictError(f"Session {session_id} is being updated concurrently")
+
+    def all(self, include_archived: bool = False) -> Dict[str, dict]:
+        """Live sessions, least recently used first; archived ones (listed first) if asked"""
+        return {session_id: json.loads(encoded) for session_id, encoded in self.encoded(include_archived)}
+
+    def encoded(self, include_archived: bool = False) -> List[Tuple[str, str]]:
+        """The sessions of all() as (session ID, JSON text), without decoding them"""
+        items = self._live()
+        if include_archived:
+            items = self.archive.items() + items
+        return items
+
+    def changed(self, since: Optional[float] = None, include_archived: bool = True) -> Iterator[Tuple[str, str]]:
+        """
+        Stream (session ID, JSON text) of sessions saved at or after since (a
+        Unix time), or of every session: live ones first, then the archive. A
+        session archived or resumed while the stream is read may appear twice.
+        """
+        yield from self._changed(since or 0.0)
+        if include_archived:
+            yield from self.archive.changed(since or 0.0)
+
+    def count(self) -> int:
+        """Live sessions"""
+        return self._count()
+
+    def revision(self) -> tuple:
+        """
+        A cheap token that changes whenever any session, live or archived, is
+        saved or removed; used as the entity tag of session listings. Reads
+        (which only reorder least recently used sessions) leave it as it is.
+        """
+        return self._revision() + self.archive.revision()
+
+    def stats(self) -> dict:
+        archived, finished = self.archive.counts()
+        return {"live": self._count(), "archived": archived, "archived_finished": finished,
+                "idle_ttl_seconds": self.idle_ttl, "max_live": self.max_live}
+
+    def clear(self) -> int:
+        """Remove every session, live and archived; returns how many there were"""
+        return self._clear() + self.archive.clear()
+
+    # ---- archiving ----
+
+    def _after_write(self, session_id: str, encoded: str, version: int, data: dict):
+        if is_finished(data):
+            self._archive(session_id, encoded, version, True)
+        now = time.time()
+        over = self._count() - self.max_live
+        if over > 0 or now >= self.next_sweep:
+            self.next_sweep = now + SESSION_SWEEP_SECONDS
+            with span("session_sweep"):
+                for evicted_id, evicted, evicted_version in self._evictable(now - self.idle_ttl, max(over, 0)):
+                    self._archive(evicted_id, evicted, evicted_version, is_finished(json.loads(evicted)))
+
+    def _archive(self, session_id: str, encoded: str, version: int, finished: bool):
+        self.archive.put(session_id, encoded, version, finished)
+        if not self._remove(session_id, version):
+            # Saved again meanwhile: the live copy is newer
+            self.archive.remove(session_id)
+
+
+class SessionRecord:
+    """A live session held in process: the compressed document and its bookkeeping"""
+    __slots__ = ("blob", "version", "saved_at", "touched_at")
+
+    def __init__(self, encoded: str, version: int):
+        self.blob = zlib.compress(encoded.encode("utf-8"), 1)
+        self.version = version
+        self.saved_at = self.touched_at = time.time()
+
+    @property
+    def encoded(self) -> str:
+        return zlib.decompress(self.blob).decode("utf-8")
+
+
+class LocalSessionStore(SessionStore):
+    """
+    In-process store for a single worker; sessions are kept serialized, like the
+    shared stores. By default the archive is private to the process too.
+    """
+
+    def __init__(self, archive: Optional[SessionArchive] = None, **policy):
+        super().__init__(archive or SessionArchive(None), **policy)
+        self.lock = threading.Lock()
+        self.sessions: "OrderedDict[str, SessionRecord]" = OrderedDict()  # least recently used first
+        self.writes = 0
+
+    def _load(self, session_id: str) -> Optional[Tuple[str, int]]:
+        with self.lock:
+            record = self.sessions.get(session_id)
+            if record is None:
+                return None
+            record.touched_at = time.time()
+            self.sessions.move_to_end(session_id)
+        return record.encoded, record.version
+
+    def _insert(self, session_id: str, encoded: str, version: int) -> bool:
+        record = SessionRecord(encoded, version)
+        with self.lock:
+            if session_id in self.sessions:
+                return False
+            self.sessions[session_id] = record
+            self.writes += 1
+        return True
+
+    def _replace(self, session_id: str, encoded: str, version: int) -> bool:
+        record = SessionRecord(encoded, version + 1)
+        with self.lock:
+            current = self.sessions.get(session_id)
+            if current is None or current.version != version:
+                return False
+            self.sessions[session_id] = record
+            self.sessions.move_to_end(session_id)
+            self.writes += 1
+        return True
+
+    def _remove(self, session_id: str, version: int) -> bool:
+        with self.lock:
+            current = self.sessions.get(session_id)
+            if current is None or current.version != version:
+                return False
+            del self.sessions[session_id]
+            self.writes += 1
+        return True
+
+    def _live(self) -> List[Tuple[str, str]]:
+        with self.lock:
+            records = list(self.sessions.items())
+        return [(session_id, record.encoded) for session_id, record in records]
+
+    def _changed(self, since: float) -> Iterator[Tuple[str, str]]:
+        with self.lock:
+            records = [(session_id, record) for session_id, record in self.sessions.items() if record.saved_at >= since]
+        # Records stay compressed until their turn comes
+        return ((session_id, record.encoded) for session_id, record in records)
+
+    def _count(self) -> int:
+        return len(self.sessions)
+
+    def _revision(self) -> tuple:
+        return (self.writes,)
+
+    def _evictable(self, idle_before: float, over: int) -> List[Tuple[str, str, int]]:
+        evictable = []
+        with self.lock:
+            for index, (session_id, record) in enumerate(self.sessions.items()):
+                if index >= over and record.touched_at >= idle_before:
+                    break
+                evictable.append((session_id, record.encoded, record.version))
+        return evictable
+
+    def _clear(self) -> int:
+        with self.lock:
+            count = len(self.sessions)
+            self.sessions.clear()
+            self.writes += 1
+        return count
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite-backed in WAL mode; every worker opening the same path sees the same sessions"""
+
+    def __init__(self, path: str = SESSION_STORE_PATH, archive: Optional[SessionArchive] = None, **policy):
+        super().__init__(archive or SessionArchive(), **policy)
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.writes = 0
+
+    def _load(self, session_id: str) -> Optional[Tuple[str, int]]:
+        with self.lock, span("session_store"):
+            return self.connection.execute(
+                "SELECT data, version FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+
+    def _insert(self, session_id: str, encoded: str, version: int) -> bool:
+        with self.lock, span("session_store"):
+            self.writes += 1
+            cursor = self.connection.execute(
+                "INSERT OR IGNORE INTO sessions (id, data, version, updated_at) VALUES (?, ?, ?, ?)",
+                (session_id, encoded, version, time.time())
+            )
+        return cursor.rowcount == 1
+
+    def _replace(self, session_id: str, encoded: str, version: int) -> bool:
+        with self.lock, span("session_store"):
+            self.writes += 1
+            cursor = self.connection.execute(
+                "UPDATE sessions SET data = ?, version = version + 1, updated_at = ? WHERE id = ? AND version = ?",
+                (encoded, time.time(), session_id, version)
+            )
+        return cursor.rowcount == 1
+
+    def _remove(self, session_id: str, version: int) -> bool:
+        with self.lock:
+            self.writes += 1
+            cursor = self.connection.execute(
+                "DELETE FROM sessions WHERE id = ? AND version = ?", (session_id, version)
+            )
+        return cursor.rowcount == 1
+
+    def _live(self) -> List[Tuple[str, str]]:
+        with self.lock:
+            return self.connection.execute("SELECT id, data FROM sessions ORDER BY updated_at").fetchall()
+
+    def _changed(self, since: float) -> Iterator[Tuple[str, str]]:
+        after = 0
+        while True:
+            with self.lock:
+                rows = self.connection.execute(
+                    "SELECT seq, id, data FROM sessions WHERE seq > ? AND updated_at >= ? ORDER BY seq LIMIT ?",
+                    (after, since, EXPORT_BATCH)
+                ).fetchall()
+            for after, session_id, data in rows:
+                yield session_id, data
+            if len(rows) < EXPORT_BATCH:
+                return
+
+    def _count(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def _revision(self) -> tuple:
+        # data_version moves when another worker commits; this connection's writes are counted
+        with self.lock:
+            return self.writes, self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def _evictable(self, idle_before: float, over: int) -> List[Tuple[str, str, int]]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT id, data, version FROM sessions WHERE updated_at < ? "
+                "UNION SELECT * FROM (SELECT id, data, version FROM sessions ORDER BY updated_at LIMIT ?)",
+                (idle_before, over)
+            ).fetchall()
+        return rows
+
+    def _clear(self) -> int:
+        with self.lock:
+            self.writes += 1
+            return self.connection.execute("DELETE FROM sessions").rowcount
+
+
+def create_session_store(kind: str = SESSION_STORE) -> SessionStore:
+    if kind == "sqlite":
+        return SQLiteSessionStore()
+    if kind == "memory":
+        return LocalSessionStore()
+    raise ValueError(f"Unknown SESSION_STORE '{kind}' (expected memory or sqlite)")
@@ -0,0 +1,215 @@
+"""
+Skill extraction: an Aho-Corasick automaton over resume tokens, compiled once
+from a taxonomy of skills, aliases and categories
+"""
+import json
+import os
+import re
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from telemetry import logger
+
+SKILL_TAXONOMY_PATH = os.getenv(
+    "SKILL_TAXONOMY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "skills_taxonomy.json")
+)
+
+# Words are Unicode letters and digits (José, Zürich) and keep their inner
+# dots, pluses, hashes and underscores (node.js, c++, c#, asp.net, snake_case);
+# slashes, hyphens and ampersands are tokens of their own so "Python/Django"
+# and "React-based" still match while "ci/cd" and "scikit-learn" match as phrases
+TOKEN_RE = re.compile(r"[^\W_][\w+#]*(?:\.[\w+#]+)*|[/&-]")
+
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    """Lowercased tokens of text with their character offsets"""
+    return [(m.group(0).lower(), m.start(), m.end()) for m in TOKEN_RE.finditer(text)]
+
+
+class SkillTaxonomy:
+    """Canonical skills with their category and the surface forms that name them"""
+
+    def __init__(self, skills: List[dict]):
+        self.skills = skills
+
+    @classmethod
+    def load(cls, path: str = SKILL_TAXONOMY_PATH) -> "SkillTaxonomy":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["skills"])
+
+    def __len__(self):
+        return len(self.skills)
+
+
+class SkillMatch:
+    """One skill found in a text: how often, and where"""
+
+    __slots__ = ("name", "category", "count", "offsets")
+
+    def __init__(self, name: str, category: str):
+        self.name = name
+        self.category = category
+        self.count = 0
+        self.offsets: List[Tuple[int, int]] = []
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "category": self.category,
+            "count": self.count,
+            "offsets": [list(offset) for offset in self.offsets]
+        }
+
+    def __repr__(self):
+        return f"SkillMatch({self.name!r}, count={self.count})"
+
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton whose alphabet is tokens rather than characters, so
+    matches always cover whole tokens ("java" never matches inside "javascript")
+    and a scan is a single pass over the text whatever the taxonomy size
+    """
+
+    def __init__(self, taxonomy: SkillTaxonomy):
+        self.names: List[str] = []
+        self.categories: List[str] = []
+        # Pattern id -> (skill index, pattern length in tokens, exact casing required or None)
+        self.patterns: List[Tuple[int, int, Optional[str]]] = []
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]
+
+        seen: Dict[Tuple[Tuple[str, ...], Optional[str]], int] = {}
+        for skill in taxonomy.skills:
+            index = len(self.names)
+            self.names.append(skill["name"])
+            self.categories.append(skill.get("category", "other"))
+            exact = skill.get("case_sensitive", [])
+            forms = [(form, None) for form in [skill["name"]] + skill.get("aliases", [])
+                     if form.lower() not in {e.lower() for e in exact}]
+            forms += [(form, form) for form in exact]
+            for form, casing in forms:
+                tokens = tuple(token for token, _, _ in tokenize(form))
+                if not tokens:
+                    continue
+                key = (tokens, casing)
+                if key in seen:
+                    if self.names[seen[key]] != skill["name"]:
+                        logger.warning(f"Skill taxonomy: '{form}' already names '{self.names[seen[key]]}', "
+                                       f"ignoring it for '{skill['name']}'")
+                    continue
+                seen[key] = index
+                self._add_pattern(tokens, index, casing)
+        self._build_failure_links()
+        self.vocabulary = frozenset(token for edges in self.goto for token in edges)
+
+    def _add_pattern(self, tokens: Tuple[str, ...], skill_index: int, casing: Optional[str]):
+        state = 0
+        for token in tokens:
+            next_state = self.goto[state].get(token)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][token] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append(len(self.patterns))
+        self.patterns.append((skill_index, len(tokens), casing))
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(token, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    @property
+    def pattern_count(self) -> int:
+        return len(self.patterns)
+
+    def find(self, text: str) -> List[Tuple[int, int, int]]:
+        """
+        Non-overlapping (skill index, start, end) matches in text order; where
+        matches overlap the leftmost-longest wins ("machine learning" over "learning")
+        """
+        goto, fail, output, patterns, vocabulary = self.goto, self.fail, self.output, self.patterns, self.vocabulary
+        # Lowercasing ASCII keeps offsets intact, so do it once up front
+        ascii_text = text.isascii()
+        scanned = text.lower() if ascii_text else text
+        candidates = []
+        state = 0
+        position = 0
+        # Tokens since the last one outside the vocabulary: no pattern reaches further back
+        run: List[Tuple[int, int]] = []
+        for m in TOKEN_RE.finditer(scanned):
+            token = m.group(0) if ascii_text else m.group(0).lower()
+            position += 1
+            if token not in vocabulary:
+                state = 0
+                run = []
+                continue
+            end = m.end()
+            run.append((position, m.start()))
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for pattern_id in output[state]:
+                skill_index, length, casing = patterns[pattern_id]
+                first, start = run[-length]
+                if casing is not None and text[start:end] != casing:
+                    continue
+                candidates.append((first, -length, position, skill_index, start, end))
+
+        matches = []
+        covered_until = -1
+        for first, _, last, skill_index, start, end in sorted(candidates):
+            if first > covered_until:
+                matches.append((skill_index, start, end))
+                covered_until = last
+        return matches
+
+    def match(self, text: str) -> List[SkillMatch]:
+        """Skills in text ranked by frequency, ties broken by first appearance"""
+        found: Dict[int, SkillMatch] = {}
+        for skill_index, start, end in self.find(text):
+            entry = found.get(skill_index)
+            if entry is None:
+                entry = found[skill_index] = SkillMatch(self.names[skill_index], self.categories[skill_index])
+            entry.count += 1
+            entry.offsets.append((start, end))
+        return sorted(found.values(), key=lambda m: (-m.count, m.offsets[0][0]))
+
+    def top_skills(self, text: str, limit: int = 10) -> List[str]:
+        return [m.name for m in self.match(text)[:limit]]
+
+
+_default_matcher: Optional[SkillMatcher] = None
+_default_lock = threading.Lock()
+
+
+def get_skill_matcher() -> SkillMatcher:
+    """The matcher for SKILL_TAXONOMY_PATH, compiled on first use"""
+    global _default_matcher
+    if _default_matcher is None:
+        with _default_lock:
+            if _default_matcher is None:
+                taxonomy = SkillTaxonomy.load(SKILL_TAXONOMY_PATH)
+                _default_matcher = SkillMatcher(taxonomy)
+                logger.info(f"Skill matcher compiled: {len(taxonomy)} skills, "
+                            f"{_default_matcher.pattern_count} patterns")
+    return _default_matcher
+
+
+def match_skills(text: str) -> List[dict]:
+    """Frequency-ranked skills in text with their categories and character offsets"""
+    return [m.to_dict() for m in get_skill_matcher().match(text)]
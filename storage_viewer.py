@@ -3,22 +3,66 @@ Script to access and query the in-memory storage
 """
 import requests
 import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 
 API_BASE_URL = "http://localhost:8000"
+# Bytes read from the export stream and written to disk at a time
+EXPORT_CHUNK_SIZE = 64 * 1024
+# Requests in flight at once for multi-ID lookups (and pooled connections)
+LOOKUP_WORKERS = 8
 
 class StorageViewer:
     """Class to interact with in-memory storage"""
     
     def __init__(self, base_url=API_BASE_URL):
         self.base_url = base_url
+        # One pool of keep-alive connections for every call
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=LOOKUP_WORKERS)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # URL -> (ETag, decoded body), revalidated with If-None-Match
+        self.cache = {}
+        self.cache_lock = threading.Lock()
+    
+    def _get_json(self, path, params=None):
+        """
+        GET a JSON endpoint. A response seen before is revalidated with its ETag,
+        and the cached copy is reused when the server answers 304 Not Modified.
+        """
+        url = requests.Request("GET", f"{self.base_url}{path}", params=params).prepare().url
+        with self.cache_lock:
+            cached = self.cache.get(url)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = self.session.get(url, headers=headers)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        response.raise_for_status()
+        data = response.json()
+        etag = response.headers.get("ETag")
+        with self.cache_lock:
+            if etag:
+                self.cache[url] = (etag, data)
+            else:
+                self.cache.pop(url, None)
+        return data
+    
+    def _get_many(self, fetch, ids):
+        """fetch(id) for each ID at once over the pooled connections; {id: result}"""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(LOOKUP_WORKERS, len(ids))) as pool:
+            return dict(zip(ids, pool.map(fetch, ids)))
     
     def get_all_storage(self):
         """Get complete view of all in-memory storage"""
         try:
-            response = requests.get(f"{self.base_url}/api/admin/storage")
-            response.raise_for_status()
-            return response.json()
+            return self._get_json("/api/admin/storage")
         except requests.exceptions.RequestException as e:
             print(f"Error: {e}")
             return None
@@ -26,9 +70,7 @@ class StorageViewer:
     def get_applications(self):
         """Get all job applications"""
         try:
-            response = requests.get(f"{self.base_url}/api/applications")
-            response.raise_for_status()
-            return response.json()
+            return self._get_json("/api/applications")
         except requests.exceptions.RequestException as e:
             print(f"Error: {e}")
             return None
@@ -36,19 +78,19 @@ class StorageViewer:
     def get_application(self, app_id):
         """Get specific application by ID"""
         try:
-            response = requests.get(f"{self.base_url}/api/applications/{app_id}")
-            response.raise_for_status()
-            return response.json()
+            return self._get_json(f"/api/applications/{app_id}")
         except requests.exceptions.RequestException as e:
             print(f"Error: {e}")
             return None
     
+    def get_applications_by_id(self, app_ids):
+        """Several applications, fetched concurrently; {app_id: application or None}"""
+        return self._get_many(self.get_application, app_ids)
+    
     def get_all_sessions(self):
         """Get all interview sessions"""
         try:
-            response = requests.get(f"{self.base_url}/api/interview/sessions")
-            response.raise_for_status()
-            return response.json()
+            return self._get_json("/api/interview/sessions")
         except requests.exceptions.RequestException as e:
             print(f"Error: {e}")
             return None
@@ -56,17 +98,19 @@ class StorageViewer:
     def get_session(self, session_id):
         """Get specific interview session"""
         try:
-            response = requests.get(f"{self.base_url}/api/interview/session/{session_id}")
-            response.raise_for_status()
-            return response.json()
+            return self._get_json(f"/api/interview/session/{session_id}")
         except requests.exceptions.RequestException as e:
             print(f"Error: {e}")
             return None
     
+    def get_sessions_by_id(self, session_ids):
+        """Several interview sessions, fetched concurrently; {session_id: session or None}"""
+        return self._get_many(self.get_session, session_ids)
+    
     def download_resume(self, app_id, save_path=None):
         """Download resume file for an application"""
         try:
-            response = requests.get(f"{self.base_url}/api/applications/{app_id}/resume")
+            response = self.session.get(f"{self.base_url}/api/applications/{app_id}/resume")
             response.raise_for_status()
             
             # Get filename from Content-Disposition header
@@ -91,9 +135,7 @@ class StorageViewer:
     def list_all_resumes(self):
         """List all resume files"""
         try:
-            response = requests.get(f"{self.base_url}/api/resumes")
-            response.raise_for_status()
-            return response.json()
+            return self._get_json("/api/resumes")
         except requests.exceptions.RequestException as e:
             print(f"Error: {e}")
             return None
@@ -101,8 +143,10 @@ class StorageViewer:
     def reset_storage(self):
         """Clear all in-memory storage"""
         try:
-            response = requests.delete(f"{self.base_url}/api/admin/storage/reset")
+            response = self.session.delete(f"{self.base_url}/api/admin/storage/reset")
             response.raise_for_status()
+            with self.cache_lock:
+                self.cache.clear()
             return response.json()
         except requests.exceptions.RequestException as e:
             print(f"Error: {e}")
@@ -137,9 +181,9 @@ class StorageViewer:
                 status = "✓ Evaluated" if 'evaluation' in session else "⏳ Pending"
                 print(f"  • {session_id}: {session['position']} - {status}")
     
-    def print_application_details(self, app_id):
-        """Print detailed information about an application"""
-        app = self.get_application(app_id)
+    def print_application_details(self, app_id, app=None):
+        """Print detailed information about an application (fetched unless given)"""
+        app = app or self.get_application(app_id)
         if not app:
             print(f"Application {app_id} not found")
             return
@@ -158,9 +202,9 @@ class StorageViewer:
         if app.get('cover_letter'):
             print(f"\nCover Letter:\n{app['cover_letter']}")
     
-    def print_session_details(self, session_id):
-        """Print detailed information about an interview session"""
-        session = self.get_session(session_id)
+    def print_session_details(self, session_id, session=None):
+        """Print detailed information about an interview session (fetched unless given)"""
+        session = session or self.get_session(session_id)
         if not session:
             print(f"Session {session_id} not found")
             return
@@ -200,34 +244,60 @@ class StorageViewer:
                 print(f"    Q{score['question_id']}: {score['score']}/10")
                 print(f"      {score['feedback']}")
     
-    def export_to_json(self, filename="storage_export.json"):
-        """Export all storage to a JSON file"""
-        storage = self.get_all_storage()
-        if not storage:
-            print("Failed to retrieve storage data")
-            return
+    def export_to_json(self, filename="storage_export.ndjson", since=None):
+        """
+        Export storage to an NDJSON file, one record per line, streamed from
+        /api/admin/export straight to disk. Pass since (an ISO time, such as the
+        "until" of the previous export) to export only what changed since then.
+        Returns the export's closing line (counts and "until"), or None.
+        """
+        params = {"since": since} if since else {}
+        partial_path = filename + ".part"
+        tail = b""
+        try:
+            with self.session.get(f"{self.base_url}/api/admin/export", params=params, stream=True) as response:
+                response.raise_for_status()
+                with open(partial_path, 'wb') as f:
+                    # Decompressed as it arrives; only the last line is kept in memory
+                    for chunk in response.iter_content(chunk_size=EXPORT_CHUNK_SIZE):
+                        f.write(chunk)
+                        tail = (tail + chunk)[-EXPORT_CHUNK_SIZE:]
+        except (requests.exceptions.RequestException, OSError) as e:
+            print(f"Error exporting storage: {e}")
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            return None
         
-        with open(filename, 'w') as f:
-            json.dump(storage, f, indent=2)
+        try:
+            summary = json.loads(tail.rstrip(b"\n").rsplit(b"\n", 1)[-1])
+        except ValueError:
+            summary = {}  # empty, or cut off mid-line
+        if not isinstance(summary, dict) or summary.get("type") != "end":
+            print("Export ended early; nothing was written")
+            os.remove(partial_path)
+            return None
+        os.replace(partial_path, filename)
         
-        print(f"✓ Storage exported to {filename}")
+        counts = ", ".join(f"{count} {kind.replace('_', ' ')}" for kind, count in summary["counts"].items())
+        print(f"✓ Storage exported to {filename} ({counts})")
+        print(f"  Next incremental export: since={summary['until']}")
+        return summary
     
-    def search_applications(self, keyword):
-        """Search applications by keyword"""
-        storage = self.get_all_storage()
-        if not storage:
+    def search_applications(self, keyword, position=None, skills=None, page=1, page_size=50):
+        """
+        Search applications on the server (name, email, position, cover letter,
+        resume text and skills); end a word with * to match by prefix
+        """
+        params = {"q": keyword, "page": page, "page_size": page_size}
+        if position:
+            params["position"] = position
+        if skills:
+            params["skills"] = ",".join(skills)
+        try:
+            return self._get_json("/api/search", params)["results"]
+        except requests.exceptions.RequestException as e:
+            print(f"Error: {e}")
             return []
-        
-        results = []
-        keyword_lower = keyword.lower()
-        
-        for app in storage['applications']['data']:
-            if (keyword_lower in app['full_name'].lower() or
-                keyword_lower in app['email'].lower() or
-                keyword_lower in app['position'].lower()):
-                results.append(app)
-        
-        return results
 
 def main():
     """Interactive menu to access storage"""
@@ -244,7 +314,7 @@ def main():
         print("  4. List All Interview Sessions")
         print("  5. View Session Details")
         print("  6. View Raw JSON (All Storage)")
-        print("  7. Export to JSON File")
+        print("  7. Export to NDJSON File")
         print("  8. Search Applications")
         print("  9. List All Resumes")
         print(" 10. Download Resume")
@@ -266,8 +336,12 @@ def main():
                 print("\nNo applications found.")
         
         elif choice == "3":
-            app_id = input("Enter Application ID: ").strip()
-            viewer.print_application_details(app_id)
+            app_ids = [app_id.strip() for app_id in input("Enter Application ID(s), comma-separated: ").split(",")]
+            for app_id, app in viewer.get_applications_by_id(filter(None, app_ids)).items():
+                if app:
+                    viewer.print_application_details(app_id, app)
+                else:
+                    print(f"Application {app_id} not found")
         
         elif choice == "4":
             sessions = viewer.get_all_sessions()
@@ -281,8 +355,12 @@ def main():
                 print("\nNo interview sessions found.")
         
         elif choice == "5":
-            session_id = input("Enter Session ID: ").strip()
-            viewer.print_session_details(session_id)
+            session_ids = [session_id.strip() for session_id in input("Enter Session ID(s), comma-separated: ").split(",")]
+            for session_id, session in viewer.get_sessions_by_id(filter(None, session_ids)).items():
+                if session:
+                    viewer.print_session_details(session_id, session)
+                else:
+                    print(f"Session {session_id} not found")
         
         elif choice == "6":
             storage = viewer.get_all_storage()
@@ -293,13 +371,14 @@ def main():
                 print(json.dumps(storage, indent=2))
         
         elif choice == "7":
-            filename = input("Enter filename (default: storage_export.json): ").strip()
+            filename = input("Enter filename (default: storage_export.ndjson): ").strip()
             if not filename:
-                filename = "storage_export.json"
-            viewer.export_to_json(filename)
+                filename = "storage_export.ndjson"
+            since = input("Only changes since (ISO time, press Enter for everything): ").strip()
+            viewer.export_to_json(filename, since or None)
         
         elif choice == "8":
-            keyword = input("Enter search keyword: ").strip()
+            keyword = input("Enter search keywords (word* for prefix): ").strip()
             results = viewer.search_applications(keyword)
             if results:
                 print(f"\n🔍 Found {len(results)} matching applications:")